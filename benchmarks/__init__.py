@@ -0,0 +1 @@
+"""Pruebas de carga y servidor simulado de DeepSeek."""
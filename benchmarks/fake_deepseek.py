@@ -0,0 +1,163 @@
+"""Servidor local que imita la API de chat-completions de DeepSeek para pruebas de carga.
+
+Uso independiente (por ejemplo, para apuntar un despliegue con DEEPSEEK_API_URL):
+
+    python -m benchmarks.fake_deepseek --port 9000 --latency-ms 300 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.infrastructure.mock_threat_detector import DEFAULT_RULES
+from src.infrastructure.rule_matcher import RuleMatcher
+
+# Formas de respuesta disponibles
+SHAPES = ("standard", "verbose", "markdown", "malformed")
+
+# Texto del prompt individual y bloques "[n]" del prompt empaquetado
+_SINGLE_TEXT_PATTERN = re.compile(r'Analiza: "(.*)"\n', re.DOTALL)
+_PACKED_TEXT_PATTERN = re.compile(r'^\[(\d+)\] "(.*)"$', re.MULTILINE)
+
+
+@dataclass
+class FakeDeepSeekSettings:
+    """Comportamiento del servidor simulado.
+
+    Attributes:
+        latency_ms: Latencia media de cada respuesta en milisegundos
+        jitter_ms: Variación máxima (±) de la latencia en milisegundos
+        error_rate: Proporción de respuestas con error HTTP (0-1)
+        shape: Forma del contenido de la respuesta (ver `SHAPES`)
+        stream_chunk_chars: Caracteres por fragmento en las respuestas en streaming
+    """
+
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    shape: str = "standard"
+    stream_chunk_chars: int = 8
+
+
+def _verdict_block(matcher: RuleMatcher, text: str, shape: str) -> str:
+    """Construye el bloque `Tipo/Palabra/Por qué` para un texto con la forma indicada."""
+    analysis = matcher.match(text)
+    threat_type = analysis.threat_type.value
+    if shape == "malformed":
+        return f"El texto parece {threat_type}, palabra {analysis.keyword}."
+    if shape == "markdown":
+        return (
+            f"**Tipo:** {threat_type}\n"
+            f"**Palabra:** {analysis.keyword}\n"
+            f"**Por qué:** {analysis.justification}"
+        )
+    block = f"Tipo: {threat_type}\nPalabra: {analysis.keyword}\nPor qué: {analysis.justification}"
+    if shape == "verbose":
+        return f"Claro, este es el análisis solicitado.\n\n{block}\n\nEspero que sea de ayuda."
+    return block
+
+
+def build_content(matcher: RuleMatcher, prompt: str, shape: str) -> str:
+    """Genera el contenido de la respuesta para un prompt individual o empaquetado.
+
+    Args:
+        matcher: Motor de reglas usado para decidir el veredicto de cada texto
+        prompt: Prompt recibido
+        shape: Forma del contenido (ver `SHAPES`)
+
+    Returns:
+        El contenido que devolvería el modelo
+    """
+    packed = _PACKED_TEXT_PATTERN.findall(prompt)
+    if packed:
+        return "\n\n".join(f"[{number}]\n{_verdict_block(matcher, text, shape)}" for number, text in packed)
+    match = _SINGLE_TEXT_PATTERN.search(prompt)
+    return _verdict_block(matcher, match.group(1) if match else prompt, shape)
+
+
+def create_fake_deepseek(settings: FakeDeepSeekSettings) -> FastAPI:
+    """Crea la aplicación del servidor simulado.
+
+    Args:
+        settings: Comportamiento del servidor
+
+    Returns:
+        La aplicación FastAPI con el endpoint `/chat/completions`
+    """
+    if settings.shape not in SHAPES:
+        raise ValueError(f"Forma de respuesta desconocida: {settings.shape}")
+    app = FastAPI(title="DeepSeek simulado")
+    matcher = RuleMatcher(DEFAULT_RULES)
+
+    def latency() -> float:
+        return max(0.0, settings.latency_ms + random.uniform(-settings.jitter_ms, settings.jitter_ms)) / 1000
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = body["messages"][0]["content"]
+        delay = latency()
+
+        if settings.error_rate and random.random() < settings.error_rate:
+            await asyncio.sleep(delay)
+            status = random.choice((429, 500, 503))
+            return JSONResponse({"error": {"message": "error simulado"}}, status_code=status)
+
+        content = build_content(matcher, prompt, settings.shape)
+
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return {
+                "id": "fake",
+                "object": "chat.completion",
+                "model": body.get("model", "deepseek-chat"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        size = max(1, settings.stream_chunk_chars)
+        chunks: List[str] = [content[start:start + size] for start in range(0, len(content), size)]
+
+        async def events() -> AsyncIterator[str]:
+            # La latencia se reparte entre el primer fragmento y el resto
+            await asyncio.sleep(delay / 2)
+            for chunk in chunks:
+                yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': chunk}}]})}\n\n"
+                await asyncio.sleep(delay / 2 / len(chunks))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    """Inicia el servidor simulado de forma independiente."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor simulado de DeepSeek")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--shape", choices=SHAPES, default="standard")
+    args = parser.parse_args()
+
+    settings = FakeDeepSeekSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.shape)
+    print(f"DeepSeek simulado en http://{args.host}:{args.port}/chat/completions")
+    uvicorn.run(create_fake_deepseek(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
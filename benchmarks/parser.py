@@ -0,0 +1,61 @@
+"""Microbenchmark de la extracción del análisis a partir de las respuestas del modelo.
+
+Mide el tiempo por respuesta y la proporción de respuestas clasificadas como el
+veredicto esperado para cada forma de respuesta del servidor simulado:
+
+    python -m benchmarks.parser --number 20000
+"""
+
+import argparse
+import timeit
+from typing import Dict, List, Optional
+
+from benchmarks.fake_deepseek import SHAPES, build_content
+from benchmarks.run import SAMPLE_TEXTS
+from src.infrastructure.mock_threat_detector import DEFAULT_RULES
+from src.infrastructure.response_parser import parse_analysis
+from src.infrastructure.rule_matcher import RuleMatcher
+
+
+def benchmark_parser(number: int = 20000, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Mide la extracción para cada forma de respuesta.
+    
+    Args:
+        number: Respuestas analizadas en cada repetición
+        repeat: Repeticiones; se toma la más rápida
+    
+    Returns:
+        Por forma de respuesta, microsegundos por respuesta y proporción de aciertos
+    """
+    matcher = RuleMatcher(DEFAULT_RULES)
+    results: Dict[str, Dict[str, float]] = {}
+    for shape in SHAPES:
+        samples = [(build_content(matcher, f'Analiza: "{text}"\n', shape), matcher.match(text)) for text in SAMPLE_TEXTS]
+        correct = sum(
+            1 for raw, expected in samples
+            if (parsed := parse_analysis(raw)).threat_type == expected.threat_type and parsed.keyword == expected.keyword
+        )
+        rounds = max(1, number // len(samples))
+        elapsed = min(timeit.repeat(
+            lambda: [parse_analysis(raw) for raw, _ in samples], number=rounds, repeat=repeat
+        ))
+        results[shape] = {
+            "us_per_response": round(elapsed / (rounds * len(samples)) * 1e6, 2),
+            "accuracy": round(correct / len(samples), 3),
+        }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada del microbenchmark."""
+    parser = argparse.ArgumentParser(description="Microbenchmark de la extracción de respuestas")
+    parser.add_argument("--number", type=int, default=20000, help="Respuestas por repetición")
+    args = parser.parse_args(argv)
+    
+    print(f"{'forma':<12}{'µs/respuesta':>14}{'aciertos':>10}")
+    for shape, result in benchmark_parser(args.number).items():
+        print(f"{shape:<12}{result['us_per_response']:>14.2f}{result['accuracy']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""Pruebas de carga de la API contra un servidor local que imita a DeepSeek.
+
+Levanta el servidor simulado y la API en procesos locales, lanza peticiones a
+`/analysis`, `/analysis/batch` y `/analysis/stream` con distintos niveles de
+concurrencia y muestra las latencias p50/p95/p99, las peticiones por segundo y la
+memoria residente del proceso de la API. Opcionalmente compara con una línea base guardada.
+
+    python -m benchmarks.run --concurrency 1,16,64 --requests 500
+    python -m benchmarks.run --save-baseline              # guarda benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_deepseek import SHAPES, FakeDeepSeekSettings
+from src.infrastructure.config import Config
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Fábrica de la API bajo prueba
+APP_FACTORY = "src.infrastructure.api:create_app"
+
+# Mensajes de ejemplo: amenazas explícitas, implícitas y textos inofensivos
+SAMPLE_TEXTS = [
+    "Si no paga la vacuna esta semana, le quemamos el local",
+    "Buenos días, ¿a qué hora abren mañana?",
+    "Queremos ofrecerle protección para su negocio, pase por la oficina",
+    "Sabemos dónde estudian sus hijos, colabore con la causa",
+    "Le recuerdo que el pedido de pan llega a las 7",
+    "Mañana le hacemos una visita para hablar de la colaboración",
+    "Entregue el dinero o se lo llevamos a su familia",
+    "Gracias por la atención, muy buen servicio",
+    "Tenemos a su hijo, no llame a la policía",
+    "El proveedor de bebidas cambia de horario la próxima semana",
+    "Esto es un asalto, entregue todo lo de la caja",
+    "¿Tiene cambio de un billete de veinte?",
+]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Combinación de detector y patrón de textos a medir.
+
+    Attributes:
+        name: Nombre del escenario
+        use_mock: Si es True se usa `MockDeepSeekThreatDetector`; si no, DeepSeek simulado
+        repeated: Si es True se repiten los mismos textos (aciertos de caché);
+            si no, cada texto es único (fallos de caché)
+    """
+
+    name: str
+    use_mock: bool
+    repeated: bool
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario("mock-miss", use_mock=True, repeated=False),
+        Scenario("mock-hit", use_mock=True, repeated=True),
+        Scenario("deepseek-miss", use_mock=False, repeated=False),
+        Scenario("deepseek-hit", use_mock=False, repeated=True),
+    )
+}
+
+ENDPOINTS = ("analysis", "batch", "stream")
+
+# Contador global para que los textos "únicos" no se repitan entre ejecuciones
+_unique_ids = itertools.count()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Calcula un percentil por interpolación lineal.
+
+    Args:
+        sorted_values: Valores ordenados de menor a mayor
+        fraction: Percentil entre 0 y 1
+
+    Returns:
+        El valor del percentil, o 0 si no hay valores
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Memoria residente actual de un proceso en MB, o None si no se puede leer (solo Linux)."""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _free_port() -> int:
+    """Obtiene un puerto TCP libre en la interfaz local."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class ServerProcess:
+    """Servidor ejecutado en un proceso aparte sobre un puerto libre.
+
+    Los servidores no comparten proceso con el generador de carga: en el mismo
+    proceso competirían por el GIL y las latencias medidas incluirían esa espera.
+    """
+
+    def __init__(self, args: List[str], env: Dict[str, str]):
+        """Prepara el proceso.
+
+        Args:
+            args: Argumentos tras `python -m`; `{port}` se sustituye por el puerto asignado
+            env: Variables de entorno adicionales
+        """
+        self.port = _free_port()
+        self._args = [sys.executable, "-m"] + [arg.format(port=self.port) for arg in args]
+        self._env = {**os.environ, **env}
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    def __enter__(self) -> "ServerProcess":
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._process = subprocess.Popen(self._args, env=self._env, cwd=root)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"El servidor terminó al iniciarse: {' '.join(self._args)}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.5).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"El servidor no respondió a tiempo: {' '.join(self._args)}")
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=Config.SHUTDOWN_GRACE_SECONDS + 5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+
+def _make_text(scenario: Scenario, index: int) -> str:
+    """Obtiene el texto de la petición según el escenario."""
+    text = SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]
+    if scenario.repeated:
+        return text
+    return f"{text} (ref {next(_unique_ids)})"
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, scenario: Scenario, index: int, batch_size: int) -> bool:
+    """Envía una petición y devuelve si terminó sin error ni análisis de respaldo."""
+    if endpoint == "batch":
+        texts = [_make_text(scenario, index * batch_size + offset) for offset in range(batch_size)]
+        response = await client.post("/analysis/batch", json={"texts": texts})
+        body = response.content
+    elif endpoint == "stream":
+        async with client.stream("POST", "/analysis/stream", json={"text": _make_text(scenario, index)}) as response:
+            body = await response.aread()
+        if b"event: error" in body:
+            return False
+    else:
+        response = await client.post("/analysis", json={"text": _make_text(scenario, index)})
+        body = response.content
+    return response.status_code == 200 and b'"error_' not in body
+
+
+async def _drive(
+    base_url: str,
+    endpoint: str,
+    scenario: Scenario,
+    total: int,
+    concurrency: int,
+    batch_size: int,
+    server_pid: int
+) -> Dict[str, Any]:
+    """Lanza `total` peticiones con `concurrency` clientes simultáneos y resume las latencias."""
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+    # Sin TCP_NODELAY, el envío de cabeceras y cuerpo por separado choca con el ACK
+    # retardado del servidor y añade ~40 ms a cada petición
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+    )
+
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=120.0) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while True:
+                index = next(counter)
+                if index >= total:
+                    return
+                started = time.perf_counter()
+                try:
+                    ok = await _send(client, endpoint, scenario, index, batch_size)
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "rss_mb": _round(_rss_mb(server_pid)),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def _api_env(scenario: Scenario, deepseek_url: str) -> Dict[str, str]:
+    """Variables de entorno de la API para el escenario."""
+    return {
+        "USE_MOCK": "true" if scenario.use_mock else "false",
+        "USE_CACHE": "true",
+        "CACHE_BACKEND": "memory",
+        "DEEPSEEK_API_URL": deepseek_url,
+        "DEEPSEEK_API_KEY": "benchmark",
+        # Los registros de resumen por análisis distorsionarían las medidas
+        "LOG_SAMPLE_RATE": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def run_benchmarks(
+    scenarios: List[Scenario],
+    endpoints: List[str],
+    concurrency_levels: List[int],
+    total: int,
+    batch_size: int,
+    fake_settings: FakeDeepSeekSettings,
+    report: Callable[[str, Dict[str, Any]], None] = lambda key, result: None
+) -> Dict[str, Dict[str, Any]]:
+    """Ejecuta todas las combinaciones de escenario, endpoint y concurrencia.
+
+    Args:
+        scenarios: Escenarios a medir
+        endpoints: Endpoints a medir (ver `ENDPOINTS`)
+        concurrency_levels: Niveles de concurrencia
+        total: Peticiones por combinación
+        batch_size: Textos por petición en el endpoint de lotes
+        fake_settings: Comportamiento del DeepSeek simulado
+        report: Función invocada con cada resultado según se obtiene
+
+    Returns:
+        Resultados por clave `escenario/endpoint/cN`
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    fake_args = [
+        "benchmarks.fake_deepseek", "--port", "{port}",
+        "--latency-ms", str(fake_settings.latency_ms), "--jitter-ms", str(fake_settings.jitter_ms),
+        "--error-rate", str(fake_settings.error_rate), "--shape", fake_settings.shape,
+    ]
+    api_args = ["uvicorn", APP_FACTORY, "--factory", "--port", "{port}", "--log-level", "warning", "--no-access-log"]
+    with ServerProcess(fake_args, {}) as fake:
+        deepseek_url = f"{fake.url}/chat/completions"
+        for scenario in scenarios:
+            with ServerProcess(api_args, _api_env(scenario, deepseek_url)) as api:
+                if scenario.repeated:
+                    # Calentar la caché con los textos que se repetirán
+                    asyncio.run(_drive(api.url, "analysis", scenario, len(SAMPLE_TEXTS), 1, batch_size, api.pid))
+                for endpoint in endpoints:
+                    for concurrency in concurrency_levels:
+                        key = f"{scenario.name}/{endpoint}/c{concurrency}"
+                        results[key] = asyncio.run(
+                            _drive(api.url, endpoint, scenario, total, concurrency, batch_size, api.pid)
+                        )
+                        report(key, results[key])
+    return results
+
+
+def compare_with_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float
+) -> List[str]:
+    """Detecta regresiones respecto a una línea base.
+
+    Se considera regresión que el p95 o el p99 crezcan, o que las peticiones por
+    segundo bajen, más de `tolerance` (proporción) respecto a la línea base.
+
+    Args:
+        results: Resultados actuales
+        baseline: Resultados de la línea base
+        tolerance: Variación máxima permitida (por ejemplo, 0.2 para un 20 %)
+
+    Returns:
+        Descripción de cada regresión encontrada
+    """
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if reference[metric] and current[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {reference[metric]} -> {current[metric]}")
+        if reference["rps"] and current["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: rps {reference['rps']} -> {current['rps']}")
+    return regressions
+
+
+def _print_result(key: str, result: Dict[str, Any]) -> None:
+    print(
+        f"{key:<32} rps={result['rps']:>9.1f}  p50={result['p50_ms']:>8.2f}ms  "
+        f"p95={result['p95_ms']:>8.2f}ms  p99={result['p99_ms']:>8.2f}ms  "
+        f"errores={result['errors']:>4}  rss={result['rss_mb']}MB",
+        flush=True
+    )
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de las pruebas de carga.
+
+    Returns:
+        0 si no hay regresiones, 1 en otro caso
+    """
+    parser = argparse.ArgumentParser(description="Pruebas de carga de Kuntur Detector")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Escenarios separados por comas")
+    parser.add_argument("--endpoints", default="analysis", help=f"Endpoints separados por comas ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--concurrency", default="1,16,64", help="Niveles de concurrencia separados por comas")
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por combinación")
+    parser.add_argument("--batch-size", type=int, default=20, help="Textos por petición de lote")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Latencia media del DeepSeek simulado")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Variación de la latencia simulada")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proporción de errores simulados (0-1)")
+    parser.add_argument("--shape", choices=SHAPES, default="standard", help="Forma de las respuestas simuladas")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="Línea base con la que comparar")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="Guardar los resultados como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Variación permitida frente a la línea base")
+    args = parser.parse_args(argv)
+
+    unknown = set(_split(args.scenarios)).difference(SCENARIOS) | set(_split(args.endpoints)).difference(ENDPOINTS)
+    if unknown:
+        parser.error(f"Valores desconocidos: {', '.join(sorted(unknown))}")
+
+    results = run_benchmarks(
+        scenarios=[SCENARIOS[name] for name in _split(args.scenarios)],
+        endpoints=_split(args.endpoints),
+        concurrency_levels=[int(level) for level in _split(args.concurrency)],
+        total=args.requests,
+        batch_size=args.batch_size,
+        fake_settings=FakeDeepSeekSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.shape),
+        report=_print_result
+    )
+
+    document = {
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "save_baseline")},
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(document, output, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Regresiones respecto a la línea base:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("Sin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
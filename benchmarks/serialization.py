@@ -0,0 +1,150 @@
+"""Microbenchmark de la serialización de las respuestas de análisis.
+
+Compara el coste de CPU por respuesta de la serialización genérica de FastAPI
+(`model_dump` + `jsonable_encoder` + `json.dumps`) con la de
+`src/infrastructure/json_response.py`, para un análisis nuevo y para uno que
+vuelve de la caché, y mide una petición completa a `/analysis` dentro del
+proceso (sin red) con cada forma de respuesta:
+
+    python -m benchmarks.serialization --number 20000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import timeit
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.run import SAMPLE_TEXTS
+from src.domain.models import ThreatAnalysis
+from src.infrastructure.api import TextAnalysisRequest
+from src.infrastructure.json_response import analysis_json, analysis_response
+from src.infrastructure.mock_threat_detector import DEFAULT_RULES
+from src.infrastructure.rule_matcher import RuleMatcher
+
+
+def _generic_json(analysis: ThreatAnalysis) -> bytes:
+    """Serializa un análisis como lo hace FastAPI con un diccionario devuelto por la ruta."""
+    return JSONResponse(jsonable_encoder(analysis.model_dump())).body
+
+
+def benchmark_serialization(number: int = 20000, repeat: int = 5) -> Dict[str, float]:
+    """Mide la serialización de un análisis con cada método.
+    
+    Args:
+        number: Análisis serializados en cada repetición
+        repeat: Repeticiones; se toma la más rápida
+    
+    Returns:
+        Microsegundos por análisis para la serialización genérica (`generic`), la de
+        un análisis nuevo (`fresh`) y la de un análisis que vuelve de la caché (`cached`)
+    """
+    matcher = RuleMatcher(DEFAULT_RULES)
+    analyses = [matcher.match(text) for text in SAMPLE_TEXTS]
+    rounds = max(1, number // len(analyses))
+    
+    def measure(serialize) -> float:
+        elapsed = min(timeit.repeat(lambda: [serialize(analysis) for analysis in analyses], number=rounds, repeat=repeat))
+        return round(elapsed / (rounds * len(analyses)) * 1e6, 2)
+    
+    return {
+        "generic": measure(_generic_json),
+        # Sin serialización previa que reutilizar, como un análisis recién obtenido
+        "fresh": measure(lambda analysis: analysis.__pydantic_serializer__.to_json(analysis)),
+        "cached": measure(analysis_json),
+    }
+
+
+def _build_app(matcher: RuleMatcher) -> FastAPI:
+    """Construye una aplicación con la ruta genérica (`/generic`) y la de la API (`/analysis`)."""
+    app = FastAPI()
+    
+    @app.post("/generic")
+    async def generic(request: TextAnalysisRequest):
+        return matcher.match(request.text).model_dump()
+    
+    @app.post("/analysis", response_model=ThreatAnalysis)
+    async def analysis(request: TextAnalysisRequest):
+        return analysis_response(matcher.match(request.text))
+    
+    return app
+
+
+async def _call(app: FastAPI, path: str, body: bytes) -> bytes:
+    """Ejecuta una petición POST contra la aplicación ASGI y devuelve el cuerpo de la respuesta."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    chunks: List[bytes] = []
+    
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+    
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+    
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def benchmark_requests(number: int = 2000, repeat: int = 3) -> Dict[str, float]:
+    """Mide peticiones completas a una ruta de análisis dentro del proceso.
+    
+    El análisis lo resuelve el detector por reglas, que devuelve siempre las mismas
+    instancias, como la caché en memoria en un acierto.
+    
+    Args:
+        number: Peticiones en cada repetición
+        repeat: Repeticiones; se toma la más rápida
+    
+    Returns:
+        Microsegundos por petición con la respuesta genérica (`generic`) y la de la API (`analysis`)
+    """
+    app = _build_app(RuleMatcher(DEFAULT_RULES))
+    bodies = [json.dumps({"text": text}).encode() for text in SAMPLE_TEXTS]
+    
+    async def run(path: str) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for index in range(number):
+                await _call(app, path, bodies[index % len(bodies)])
+            best = min(best, time.perf_counter() - start)
+        return round(best / number * 1e6, 2)
+    
+    async def run_all() -> Dict[str, float]:
+        return {path.strip("/"): await run(path) for path in ("/generic", "/analysis")}
+    
+    return asyncio.run(run_all())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada del microbenchmark."""
+    parser = argparse.ArgumentParser(description="Microbenchmark de la serialización de respuestas")
+    parser.add_argument("--number", type=int, default=20000, help="Análisis serializados por repetición")
+    parser.add_argument("--requests", type=int, default=2000, help="Peticiones por repetición")
+    args = parser.parse_args(argv)
+    
+    serialization = benchmark_serialization(args.number)
+    print(f"{'serialización':<16}{'µs/análisis':>14}")
+    for method, micros in serialization.items():
+        print(f"{method:<16}{micros:>14.2f}")
+    
+    requests = benchmark_requests(args.requests)
+    print(f"\n{'ruta':<16}{'µs/petición':>14}")
+    for route, micros in requests.items():
+        print(f"{route:<16}{micros:>14.2f}")
+    print(f"\nCPU ahorrada por petición: {requests['generic'] - requests['analysis']:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
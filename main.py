@@ -1,5 +1,8 @@
 """Punto de entrada principal del servidor de detección de amenazas Kuntur."""
 
+import argparse
+import importlib.util
+
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -7,28 +10,54 @@ from dotenv import load_dotenv
 # Cargar variables de entorno
 load_dotenv()
 
-from src.infrastructure.api import ThreatDetectionAPI
 from src.infrastructure.config import Config
 
+# Fábrica de la aplicación: cada worker construye su propia ThreatDetectionAPI
+APP_FACTORY = "src.infrastructure.api:create_app"
+
+
+def parse_args() -> argparse.Namespace:
+    """Lee los argumentos de línea de comandos.
+
+    Returns:
+        Los argumentos, con los valores de `Config` por defecto
+    """
+    parser = argparse.ArgumentParser(description="Servidor Kuntur Detector")
+    parser.add_argument("--host", default=Config.HOST, help="Dirección en la que escuchar")
+    parser.add_argument("--port", type=int, default=Config.PORT, help="Puerto en el que escuchar")
+    parser.add_argument("--workers", type=int, default=Config.WORKERS, help="Número de procesos worker")
+    return parser.parse_args()
+
 
 def main():
     """Inicia el servidor de la API."""
-    # Crear y obtener la instancia de la API
-    api_instance = ThreatDetectionAPI()
-    app = api_instance.app
-    
-    # Obtener la configuración del servidor
-    host = Config.HOST
-    port = Config.PORT
-    
+    args = parse_args()
+    host = args.host
+    port = args.port
+    workers = max(1, args.workers)
+
+    # Usar uvloop y httptools si están instalados (pip install "uvicorn[standard]")
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
     print(f"Iniciando servidor Kuntur Detector en http://{host}:{port}")
     print(f"Modo: {'Simulado' if Config.USE_MOCK else 'Real'}")
     print(f"Ambiente: {Config.ENV}")
+    print(f"Workers: {workers} (bucle: {loop}, HTTP: {http})")
     print(f"UI disponible en: http://{host}:{port}/ui/")
     print(f"Documentación API: http://{host}:{port}/docs")
-    
+
     # Iniciar el servidor
-    uvicorn.run(app, host=host, port=port)
+    uvicorn.run(
+        APP_FACTORY,
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_graceful_shutdown=Config.SHUTDOWN_GRACE_SECONDS
+    )
 
 
 if __name__ == "__main__":
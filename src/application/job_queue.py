@@ -0,0 +1,267 @@
+"""Cola de trabajos de análisis en segundo plano para cargas grandes."""
+
+import uuid
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from src.application.use_cases import AnalyzeTextUseCase
+from src.domain.exceptions import DetectorOverloadedError
+from src.domain.models import JobInfo, JobStatus
+from src.domain.ports import JobStorePort
+
+logger = logging.getLogger("job_queue")
+
+# Estados en los que un trabajo ya no cambia
+_FINISHED = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+# Resultados leídos del almacén en cada consulta al seguir un trabajo
+_RESULTS_PAGE = 500
+
+
+class AnalysisJobQueue:
+    """Procesa trabajos de análisis grandes con un número acotado de workers.
+    
+    Cada trabajo se analiza por tramos de `chunk_size` textos con el mismo caso de
+    uso (y por tanto el mismo detector, caché y límite de concurrencia) que la API
+    síncrona. Los resultados se guardan al terminar cada tramo, de modo que tras
+    un reinicio el trabajo continúa desde el primer texto sin resultado. Mientras
+    se analiza un trabajo su concesión se renueva periódicamente, también durante
+    los tramos lentos y las esperas por saturación. Los trabajos cuya concesión
+    expiró (por ejemplo, porque el proceso que los analizaba se detuvo) se
+    recuperan periódicamente.
+    """
+    
+    def __init__(
+        self,
+        use_case: AnalyzeTextUseCase,
+        store: JobStorePort,
+        workers: int = 2,
+        chunk_size: int = 50,
+        max_concurrency: int = 4,
+        lease_seconds: float = 60.0,
+        poll_interval: float = 1.0
+    ):
+        """Inicializa la cola.
+        
+        Args:
+            use_case: Caso de uso de análisis
+            store: Almacén persistente de los trabajos
+            workers: Número de trabajos que se analizan a la vez
+            chunk_size: Textos analizados y guardados en cada tramo
+            max_concurrency: Análisis simultáneos hacia el detector dentro de cada tramo
+            lease_seconds: Duración de la concesión de un trabajo, renovada cada tercio de su duración
+            poll_interval: Intervalo de consulta del almacén al seguir un trabajo, en segundos
+        """
+        self._use_case = use_case
+        self._store = store
+        self._worker_count = max(1, workers)
+        self._chunk_size = max(1, chunk_size)
+        self._max_concurrency = max_concurrency
+        self._lease_seconds = lease_seconds
+        self._poll_interval = poll_interval
+        
+        # Identificador de este proceso frente a los demás que comparten el almacén
+        self._owner = uuid.uuid4().hex
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._queued: Set[str] = set()
+        self._active: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        # Avisos de progreso y número de seguidores de cada trabajo seguido
+        self._progress: Dict[str, asyncio.Event] = {}
+        self._watchers: Dict[str, int] = {}
+        
+        # Contadores para monitoreo
+        self._processed_items = 0
+        self._completed_jobs = 0
+        self._failed_jobs = 0
+    
+    def _enqueue(self, job_id: str) -> None:
+        """Añade un trabajo a la cola si no está ya en ella o en curso."""
+        if job_id not in self._queued and job_id not in self._active:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+    
+    def _notify(self, job_id: str) -> None:
+        """Despierta a quienes siguen el progreso de un trabajo."""
+        event = self._progress.pop(job_id, None)
+        if event is not None:
+            event.set()
+    
+    async def submit(self, texts: List[str]) -> JobInfo:
+        """Crea un trabajo y lo pone en cola.
+        
+        Args:
+            texts: Textos a analizar
+        
+        Returns:
+            El trabajo creado
+        """
+        job = await self._store.create(texts, self._owner, self._lease_seconds)
+        self._enqueue(job.id)
+        logger.info("Trabajo %s creado con %d textos", job.id, job.total)
+        return job
+    
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        """Obtiene el estado de un trabajo, o None si no existe."""
+        return await self._store.get(job_id)
+    
+    async def watch(self, job_id: str, start: int = 0, follow: bool = True) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Sigue el progreso de un trabajo emitiendo sus resultados según se guardan.
+        
+        Args:
+            job_id: Identificador del trabajo
+            start: Primera posición de los resultados a emitir
+            follow: Si es False, emite el estado y los resultados disponibles y termina
+        
+        Yields:
+            Tuplas (`result`, resultado de un texto) y (`progress`, estado del trabajo)
+        """
+        self._watchers[job_id] = self._watchers.get(job_id, 0) + 1
+        try:
+            async for event in self._watch(job_id, start, follow):
+                yield event
+        finally:
+            # Al irse el último seguidor se descarta su aviso de progreso
+            self._watchers[job_id] -= 1
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+                self._progress.pop(job_id, None)
+    
+    async def _watch(self, job_id: str, start: int, follow: bool) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Emite los resultados y el progreso de un trabajo (ver `watch`)."""
+        position = start
+        last_progress: Optional[JobInfo] = None
+        while True:
+            # El aviso se obtiene antes de leer el almacén para no perder actualizaciones
+            updated = self._progress.setdefault(job_id, asyncio.Event())
+            job = await self._store.get(job_id)
+            if job is None:
+                return
+            while True:
+                results = await self._store.results(job_id, position, _RESULTS_PAGE)
+                for item in results:
+                    yield "result", item.model_dump(mode="json")
+                if results:
+                    position = results[-1].index + 1
+                if len(results) < _RESULTS_PAGE:
+                    break
+            if job != last_progress:
+                yield "progress", job.model_dump(mode="json")
+                last_progress = job
+            if job.status in _FINISHED or not follow:
+                return
+            try:
+                await asyncio.wait_for(updated.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                # Otro proceso puede estar analizando el trabajo; se vuelve a consultar
+                pass
+    
+    async def _heartbeat(self, job_id: str, lease_lost: asyncio.Event) -> None:
+        """Renueva la concesión de un trabajo mientras se analiza.
+        
+        Args:
+            job_id: Identificador del trabajo
+            lease_lost: Se activa si otro procesador tomó el trabajo
+        """
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            try:
+                renewed = await self._store.renew(job_id, self._owner, self._lease_seconds)
+            except Exception as e:
+                logger.warning("No se pudo renovar la concesión del trabajo %s: %s", job_id, e)
+                continue
+            if not renewed:
+                lease_lost.set()
+                return
+    
+    async def _process(self, job_id: str) -> None:
+        """Analiza los textos pendientes de un trabajo por tramos."""
+        if not await self._store.claim(job_id, self._owner, self._lease_seconds):
+            return
+        self._active.add(job_id)
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, lease_lost)) if self._lease_seconds > 0 else None
+        try:
+            while True:
+                if lease_lost.is_set():
+                    logger.warning("El trabajo %s pasó a otro procesador; se deja de analizar aquí", job_id)
+                    return
+                items = await self._store.pending_items(job_id, self._chunk_size)
+                if not items:
+                    break
+                positions = [position for position, _ in items]
+                try:
+                    results = await self._use_case.execute_batch([text for _, text in items], self._max_concurrency)
+                except DetectorOverloadedError as e:
+                    # El tramo se repite cuando el servicio externo tenga hueco
+                    logger.warning("Trabajo %s en espera %.0f s por saturación: %s", job_id, e.retry_after, e)
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                results = [item.model_copy(update={"index": positions[item.index]}) for item in results]
+                await self._store.save_results(job_id, self._owner, results, self._lease_seconds)
+                self._processed_items += len(results)
+                self._notify(job_id)
+            await self._store.finish(job_id, JobStatus.COMPLETED)
+            self._completed_jobs += 1
+            logger.info("Trabajo %s completado", job_id)
+        except asyncio.CancelledError:
+            # Al detener el servidor, el trabajo queda libre para continuar tras el reinicio
+            await asyncio.shield(self._store.release(job_id, self._owner))
+            raise
+        except Exception as e:
+            logger.exception("Error al procesar el trabajo %s: %s", job_id, e)
+            await self._store.finish(job_id, JobStatus.FAILED)
+            self._failed_jobs += 1
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self._active.discard(job_id)
+            self._notify(job_id)
+    
+    async def _worker(self) -> None:
+        """Toma trabajos de la cola y los procesa uno a uno."""
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Error en el worker de trabajos: %s", e)
+    
+    async def _recover_loop(self) -> None:
+        """Pone en cola periódicamente los trabajos sin terminar y sin procesador."""
+        while True:
+            try:
+                for job_id in await self._store.claimable():
+                    self._enqueue(job_id)
+            except Exception as e:
+                logger.warning("No se pudieron recuperar los trabajos pendientes: %s", e)
+            await asyncio.sleep(self._lease_seconds / 2)
+    
+    async def startup(self) -> None:
+        """Abre el almacén, inicia los workers y recupera los trabajos interrumpidos."""
+        await self._store.startup()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._worker_count)]
+        self._tasks.append(asyncio.create_task(self._recover_loop()))
+    
+    async def shutdown(self) -> None:
+        """Detiene los workers, libera los trabajos en curso y cierra el almacén."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._store.shutdown()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado de la cola para monitoreo."""
+        return {
+            "workers": self._worker_count,
+            "queued": len(self._queued),
+            "active": len(self._active),
+            "processed_items": self._processed_items,
+            "completed_jobs": self._completed_jobs,
+            "failed_jobs": self._failed_jobs,
+        }
@@ -1,6 +1,10 @@
 """Caso de uso para analizar texto y detectar amenazas."""
 
-from src.domain.models import ThreatAnalysis
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+from src.domain.exceptions import DetectorOverloadedError
+from src.domain.models import BatchItemResult, ThreatAnalysis
 from src.domain.ports import ThreatDetectorPort
 
 
@@ -20,8 +24,95 @@ class AnalyzeTextUseCase:
         
         Args:
             text: El texto a analizar
-            
+        
         Returns:
             El análisis de la amenaza
         """
         return await self._threat_detector.analyze_text(text)
+    
+    async def execute_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Ejecuta el análisis de un lote de textos.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de análisis simultáneos hacia el detector
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        return await self._threat_detector.analyze_batch(texts, max_concurrency)
+    
+    async def _analyze_entry(
+        self,
+        key: Any,
+        entry: Union[str, BaseException]
+    ) -> Tuple[Any, Union[ThreatAnalysis, BaseException]]:
+        """Analiza una entrada de un flujo, esperando mientras el detector esté saturado."""
+        if isinstance(entry, BaseException):
+            return key, entry
+        while True:
+            try:
+                return key, await self._threat_detector.analyze_text(entry)
+            except DetectorOverloadedError as e:
+                # Se conserva el hueco en curso: el flujo deja de leer entradas hasta que haya sitio
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                return key, e
+    
+    async def execute_pipeline(
+        self,
+        entries: AsyncIterable[Tuple[Any, Union[str, BaseException]]],
+        max_in_flight: int = 16
+    ) -> AsyncIterator[Tuple[Any, Union[ThreatAnalysis, BaseException]]]:
+        """Analiza un flujo de textos de longitud indefinida con un número acotado en curso.
+        
+        Las entradas se leen solo mientras hay menos de `max_in_flight` análisis en
+        curso, y cada resultado se emite en cuanto termina (no en el orden de
+        entrada), así que la memoria no depende de la longitud del flujo.
+        
+        Args:
+            entries: Pares (clave de correlación, texto o excepción si la entrada no es válida)
+            max_in_flight: Número máximo de análisis en curso
+        
+        Yields:
+            Pares (clave de correlación, análisis o excepción del fallo)
+        """
+        source = entries.__aiter__()
+        in_flight: Set[asyncio.Future] = set()
+        reading: Optional[asyncio.Future] = None
+        exhausted = False
+        try:
+            while True:
+                if reading is None and not exhausted and len(in_flight) < max(1, max_in_flight):
+                    reading = asyncio.ensure_future(source.__anext__())
+                waiting = in_flight | {reading} if reading is not None else in_flight
+                if not waiting:
+                    return
+                # La lectura también se espera aquí para emitir resultados aunque no lleguen entradas
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if reading in done:
+                    try:
+                        key, entry = reading.result()
+                    except StopAsyncIteration:
+                        exhausted = True
+                    else:
+                        in_flight.add(asyncio.ensure_future(self._analyze_entry(key, entry)))
+                    finally:
+                        reading = None
+                for task in done & in_flight:
+                    in_flight.discard(task)
+                    yield task.result()
+        finally:
+            for task in in_flight | ({reading} if reading is not None else set()):
+                task.cancel()
+    
+    def execute_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Ejecuta el análisis del texto emitiendo el veredicto por partes.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            Iterador asíncrono de tuplas (nombre del evento, datos del evento)
+        """
+        return self._threat_detector.analyze_text_stream(text)
@@ -0,0 +1,19 @@
+"""Excepciones del dominio de detección de amenazas."""
+
+
+class DetectorOverloadedError(Exception):
+    """El detector está saturado y no puede aceptar más análisis por ahora.
+    
+    Se lanza en lugar de devolver un análisis de respaldo, para que el cliente
+    reintente más tarde en vez de recibir un falso "sin amenaza".
+    """
+    
+    def __init__(self, message: str, retry_after: float):
+        """Inicializa la excepción.
+        
+        Args:
+            message: Descripción del motivo
+            retry_after: Segundos recomendados antes de reintentar
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
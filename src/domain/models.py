@@ -3,7 +3,7 @@
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ThreatType(str, Enum):
@@ -13,12 +13,67 @@ class ThreatType(str, Enum):
     ROBO = "robo"
     SECUESTRO = "secuestro"
     NINGUNA = "ninguna"
+    
+    @property
+    def severity(self) -> int:
+        """Gravedad relativa del tipo de amenaza; un valor mayor es más grave."""
+        return _SEVERITY[self]
+
+
+# Gravedad de cada tipo de amenaza, usada para combinar los análisis de varios fragmentos
+_SEVERITY = {
+    ThreatType.NINGUNA: 0,
+    ThreatType.EXTORSION: 1,
+    ThreatType.ROBO: 2,
+    ThreatType.SECUESTRO: 3,
+}
 
 
 class ThreatAnalysis(BaseModel):
-    """Resultado del análisis de una amenaza."""
+    """Resultado del análisis de una amenaza.
+    
+    Es inmutable: la caché comparte la misma instancia entre peticiones y la API
+    reutiliza su serialización; los cambios se hacen con `model_copy`.
+    """
+    
+    model_config = ConfigDict(frozen=True)
     
     keyword: str = Field(..., description="Palabra o frase clave detectada")
     threat_type: ThreatType = Field(..., description="Tipo de amenaza detectada")
     is_threat: str = Field(..., description="Indicador de si es una amenaza (SI/NO)")
     justification: str = Field("", description="Explicación de por qué se considera una amenaza")
+    degraded: bool = Field(
+        False, description="Indica si el análisis lo hizo el detector local porque DeepSeek no estaba disponible"
+    )
+    rule_set_version: Optional[str] = Field(
+        None, description="Versión de las reglas del detector local que produjeron el análisis (None si lo hizo DeepSeek)"
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Resultado del análisis de un texto dentro de un lote."""
+    
+    index: int = Field(..., description="Posición del texto en el lote recibido")
+    result: Optional[ThreatAnalysis] = Field(None, description="Análisis del texto si se completó")
+    error: Optional[str] = Field(None, description="Descripción del error si el análisis falló")
+
+
+class JobStatus(str, Enum):
+    """Estados de un trabajo de análisis en segundo plano."""
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobInfo(BaseModel):
+    """Estado y progreso de un trabajo de análisis en segundo plano."""
+    
+    id: str = Field(..., description="Identificador del trabajo")
+    status: JobStatus = Field(..., description="Estado del trabajo")
+    total: int = Field(..., description="Número de textos del trabajo")
+    processed: int = Field(0, description="Textos ya analizados (con resultado o error)")
+    failed: int = Field(0, description="Textos cuyo análisis terminó con error")
+    created_at: float = Field(..., description="Instante de creación (segundos desde la época)")
+    updated_at: float = Field(..., description="Instante de la última actualización (segundos desde la época)")
@@ -1,9 +1,64 @@
 """Interfaces para los servicios de detección de amenazas."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from src.domain.models import ThreatAnalysis
+from src.domain.models import BatchItemResult, JobInfo, JobStatus, ThreatAnalysis
+
+
+def build_batch_results(
+    texts: List[str],
+    outcomes: Dict[str, Union[ThreatAnalysis, BaseException]]
+) -> List[BatchItemResult]:
+    """Construye los resultados de un lote en el orden de entrada.
+    
+    Args:
+        texts: Textos del lote en el orden recibido (puede contener duplicados)
+        outcomes: Resultado o excepción de cada texto distinto
+    
+    Returns:
+        Un resultado por cada texto de entrada, con el error si el análisis falló
+    """
+    results = []
+    for index, text in enumerate(texts):
+        outcome = outcomes[text]
+        if isinstance(outcome, BaseException):
+            results.append(BatchItemResult(index=index, error=str(outcome) or type(outcome).__name__))
+        else:
+            results.append(BatchItemResult(index=index, result=outcome))
+    return results
+
+
+def analysis_events(analysis: ThreatAnalysis) -> List[Tuple[str, Dict[str, Any]]]:
+    """Descompone un análisis completo en los eventos del análisis en streaming.
+    
+    Args:
+        analysis: El análisis de la amenaza
+    
+    Returns:
+        Los eventos `threat_type`, `keyword`, `justification` y `result`, en ese orden
+    """
+    return [
+        ("threat_type", {"threat_type": analysis.threat_type.value, "is_threat": analysis.is_threat}),
+        ("keyword", {"keyword": analysis.keyword}),
+        ("justification", {"justification": analysis.justification}),
+        ("result", analysis.model_dump(mode="json")),
+    ]
+
+
+def cache_hit_rate(hits: int, misses: int) -> float:
+    """Calcula la tasa de aciertos de una caché.
+    
+    Args:
+        hits: Número de aciertos
+        misses: Número de fallos
+    
+    Returns:
+        Proporción de aciertos entre 0 y 1
+    """
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
 
 
 class ThreatDetectorPort(ABC):
@@ -15,8 +70,239 @@ class ThreatDetectorPort(ABC):
         
         Args:
             text: El texto a analizar
-            
+        
         Returns:
             El análisis de la amenaza
         """
         pass
+    
+    async def analyze_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Analiza un lote de textos con concurrencia acotada.
+        
+        La implementación por defecto elimina duplicados y ejecuta `analyze_text`
+        para cada texto distinto sin superar `max_concurrency` análisis simultáneos.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de análisis simultáneos
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def analyze(text: str) -> ThreatAnalysis:
+            async with semaphore:
+                return await self.analyze_text(text)
+        
+        outcomes = await asyncio.gather(*(analyze(text) for text in unique_texts), return_exceptions=True)
+        return build_batch_results(texts, dict(zip(unique_texts, outcomes)))
+    
+    async def analyze_text_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Analiza un texto emitiendo cada parte del veredicto en cuanto está disponible.
+        
+        Los eventos son `threat_type`, `keyword` y `justification`, seguidos de un
+        evento final `result` con el análisis completo. La implementación por
+        defecto espera el análisis completo y emite todos los eventos juntos.
+        
+        Args:
+            text: El texto a analizar
+        
+        Yields:
+            Tuplas (nombre del evento, datos del evento)
+        """
+        for event in analysis_events(await self.analyze_text(text)):
+            yield event
+    
+    async def startup(self) -> None:
+        """Prepara los recursos del detector (conexiones, tareas de fondo).
+        
+        Se invoca una vez al iniciar la aplicación. Por defecto no hace nada.
+        """
+        pass
+    
+    async def shutdown(self) -> None:
+        """Libera los recursos del detector al detener la aplicación.
+        
+        Por defecto no hace nada.
+        """
+        pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas de funcionamiento del detector.
+        
+        Returns:
+            Diccionario con las estadísticas para monitoreo
+        """
+        return {}
+
+
+class CachePort(ABC):
+    """Interfaz para el almacenamiento en caché de análisis de amenazas."""
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[ThreatAnalysis]:
+        """Obtiene un análisis almacenado en caché.
+        
+        Args:
+            key: Clave del análisis
+        
+        Returns:
+            El análisis almacenado o None si no existe o ha expirado
+        """
+        pass
+    
+    @abstractmethod
+    async def set(self, key: str, value: ThreatAnalysis) -> None:
+        """Almacena un análisis en caché.
+        
+        Args:
+            key: Clave del análisis
+            value: El análisis a almacenar
+        """
+        pass
+    
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Elimina un análisis de la caché.
+        
+        Args:
+            key: Clave del análisis
+        """
+        pass
+    
+    @abstractmethod
+    async def clear(self) -> None:
+        """Elimina todos los análisis de la caché."""
+        pass
+    
+    async def startup(self) -> None:
+        """Inicia las tareas de fondo de la caché. Por defecto no hace nada."""
+        pass
+    
+    async def shutdown(self) -> None:
+        """Detiene las tareas de fondo de la caché. Por defecto no hace nada."""
+        pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas de la caché (aciertos, fallos, desalojos).
+        
+        Returns:
+            Diccionario con las estadísticas para monitoreo
+        """
+        return {}
+
+
+class JobStorePort(ABC):
+    """Interfaz para persistir los trabajos de análisis en segundo plano.
+    
+    Cada trabajo pertenece, mientras dura su concesión, a un único procesador
+    (`owner`), de modo que varios procesos pueden compartir el almacén sin
+    analizar dos veces el mismo trabajo.
+    """
+    
+    @abstractmethod
+    async def create(self, texts: List[str], owner: str, lease_seconds: float) -> JobInfo:
+        """Crea un trabajo pendiente concedido al procesador indicado.
+        
+        Args:
+            texts: Textos a analizar
+            owner: Identificador del procesador que lo creó
+            lease_seconds: Duración de la concesión inicial
+        
+        Returns:
+            El trabajo creado
+        """
+        pass
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        """Obtiene el estado de un trabajo, o None si no existe."""
+        pass
+    
+    @abstractmethod
+    async def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Reserva un trabajo sin terminar para un procesador.
+        
+        Args:
+            job_id: Identificador del trabajo
+            owner: Identificador del procesador
+            lease_seconds: Duración de la concesión
+        
+        Returns:
+            True si el trabajo es del procesador (ya lo era o su concesión anterior expiró)
+        """
+        pass
+    
+    @abstractmethod
+    async def claimable(self) -> List[str]:
+        """Obtiene los trabajos sin terminar cuya concesión expiró, por orden de creación."""
+        pass
+    
+    @abstractmethod
+    async def pending_items(self, job_id: str, limit: int) -> List[Tuple[int, str]]:
+        """Obtiene los siguientes textos sin analizar de un trabajo.
+        
+        Returns:
+            Tuplas (posición en el trabajo, texto), en orden
+        """
+        pass
+    
+    @abstractmethod
+    async def save_results(self, job_id: str, owner: str, results: List[BatchItemResult], lease_seconds: float) -> None:
+        """Guarda resultados de un trabajo y renueva la concesión del procesador.
+        
+        Args:
+            job_id: Identificador del trabajo
+            owner: Identificador del procesador
+            results: Resultados con la posición de cada texto en el trabajo
+            lease_seconds: Duración de la concesión renovada
+        """
+        pass
+    
+    @abstractmethod
+    async def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Renueva la concesión de un trabajo sin terminar si sigue siendo del procesador.
+        
+        Args:
+            job_id: Identificador del trabajo
+            owner: Identificador del procesador
+            lease_seconds: Duración de la concesión renovada
+        
+        Returns:
+            True si se renovó; False si el trabajo terminó o es de otro procesador
+        """
+        pass
+    
+    @abstractmethod
+    async def release(self, job_id: str, owner: str) -> None:
+        """Libera la concesión de un trabajo sin terminar para que otro procesador lo continúe."""
+        pass
+    
+    @abstractmethod
+    async def finish(self, job_id: str, status: JobStatus) -> None:
+        """Marca un trabajo como terminado (`completed` o `failed`) y libera su concesión."""
+        pass
+    
+    @abstractmethod
+    async def results(self, job_id: str, start: int, limit: int) -> List[BatchItemResult]:
+        """Obtiene resultados guardados de un trabajo.
+        
+        Args:
+            job_id: Identificador del trabajo
+            start: Primera posición a devolver
+            limit: Número máximo de resultados
+        
+        Returns:
+            Los resultados desde la posición indicada, en orden
+        """
+        pass
+    
+    async def startup(self) -> None:
+        """Abre el almacén. Por defecto no hace nada."""
+        pass
+    
+    async def shutdown(self) -> None:
+        """Cierra el almacén. Por defecto no hace nada."""
+        pass
@@ -1,33 +1,271 @@
 """API REST para el servicio de detección de amenazas."""
 
-from fastapi import FastAPI, HTTPException
+import hmac
+import json
+import asyncio
+import math
+from contextlib import asynccontextmanager
+
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.requests import ClientDisconnect
 
+from src.application.job_queue import AnalysisJobQueue
 from src.application.use_cases import AnalyzeTextUseCase
+from src.domain.exceptions import DetectorOverloadedError
+from src.domain.models import BatchItemResult, ThreatAnalysis
+from src.domain.ports import CachePort, JobStorePort, ThreatDetectorPort
+from src.infrastructure.cached_threat_detector import CachedThreatDetector
+from src.infrastructure.chunking_threat_detector import ChunkingThreatDetector
 from src.infrastructure.config import Config
+from src.infrastructure.json_response import FastJSONResponse, analysis_response, batch_response, ndjson_line
+from src.infrastructure.logging_config import configure_logging
+from src.infrastructure.memory_cache import InMemoryLRUCache
+from src.infrastructure.metrics import CONTENT_TYPE, OVERLOAD_REJECTIONS, REGISTRY, MetricsMiddleware
 from src.infrastructure.threat_detector import DeepSeekThreatDetector
 from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
+from src.infrastructure.near_duplicate_index import MinHashLSHIndex
+from src.infrastructure.near_duplicate_threat_detector import NearDuplicateThreatDetector
+from src.infrastructure.rate_limiter import GCRARateLimiter, RateLimit, RateLimitMiddleware, parse_rate_limits
+from src.infrastructure.request_usage import RequestUsageMiddleware
+from src.infrastructure.rule_set import DEFAULT_RULES_PATH, RuleSet
+from src.infrastructure.sqlite_cache import SQLiteCache
+from src.infrastructure.sqlite_job_store import SQLiteJobStore
 from src.infrastructure.static_files import setup_static_files
+from src.infrastructure.text_chunker import TextChunker
+from src.infrastructure.text_normalizer import TextNormalizer
+from src.infrastructure.tiered_threat_detector import TieredThreatDetector
+from src.infrastructure.token_usage import TokenBudget, TokenUsageLedger
+
+
+# Texto a analizar, con la longitud máxima aceptada
+AnalysisText = Annotated[str, Field(max_length=Config.MAX_TEXT_CHARS)]
 
 
 class TextAnalysisRequest(BaseModel):
     """Modelo para la solicitud de análisis de texto."""
     
-    text: str = Field(..., description="Texto a analizar para detectar amenazas")
+    text: AnalysisText = Field(..., description="Texto a analizar para detectar amenazas")
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Modelo para la solicitud de análisis de un lote de textos."""
+    
+    texts: List[AnalysisText] = Field(
+        ...,
+        min_length=1,
+        max_length=Config.BATCH_MAX_ITEMS,
+        description="Textos a analizar para detectar amenazas"
+    )
+
+
+class BatchAnalysisResponse(BaseModel):
+    """Modelo para la respuesta del análisis de un lote de textos."""
+    
+    results: List[BatchItemResult] = Field(..., description="Resultado de cada texto, en el orden recibido")
+
+
+class JobRequest(BaseModel):
+    """Modelo para la solicitud de un trabajo de análisis en segundo plano."""
+    
+    texts: List[AnalysisText] = Field(
+        ...,
+        min_length=1,
+        max_length=Config.JOBS_MAX_ITEMS,
+        description="Textos a analizar para detectar amenazas"
+    )
+
+
+# Tipos de contenido aceptados para las cargas NDJSON (un texto por línea)
+_NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    """Lee las líneas no vacías de un cuerpo NDJSON a medida que llega.
+    
+    Solo se guarda en memoria la línea en curso, hasta `Config.NDJSON_MAX_LINE_BYTES`.
+    
+    Args:
+        request: Petición con el cuerpo NDJSON
+    
+    Yields:
+        Pares (número de línea, contenido de la línea)
+    
+    Raises:
+        HTTPException: 413 si una línea supera el tamaño máximo
+    """
+    pending = b""
+    line_number = 0
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(pending) > Config.NDJSON_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Línea {line_number + 1}: supera {Config.NDJSON_MAX_LINE_BYTES} bytes"
+            )
+    if pending.strip():
+        yield line_number + 1, pending
+
+
+def _parse_ndjson_entry(line: bytes) -> Tuple[Any, str]:
+    """Interpreta una línea NDJSON con un texto a analizar.
+    
+    Args:
+        line: Una cadena JSON o un objeto con el campo `text` (y opcionalmente `id`)
+    
+    Returns:
+        Par (identificador de correlación o None, texto)
+    
+    Raises:
+        ValueError: Si la línea no tiene un texto, el texto es demasiado largo o el `id`
+            no es una cadena o un número finito
+    """
+    try:
+        value = json.loads(line)
+    except ValueError:
+        value = None
+    correlation_id = None
+    if isinstance(value, dict):
+        correlation_id = value.get("id")
+        value = value.get("text")
+        # json.loads admite NaN e Infinity, que no se pueden devolver en el resultado
+        if correlation_id is not None and not (
+            isinstance(correlation_id, (str, int))
+            or (isinstance(correlation_id, float) and math.isfinite(correlation_id))
+        ):
+            raise ValueError("el campo 'id' debe ser una cadena o un número finito")
+    if not isinstance(value, str):
+        raise ValueError("se esperaba una cadena JSON o un objeto con el campo 'text'")
+    if len(value) > Config.MAX_TEXT_CHARS:
+        raise ValueError(f"el texto supera {Config.MAX_TEXT_CHARS} caracteres")
+    return correlation_id, value
+
+
+async def _iter_ndjson_texts(request: Request) -> AsyncIterator[str]:
+    """Lee los textos de un cuerpo NDJSON a medida que llega.
+    
+    Cada línea no vacía debe ser una cadena JSON o un objeto con el campo `text`.
+    
+    Args:
+        request: Petición con el cuerpo NDJSON
+    
+    Yields:
+        Los textos, en orden
+    
+    Raises:
+        HTTPException: 422 si una línea no es válida
+    """
+    async for line_number, line in _iter_ndjson_lines(request):
+        try:
+            yield _parse_ndjson_entry(line)[1]
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Línea {line_number}: {e}")
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """Respuesta en streaming que se envía mientras aún se lee el cuerpo de la petición.
+    
+    `StreamingResponse` consume los mensajes de la petición para detectar la
+    desconexión del cliente (con servidores ASGI anteriores a la versión 2.4 de la
+    especificación), lo que descartaría el cuerpo que todavía no se ha leído. Aquí,
+    mientras se lee el cuerpo, la desconexión se detecta al leerlo; cuando el cuerpo
+    termina (`body_read`) se escuchan los mensajes de la petición y una desconexión
+    cancela el envío, y con él los análisis en curso.
+    """
+    
+    def __init__(self, content: AsyncIterator[bytes], body_read: asyncio.Event, **kwargs: Any):
+        """Inicializa la respuesta.
+        
+        Args:
+            content: Fragmentos de la respuesta
+            body_read: Evento que se activa cuando se terminó de leer el cuerpo de la petición
+            **kwargs: Argumentos de `StreamingResponse`
+        """
+        super().__init__(content, **kwargs)
+        self._body_read = body_read
+    
+    async def _listen_after_body(self, receive: Any) -> None:
+        """Espera a que se lea todo el cuerpo y después a que el cliente se desconecte."""
+        await self._body_read.wait()
+        await self.listen_for_disconnect(receive)
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        streaming = asyncio.ensure_future(self.stream_response(send))
+        listening = asyncio.ensure_future(self._listen_after_body(receive))
+        try:
+            await asyncio.wait({streaming, listening}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (streaming, listening):
+                task.cancel()
+            await asyncio.gather(streaming, listening, return_exceptions=True)
+        if not streaming.cancelled():
+            try:
+                streaming.result()
+            except OSError:
+                raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def _sse_event(name: str, data: Dict[str, Any]) -> str:
+    """Formatea un evento Server-Sent Events.
+    
+    Args:
+        name: Nombre del evento
+        data: Datos del evento, serializados como JSON
+    
+    Returns:
+        El evento listo para enviarse al cliente
+    """
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 class ThreatDetectionAPI:
     """API REST para el servicio de detección de amenazas."""
     
-    def __init__(self):
-        """Inicializa la API."""
+    def __init__(self, job_store: Optional[JobStorePort] = None):
+        """Inicializa la API.
+        
+        Args:
+            job_store: Almacén de los trabajos en segundo plano (por defecto, SQLite en
+                `Config.JOBS_SQLITE_PATH`, cuyo archivo se crea con el primer trabajo)
+        """
         self._app = FastAPI(
             title="Kuntur Detector API",
             description="API para la detección de amenazas en negocios ecuatorianos",
-            version="0.1.0"
+            version="0.1.0",
+            lifespan=self._lifespan,
+            default_response_class=FastJSONResponse
         )
         
+        # Limitar las peticiones de cada cliente (dentro de CORS, para que las respuestas 429 lleven sus cabeceras)
+        self._rate_limiter = self._build_rate_limiter()
+        if self._rate_limiter is not None:
+            self._app.add_middleware(
+                RateLimitMiddleware,
+                limiter=self._rate_limiter,
+                path_prefixes=[prefix.strip() for prefix in Config.RATE_LIMIT_PATHS.split(",") if prefix.strip()],
+                api_key_header=Config.RATE_LIMIT_API_KEY_HEADER,
+                request_cost=Config.RATE_LIMIT_REQUEST_COST,
+                upstream_cost=Config.RATE_LIMIT_UPSTREAM_COST
+            )
+        
+        # Atribuir a cada petición las llamadas y tokens de DeepSeek
+        self._usage_ledger = TokenUsageLedger(
+            bucket_seconds=Config.TOKEN_USAGE_BUCKET_SECONDS,
+            retention_seconds=Config.TOKEN_USAGE_RETENTION_HOURS * 60 * 60
+        )
+        self._app.add_middleware(RequestUsageMiddleware, ledger=self._usage_ledger)
+        
         # Configurar CORS
         self._app.add_middleware(
             CORSMiddleware,
@@ -37,42 +275,424 @@ class ThreatDetectionAPI:
             allow_headers=["*"],
         )
         
+        # Medir la latencia total de cada petición
+        self._app.add_middleware(MetricsMiddleware)
+        
         # Inicializar dependencias
-        if Config.USE_MOCK:
-            self._threat_detector = MockDeepSeekThreatDetector()
-        else:
-            self._threat_detector = DeepSeekThreatDetector()
+        self._token_budget = (
+            TokenBudget(
+                self._usage_ledger,
+                Config.TOKEN_BUDGET_MAX_TOKENS,
+                Config.TOKEN_BUDGET_WINDOW_SECONDS,
+                Config.TOKEN_BUDGET_RESUME_RATIO
+            )
+            if Config.TOKEN_BUDGET_MAX_TOKENS > 0 else None
+        )
+        self._rule_set = RuleSet.from_file(Config.RULES_PATH or DEFAULT_RULES_PATH, Config.RULES_RELOAD_INTERVAL_SECONDS)
+        self._threat_detector = self._build_threat_detector(self._usage_ledger, self._token_budget, self._rule_set)
         self._analyze_use_case = AnalyzeTextUseCase(self._threat_detector)
+        self._job_queue = AnalysisJobQueue(
+            self._analyze_use_case,
+            job_store or SQLiteJobStore(Config.JOBS_SQLITE_PATH),
+            workers=Config.JOBS_WORKERS,
+            chunk_size=Config.JOBS_CHUNK_SIZE,
+            max_concurrency=Config.JOBS_MAX_CONCURRENCY,
+            lease_seconds=Config.JOBS_LEASE_SECONDS
+        )
         
         # Configurar archivos estáticos
         setup_static_files(self._app)
         
         # Configurar rutas
         self._setup_routes()
+        self._app.add_exception_handler(DetectorOverloadedError, self._overloaded_handler)
+    
+    @staticmethod
+    def _build_threat_detector(
+        usage_ledger: Optional[TokenUsageLedger] = None,
+        budget: Optional[TokenBudget] = None,
+        rule_set: Optional[RuleSet] = None
+    ) -> ThreatDetectorPort:
+        """Construye el detector de amenazas según la configuración.
+        
+        Args:
+            usage_ledger: Registro del consumo de tokens de DeepSeek (opcional)
+            budget: Presupuesto de tokens de DeepSeek (opcional)
+            rule_set: Reglas del detector local (por defecto, las de `Config.RULES_PATH`, sin recarga)
+        
+        Returns:
+            El detector de amenazas, decorado con el índice de textos parecidos, la caché,
+            la división de textos largos y el filtro local si están habilitados
+        """
+        if rule_set is None:
+            rule_set = RuleSet.from_file(Config.RULES_PATH or DEFAULT_RULES_PATH)
+        if Config.USE_MOCK:
+            return MockDeepSeekThreatDetector(rule_set)
+        
+        # Mientras DeepSeek no está disponible responde el detector local por reglas
+        failover = MockDeepSeekThreatDetector(rule_set) if Config.FAILOVER_TO_RULES else None
+        detector: ThreatDetectorPort = DeepSeekThreatDetector(
+            failover=failover, usage_ledger=usage_ledger, budget=budget
+        )
+        if Config.USE_NEAR_DUPLICATES:
+            detector = NearDuplicateThreatDetector(
+                detector,
+                MinHashLSHIndex(
+                    threshold=Config.NEAR_DUP_THRESHOLD,
+                    max_entries=Config.NEAR_DUP_MAX_ENTRIES,
+                    ttl_seconds=Config.NEAR_DUP_TTL_HOURS * 60 * 60,
+                    num_perm=Config.NEAR_DUP_NUM_PERM,
+                    bands=Config.NEAR_DUP_BANDS,
+                    shingle_size=Config.NEAR_DUP_SHINGLE_SIZE
+                ),
+                TextNormalizer(Config.NEAR_DUP_NORMALIZATION.split(",")),
+                min_chars=Config.NEAR_DUP_MIN_CHARS,
+                max_chars=Config.NEAR_DUP_MAX_CHARS
+            )
+        if Config.USE_CACHE:
+            detector = CachedThreatDetector(
+                detector,
+                ThreatDetectionAPI._build_cache(),
+                TextNormalizer(Config.CACHE_KEY_NORMALIZATION.split(","))
+            )
+        if Config.CHUNK_MAX_CHARS > 0:
+            # Los fragmentos pasan por la caché y el índice uno a uno
+            detector = ChunkingThreatDetector(
+                detector,
+                TextChunker(Config.CHUNK_MAX_CHARS, Config.CHUNK_OVERLAP_CHARS),
+                Config.CHUNK_MAX_CONCURRENCY
+            )
+        if Config.USE_PREFILTER:
+            detector = TieredThreatDetector(detector, rule_set, Config.PREFILTER_MAX_HITS)
+        return detector
+    
+    @staticmethod
+    def _build_cache() -> CachePort:
+        """Construye la caché de análisis según `Config.CACHE_BACKEND`.
+        
+        Returns:
+            La caché en memoria o la caché persistente en SQLite
+        """
+        ttl_seconds = Config.CACHE_TTL_HOURS * 60 * 60
+        if Config.CACHE_BACKEND == "sqlite":
+            return SQLiteCache(
+                path=Config.CACHE_SQLITE_PATH,
+                ttl_seconds=ttl_seconds,
+                max_entries=Config.CACHE_SQLITE_MAX_ENTRIES,
+                compaction_interval_seconds=Config.CACHE_SWEEP_INTERVAL_SECONDS
+            )
+        return InMemoryLRUCache(
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            max_bytes=Config.CACHE_MAX_BYTES,
+            ttl_seconds=ttl_seconds,
+            sweep_interval_seconds=Config.CACHE_SWEEP_INTERVAL_SECONDS
+        )
+    
+    @staticmethod
+    def _build_rate_limiter() -> Optional[GCRARateLimiter]:
+        """Construye el límite de peticiones por cliente según la configuración.
+        
+        Returns:
+            El limitador, o None si `RATE_LIMIT_ENABLED` está desactivado
+        """
+        if not Config.RATE_LIMIT_ENABLED:
+            return None
+        return GCRARateLimiter(
+            RateLimit(Config.RATE_LIMIT_PER_MINUTE, Config.RATE_LIMIT_BURST),
+            parse_rate_limits(Config.RATE_LIMIT_CLIENTS),
+            sweep_interval_seconds=Config.RATE_LIMIT_SWEEP_INTERVAL_SECONDS
+        )
+    
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Gestiona el ciclo de vida de los recursos compartidos del detector.
+        
+        Args:
+            app: Instancia de FastAPI
+        """
+        await self._threat_detector.startup()
+        await self._job_queue.startup()
+        await self._rule_set.startup()
+        if self._rate_limiter is not None:
+            await self._rate_limiter.startup()
+        try:
+            yield
+        finally:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.shutdown()
+            await self._rule_set.shutdown()
+            await self._job_queue.shutdown()
+            await self._threat_detector.shutdown()
+    
+    @staticmethod
+    async def _overloaded_handler(request: Request, exc: DetectorOverloadedError) -> JSONResponse:
+        """Responde 503 con `Retry-After` cuando el detector está saturado.
+        
+        Args:
+            request: Petición en curso
+            exc: Excepción de saturación
+        
+        Returns:
+            Respuesta 503 para que el cliente reintente más tarde
+        """
+        OVERLOAD_REJECTIONS.inc()
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Servicio saturado: {str(exc)}"},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))}
+        )
     
     def _setup_routes(self):
         """Configura las rutas de la API."""
         
-        @self._app.post("/analysis", tags=["Amenazas"])
+        @self._app.post("/analysis", tags=["Amenazas"], response_model=ThreatAnalysis)
         async def analyze_text(request: TextAnalysisRequest):
             """Analiza un texto para detectar amenazas.
             
             Args:
                 request: Solicitud con el texto a analizar
-                
+            
             Returns:
                 Resultado del análisis de amenazas
             """
             try:
                 result = await self._analyze_use_case.execute(request.text)
-                return result.model_dump()
+                return analysis_response(result)
+            except DetectorOverloadedError:
+                raise
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error al analizar el texto: {str(e)}")
         
+        @self._app.post("/analysis/stream", tags=["Amenazas"])
+        async def analyze_text_stream(request: TextAnalysisRequest):
+            """Analiza un texto enviando el veredicto por partes mediante Server-Sent Events.
+            
+            Se emiten los eventos `threat_type`, `keyword` y `justification` en cuanto
+            están disponibles y un evento final `result` con el análisis completo.
+            
+            Args:
+                request: Solicitud con el texto a analizar
+            
+            Returns:
+                Respuesta `text/event-stream` con los eventos del análisis
+            """
+            stream = self._analyze_use_case.execute_stream(request.text).__aiter__()
+            # Esperar el primer evento antes de responder, para poder contestar 503 si el
+            # detector está saturado en lugar de abrir un flujo que termina en error
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except DetectorOverloadedError:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error al analizar el texto: {str(e)}")
+            
+            async def events() -> AsyncIterator[str]:
+                if first is None:
+                    return
+                yield _sse_event(*first)
+                try:
+                    async for name, data in stream:
+                        yield _sse_event(name, data)
+                except Exception as e:
+                    yield _sse_event("error", {"detail": f"Error al analizar el texto: {str(e)}"})
+            
+            return StreamingResponse(
+                events(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        @self._app.post("/analysis/batch", tags=["Amenazas"], response_model=BatchAnalysisResponse)
+        async def analyze_batch(request: BatchAnalysisRequest):
+            """Analiza un lote de textos para detectar amenazas.
+            
+            Los textos repetidos se analizan una sola vez y los resultados se
+            devuelven en el mismo orden de entrada, con el error de cada texto
+            que no se pudo analizar.
+            
+            Args:
+                request: Solicitud con los textos a analizar
+            
+            Returns:
+                Resultados del análisis de amenazas por texto
+            """
+            try:
+                results = await self._analyze_use_case.execute_batch(request.texts, Config.BATCH_MAX_CONCURRENCY)
+                return batch_response(results)
+            except DetectorOverloadedError:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error al analizar el lote: {str(e)}")
+        
+        @self._app.post("/analysis/ndjson", tags=["Amenazas"])
+        async def analyze_ndjson(request: Request):
+            """Analiza un flujo NDJSON de textos de longitud indefinida.
+            
+            Cada línea es una cadena JSON o un objeto `{"id": ..., "text": ...}`. Los
+            textos se leen a medida que llegan, con hasta `NDJSON_MAX_IN_FLIGHT`
+            análisis en curso, y cada resultado se escribe como una línea NDJSON en
+            cuanto termina, con el `id` de su entrada (o su número de línea).
+            
+            Args:
+                request: Petición con el cuerpo NDJSON
+            
+            Returns:
+                Respuesta `application/x-ndjson` con un resultado por línea de entrada
+            """
+            body_read = asyncio.Event()
+            
+            async def entries() -> AsyncIterator[Tuple[Any, Any]]:
+                try:
+                    async for line_number, line in _iter_ndjson_lines(request):
+                        try:
+                            correlation_id, text = _parse_ndjson_entry(line)
+                        except ValueError as e:
+                            yield line_number, ValueError(f"Línea {line_number}: {e}")
+                            continue
+                        yield (line_number if correlation_id is None else correlation_id), text
+                finally:
+                    body_read.set()
+            
+            async def results() -> AsyncIterator[bytes]:
+                try:
+                    async for correlation_id, outcome in self._analyze_use_case.execute_pipeline(
+                        entries(), Config.NDJSON_MAX_IN_FLIGHT
+                    ):
+                        if isinstance(outcome, BaseException):
+                            yield ndjson_line(correlation_id, None, str(outcome) or type(outcome).__name__)
+                        else:
+                            yield ndjson_line(correlation_id, outcome, None)
+                except HTTPException as e:
+                    # El flujo ya empezó: el error se envía como última línea
+                    yield ndjson_line(None, None, e.detail)
+            
+            return _DuplexStreamingResponse(
+                results(),
+                body_read,
+                media_type="application/x-ndjson",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        @self._app.post("/jobs", status_code=202, tags=["Trabajos"])
+        async def create_job(request: Request):
+            """Crea un trabajo de análisis en segundo plano para un volumen grande de textos.
+            
+            Acepta un JSON `{"texts": [...]}` o un cuerpo NDJSON (`application/x-ndjson`)
+            con un texto por línea, como cadena JSON o como objeto `{"text": ...}`.
+            
+            Args:
+                request: Petición con los textos a analizar
+            
+            Returns:
+                El trabajo creado, con su identificador para consultar el progreso
+            """
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type in _NDJSON_CONTENT_TYPES:
+                texts = []
+                async for text in _iter_ndjson_texts(request):
+                    if len(texts) >= Config.JOBS_MAX_ITEMS:
+                        raise HTTPException(status_code=413, detail=f"El trabajo admite hasta {Config.JOBS_MAX_ITEMS} textos")
+                    texts.append(text)
+                if not texts:
+                    raise HTTPException(status_code=422, detail="El trabajo no contiene textos")
+            else:
+                try:
+                    texts = JobRequest.model_validate_json(await request.body()).texts
+                except ValidationError as e:
+                    raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+            
+            job = await self._job_queue.submit(texts)
+            return JSONResponse(
+                status_code=202,
+                content=job.model_dump(mode="json"),
+                headers={"Location": f"/jobs/{job.id}"}
+            )
+        
+        @self._app.get("/jobs/{job_id}", tags=["Trabajos"])
+        async def get_job(job_id: str, start: int = 0, follow: bool = True):
+            """Envía el progreso y los resultados de un trabajo en formato NDJSON.
+            
+            Cada línea es un evento `result` (resultado de un texto, con su posición)
+            o `progress` (estado del trabajo). Con `follow=true` la respuesta sigue
+            abierta hasta que el trabajo termina; `start` permite continuar desde una
+            posición tras una desconexión.
+            
+            Args:
+                job_id: Identificador del trabajo
+                start: Primera posición de los resultados a enviar
+                follow: Si es False, envía lo disponible y termina
+            
+            Returns:
+                Respuesta `application/x-ndjson` con los eventos del trabajo
+            """
+            if await self._job_queue.get(job_id) is None:
+                raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+            
+            async def events() -> AsyncIterator[str]:
+                async for name, data in self._job_queue.watch(job_id, start, follow):
+                    yield json.dumps({"event": name, **data}, ensure_ascii=False) + "\n"
+            
+            return StreamingResponse(events(), media_type="application/x-ndjson")
+        
         @self._app.get("/health", tags=["Sistema"])
         async def health_check():
             """Verifica el estado del sistema."""
             return {"status": "ok"}
+        
+        @self._app.get("/stats", tags=["Sistema"])
+        async def stats():
+            """Obtiene estadísticas de funcionamiento del detector para monitoreo."""
+            stats = {
+                "detector": self._threat_detector.get_stats(),
+                "jobs": self._job_queue.get_stats(),
+                "rules": self._rule_set.get_stats(),
+            }
+            if self._rate_limiter is not None:
+                stats["rate_limit"] = self._rate_limiter.get_stats()
+            return stats
+        
+        @self._app.get("/usage", tags=["Sistema"])
+        async def usage():
+            """Obtiene los tokens consumidos en DeepSeek y el estado del presupuesto.
+            
+            Returns:
+                Consumo desde el arranque, en la última hora, el último minuto y el último
+                día, por ruta, y el presupuesto de tokens si está configurado
+            """
+            stats = self._usage_ledger.get_stats({"1m": 60, "1h": 60 * 60, "24h": 24 * 60 * 60})
+            stats["budget"] = self._token_budget.get_stats() if self._token_budget is not None else None
+            return stats
+        
+        @self._app.post("/admin/rules/reload", tags=["Sistema"])
+        async def reload_rules(request: Request):
+            """Recarga las reglas del detector local desde su archivo sin reiniciar el servicio.
+            
+            Requiere la cabecera `X-Admin-Token` con el valor de `Config.ADMIN_TOKEN`. Con
+            varios workers solo recarga el proceso que atiende la petición; los demás
+            aplican el cambio al vigilar el archivo.
+            
+            Args:
+                request: Petición en curso
+            
+            Returns:
+                La versión anterior y el estado de las reglas nuevas
+            """
+            token = request.headers.get("X-Admin-Token", "")
+            if not Config.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+                raise HTTPException(status_code=403, detail="Token de administración no válido")
+            previous = self._rule_set.version
+            try:
+                await self._rule_set.reload()
+            except (OSError, ValueError) as e:
+                raise HTTPException(status_code=422, detail=f"No se recargaron las reglas: {str(e)}")
+            return {"previous_version": previous, **self._rule_set.get_stats()}
+        
+        @self._app.get("/metrics", tags=["Sistema"])
+        async def metrics():
+            """Expone las métricas de latencia y los contadores en formato Prometheus."""
+            return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
     
     @property
     def app(self):
@@ -82,3 +702,16 @@ class ThreatDetectionAPI:
             La instancia de FastAPI
         """
         return self._app
+
+
+def create_app() -> FastAPI:
+    """Fábrica de la aplicación.
+    
+    Cada worker de uvicorn la invoca para construir su propia instancia de la API
+    con su propio detector, caché y cliente HTTP.
+    
+    Returns:
+        La instancia de FastAPI
+    """
+    configure_logging()
+    return ThreatDetectionAPI().app
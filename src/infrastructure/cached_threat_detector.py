@@ -0,0 +1,226 @@
+"""Decorador que añade caché de resultados a cualquier detector de amenazas."""
+
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from src.domain.models import BatchItemResult, ThreatAnalysis
+from src.domain.ports import CachePort, ThreatDetectorPort, analysis_events, build_batch_results
+from src.infrastructure.metrics import CACHE_LOOKUP_SECONDS, CACHE_LOOKUPS
+from src.infrastructure.single_flight import SingleFlight
+from src.infrastructure.text_normalizer import TextNormalizer
+
+logger = logging.getLogger("cached_detector")
+
+
+def is_cacheable(result: ThreatAnalysis) -> bool:
+    """Indica si un resultado puede guardarse en caché.
+    
+    Las respuestas de respaldo por errores ("error_api", "error_comunicacion", ...)
+    y los análisis degradados del detector local no se guardan para que la
+    siguiente petición vuelva a consultar el detector.
+    """
+    return not result.degraded and not result.keyword.startswith("error_")
+
+
+class CachedThreatDetector(ThreatDetectorPort):
+    """Detector de amenazas que consulta una caché antes de delegar en otro detector.
+    
+    Las peticiones concurrentes para un mismo texto que no está en caché se agrupan
+    en una única llamada al detector decorado.
+    """
+    
+    def __init__(
+        self,
+        detector: ThreatDetectorPort,
+        cache: CachePort,
+        normalizer: Optional[TextNormalizer] = None
+    ):
+        """Inicializa el decorador.
+        
+        Args:
+            detector: Detector de amenazas al que se delega en caso de fallo de caché
+            cache: Caché donde se almacenan los análisis
+            normalizer: Normalizador aplicado al texto antes de calcular la clave (opcional)
+        """
+        self._detector = detector
+        self._cache = cache
+        self._normalizer = normalizer
+        self._single_flight = SingleFlight()
+        self._normalized_keys = 0
+    
+    def _generate_cache_key(self, text: str) -> str:
+        """Genera una clave de caché para el texto normalizado usando BLAKE2b."""
+        if self._normalizer is not None:
+            normalized = self._normalizer.normalize(text)
+            if normalized != text:
+                self._normalized_keys += 1
+            text = normalized
+        text_hash = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        return f"threat_detector:{text_hash}"
+    
+    async def _lookup(self, cache_key: str) -> Optional[ThreatAnalysis]:
+        """Consulta la caché registrando la latencia y el resultado en las métricas."""
+        started = time.perf_counter()
+        cached_result = await self._cache.get(cache_key)
+        CACHE_LOOKUP_SECONDS.observe(time.perf_counter() - started)
+        CACHE_LOOKUPS.inc("hit" if cached_result is not None else "miss")
+        return cached_result
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        """Analiza un texto usando la caché cuando hay un resultado vigente.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            El análisis de la amenaza
+        """
+        cache_key = self._generate_cache_key(text)
+        
+        cached_result = await self._lookup(cache_key)
+        if cached_result is not None:
+            logger.debug("Resultado encontrado en caché")
+            return cached_result
+        
+        return await self._single_flight.do(cache_key, lambda: self._analyze_and_store(text, cache_key))
+    
+    async def _analyze_and_store(self, text: str, cache_key: str) -> ThreatAnalysis:
+        """Delega el análisis en el detector decorado y guarda el resultado."""
+        result = await self._detector.analyze_text(text)
+        if is_cacheable(result):
+            await self._cache.set(cache_key, result)
+        return result
+    
+    async def analyze_text_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Analiza un texto en streaming usando la caché cuando hay un resultado vigente.
+        
+        Los aciertos de caché y los textos con un análisis ya en curso emiten todos
+        los eventos a la vez; el resto se transmite desde el detector decorado y el
+        resultado final se guarda en la caché.
+        
+        Args:
+            text: El texto a analizar
+        
+        Yields:
+            Tuplas (nombre del evento, datos del evento)
+        """
+        cache_key = self._generate_cache_key(text)
+        
+        cached_result = await self._lookup(cache_key)
+        if cached_result is None and cache_key in self._single_flight:
+            cached_result = await self._single_flight.do(cache_key, lambda: self._analyze_and_store(text, cache_key))
+        if cached_result is not None:
+            for event in analysis_events(cached_result):
+                yield event
+            return
+        
+        async for name, data in self._detector.analyze_text_stream(text):
+            if name == "result":
+                result = ThreatAnalysis.model_validate(data)
+                if is_cacheable(result):
+                    await self._cache.set(cache_key, result)
+            yield name, data
+    
+    async def analyze_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Analiza un lote sirviendo los aciertos de caché de inmediato.
+        
+        Los textos que no están en caché se delegan juntos en `analyze_batch` del
+        detector decorado, una sola vez por clave de caché, salvo los que ya tienen
+        un análisis en curso, que se esperan en lugar de repetirse.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de análisis simultáneos hacia el detector
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        outcomes: Dict[str, Union[ThreatAnalysis, BaseException]] = {}
+        pending: Dict[str, "asyncio.Future[ThreatAnalysis]"] = {}
+        misses: List[str] = []
+        miss_keys: List[str] = []
+        
+        for text in dict.fromkeys(texts):
+            cache_key = self._generate_cache_key(text)
+            cached_result = await self._lookup(cache_key)
+            if cached_result is not None:
+                outcomes[text] = cached_result
+            else:
+                misses.append(text)
+                miss_keys.append(cache_key)
+        
+        # Los textos con un análisis ya en curso se esperan; el resto se agrupa en un lote
+        # con un solo texto por clave, aunque varios textos se normalicen a la misma
+        to_analyze: Dict[str, str] = {}
+        started: Dict[str, "asyncio.Future[ThreatAnalysis]"] = {}
+        for text, cache_key in zip(misses, miss_keys):
+            if cache_key not in self._single_flight:
+                to_analyze.setdefault(cache_key, text)
+        if to_analyze:
+            batch_keys = list(to_analyze)
+            batch_future = asyncio.ensure_future(
+                self._analyze_batch_and_store(list(to_analyze.values()), batch_keys, max_concurrency)
+            )
+            for index, cache_key in enumerate(batch_keys):
+                started[cache_key] = self._single_flight.join(
+                    cache_key, lambda index=index: self._batch_item(batch_future, index)
+                )
+        
+        for text, cache_key in zip(misses, miss_keys):
+            if cache_key in started:
+                pending[text] = started.pop(cache_key)
+            else:
+                pending[text] = self._single_flight.join(
+                    cache_key, lambda text=text, cache_key=cache_key: self._analyze_and_store(text, cache_key)
+                )
+        
+        if pending:
+            done = await asyncio.gather(*(asyncio.shield(future) for future in pending.values()), return_exceptions=True)
+            outcomes.update(zip(pending.keys(), done))
+        
+        return build_batch_results(texts, outcomes)
+    
+    async def _analyze_batch_and_store(
+        self,
+        texts: List[str],
+        cache_keys: List[str],
+        max_concurrency: int
+    ) -> List[BatchItemResult]:
+        """Delega un lote en el detector decorado y guarda los resultados válidos."""
+        results = await self._detector.analyze_batch(texts, max_concurrency)
+        for item in results:
+            if item.result is not None and is_cacheable(item.result):
+                await self._cache.set(cache_keys[item.index], item.result)
+        return results
+    
+    @staticmethod
+    async def _batch_item(batch_future: "asyncio.Future[List[BatchItemResult]]", index: int) -> ThreatAnalysis:
+        """Extrae del lote compartido el resultado de un texto concreto."""
+        item = (await asyncio.shield(batch_future))[index]
+        if item.result is None:
+            raise RuntimeError(item.error or "Error al analizar el texto")
+        return item.result
+    
+    async def startup(self) -> None:
+        """Inicia la caché y el detector decorado."""
+        await self._cache.startup()
+        await self._detector.startup()
+    
+    async def shutdown(self) -> None:
+        """Detiene el detector decorado y la caché."""
+        await self._detector.shutdown()
+        await self._cache.shutdown()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene las estadísticas del detector decorado junto con las de la caché."""
+        stats = dict(self._detector.get_stats())
+        stats["cache"] = self._cache.get_stats()
+        stats["single_flight"] = self._single_flight.get_stats()
+        stats["normalization"] = {
+            "steps": list(self._normalizer.steps) if self._normalizer is not None else [],
+            "normalized_keys": self._normalized_keys,
+        }
+        return stats
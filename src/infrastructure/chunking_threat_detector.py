@@ -0,0 +1,166 @@
+"""Decorador que analiza los textos largos por fragmentos y combina los veredictos."""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from src.domain.models import BatchItemResult, ThreatAnalysis, ThreatType
+from src.domain.ports import ThreatDetectorPort, analysis_events, build_batch_results
+from src.infrastructure.text_chunker import TextChunker
+
+
+def aggregate_analyses(results: List[ThreatAnalysis]) -> ThreatAnalysis:
+    """Combina los análisis de los fragmentos de un texto en un único análisis.
+    
+    Se toma el veredicto más grave (el primero en caso de empate) con la palabra
+    clave que lo provocó. Si ningún fragmento contiene una amenaza pero alguno no
+    pudo analizarse, se devuelve ese análisis de respaldo: el texto no puede darse
+    por inofensivo.
+    
+    Args:
+        results: Análisis de cada fragmento, en orden
+    
+    Returns:
+        El análisis del texto completo
+    """
+    best_index = max(range(len(results)), key=lambda index: results[index].threat_type.severity)
+    best = results[best_index]
+    degraded = any(result.degraded for result in results)
+    if best.threat_type == ThreatType.NINGUNA:
+        best = next((result for result in results if result.keyword.startswith("error_")), best)
+        return best.model_copy(update={"degraded": degraded})
+    
+    justification = best.justification
+    if len(results) > 1:
+        justification = f"Fragmento {best_index + 1} de {len(results)}: {justification}"
+    return best.model_copy(update={"justification": justification, "degraded": degraded})
+
+
+class ChunkingThreatDetector(ThreatDetectorPort):
+    """Detector que divide los textos largos en fragmentos y los analiza en paralelo.
+    
+    Los textos que caben en un fragmento se delegan sin cambios. Los largos
+    (transcripciones, hilos de correo) se dividen con `TextChunker` y cada
+    fragmento se analiza con el detector decorado, de modo que la caché guarda cada
+    fragmento por separado; los análisis se combinan con `aggregate_analyses`.
+    """
+    
+    def __init__(self, detector: ThreatDetectorPort, chunker: TextChunker, max_concurrency: int = 4):
+        """Inicializa el decorador.
+        
+        Args:
+            detector: Detector de amenazas que analiza cada fragmento
+            chunker: Divisor de textos en fragmentos
+            max_concurrency: Número máximo de fragmentos de un texto analizados a la vez
+        """
+        self._detector = detector
+        self._chunker = chunker
+        self._max_concurrency = max_concurrency
+        self._chunked_texts = 0
+        self._chunks = 0
+    
+    async def _analyze_chunks(self, chunks: List[str]) -> ThreatAnalysis:
+        """Analiza los fragmentos de un texto en paralelo y combina los resultados."""
+        self._chunked_texts += 1
+        self._chunks += len(chunks)
+        semaphore = asyncio.Semaphore(max(1, self._max_concurrency))
+        
+        async def analyze(chunk: str) -> ThreatAnalysis:
+            async with semaphore:
+                return await self._detector.analyze_text(chunk)
+        
+        tasks = [asyncio.ensure_future(analyze(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Si un fragmento falla, el resto ya no sirve
+            for task in tasks:
+                task.cancel()
+            raise
+        return aggregate_analyses(results)
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        """Analiza un texto, por fragmentos si es largo.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            El análisis de la amenaza
+        """
+        chunks = self._chunker.split(text)
+        if len(chunks) == 1:
+            return await self._detector.analyze_text(text)
+        return await self._analyze_chunks(chunks)
+    
+    async def analyze_text_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Analiza un texto en streaming; los textos largos emiten el veredicto combinado al final.
+        
+        Args:
+            text: El texto a analizar
+        
+        Yields:
+            Tuplas (nombre del evento, datos del evento)
+        """
+        chunks = self._chunker.split(text)
+        if len(chunks) == 1:
+            async for event in self._detector.analyze_text_stream(text):
+                yield event
+            return
+        for event in analysis_events(await self._analyze_chunks(chunks)):
+            yield event
+    
+    async def analyze_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Analiza un lote delegando juntos los textos cortos y por fragmentos los largos.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de análisis simultáneos hacia el detector
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        chunked: Dict[str, List[str]] = {}
+        long_indexes: List[int] = []
+        short_indexes: List[int] = []
+        for index, text in enumerate(texts):
+            chunks = chunked.get(text) or self._chunker.split(text)
+            if len(chunks) > 1:
+                chunked[text] = chunks
+                long_indexes.append(index)
+            else:
+                short_indexes.append(index)
+        
+        async def analyze_short() -> List[BatchItemResult]:
+            if not short_indexes:
+                return []
+            return await self._detector.analyze_batch([texts[index] for index in short_indexes], max_concurrency)
+        
+        long_outcomes, short_results = await asyncio.gather(
+            asyncio.gather(*(self._analyze_chunks(chunks) for chunks in chunked.values()), return_exceptions=True),
+            analyze_short()
+        )
+        long_results = build_batch_results([texts[index] for index in long_indexes], dict(zip(chunked, long_outcomes)))
+        
+        results: List[BatchItemResult] = [None] * len(texts)
+        for indexes, group in ((long_indexes, long_results), (short_indexes, short_results)):
+            for item in group:
+                index = indexes[item.index]
+                results[index] = item.model_copy(update={"index": index})
+        return results
+    
+    async def startup(self) -> None:
+        """Inicia el detector decorado."""
+        await self._detector.startup()
+    
+    async def shutdown(self) -> None:
+        """Detiene el detector decorado."""
+        await self._detector.shutdown()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene las estadísticas del detector decorado junto con las de la división en fragmentos."""
+        stats = dict(self._detector.get_stats())
+        stats["chunking"] = {
+            "chunked_texts": self._chunked_texts,
+            "chunks": self._chunks,
+        }
+        return stats
@@ -0,0 +1,217 @@
+"""Límite adaptativo de llamadas simultáneas a un servicio externo."""
+
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from src.domain.exceptions import DetectorOverloadedError
+
+# Factor de reducción del límite ante sobrecarga (decremento multiplicativo)
+_BACKOFF_FACTOR = 0.7
+# Crecimiento por muestra de la latencia base, para olvidar mínimos antiguos
+_BASELINE_DRIFT = 1.001
+
+
+class _Permit:
+    """Resultado de una llamada, informado por quien la realiza."""
+    
+    __slots__ = ("overloaded",)
+    
+    def __init__(self):
+        self.overloaded = False
+    
+    def mark_overloaded(self) -> None:
+        """Indica que el servicio respondió con saturación (429, 5xx o timeout)."""
+        self.overloaded = True
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limita las llamadas simultáneas y ajusta el límite con AIMD.
+    
+    Cada llamada terminada sin señales de saturación aumenta el límite en
+    `1 / límite` (aproximadamente +1 por cada ronda completa de llamadas). Una
+    respuesta 429/5xx, un timeout o una latencia superior a `latency_tolerance`
+    veces la latencia base lo reducen multiplicándolo por 0,7, como mucho una
+    vez por latencia media para no hundirlo con las respuestas de una misma ráfaga.
+    Las llamadas que por naturaleza duran más que una normal (prompts empaquetados
+    o respuestas en streaming) no cuentan para la comparación de latencia.
+    
+    Las llamadas que superan el límite esperan turno en una cola acotada; si la
+    cola está llena o la espera supera `queue_timeout`, se lanza
+    `DetectorOverloadedError` con un tiempo de reintento estimado.
+    """
+    
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        latency_tolerance: float = 3.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Inicializa el limitador.
+        
+        Args:
+            initial_limit: Límite inicial de llamadas simultáneas
+            min_limit: Límite mínimo
+            max_limit: Límite máximo
+            max_queue: Número máximo de llamadas esperando turno
+            queue_timeout: Tiempo máximo de espera en la cola, en segundos
+            latency_tolerance: Múltiplo de la latencia base considerado saturación
+            clock: Reloj monótono
+        """
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, self._min_limit), self._max_limit))
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._latency_tolerance = latency_tolerance
+        self._clock = clock
+        
+        self._inflight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._baseline_latency: Optional[float] = None
+        self._average_latency = 0.0
+        self._last_decrease = -math.inf
+        
+        # Contadores para monitoreo
+        self._rejected = 0
+        self._timed_out = 0
+        self._decreases = 0
+    
+    @property
+    def limit(self) -> int:
+        """Límite actual de llamadas simultáneas."""
+        return int(self._limit)
+    
+    @property
+    def saturated(self) -> bool:
+        """Indica si una llamada nueva tendría que esperar turno."""
+        return self._inflight >= self.limit or bool(self._waiters)
+    
+    def _retry_after(self) -> float:
+        """Estima en cuántos segundos habrá hueco para una nueva llamada."""
+        latency = self._average_latency or self._queue_timeout
+        rounds = (len(self._waiters) + 1) / max(1, self.limit)
+        return max(1.0, math.ceil(latency * rounds))
+    
+    async def _wait_turn(self) -> None:
+        """Espera en la cola hasta que se libere un hueco."""
+        if len(self._waiters) >= self._max_queue:
+            self._rejected += 1
+            raise DetectorOverloadedError(
+                "Demasiados análisis en espera para el servicio externo", self._retry_after()
+            )
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self._queue_timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise DetectorOverloadedError(
+                "Tiempo de espera agotado para el servicio externo", self._retry_after()
+            ) from None
+        except BaseException:
+            # Si el hueco ya se había concedido, se cede al siguiente en la cola
+            if waiter.done() and not waiter.cancelled():
+                self._inflight -= 1
+                self._wake_waiters()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+    
+    def _wake_waiters(self) -> None:
+        """Concede los huecos libres a las llamadas en cola, por orden de llegada."""
+        while self._waiters and self._inflight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._inflight += 1
+                waiter.set_result(None)
+    
+    def _record(self, latency: float, overloaded: bool, latency_signal: bool = True) -> None:
+        """Ajusta el límite según el resultado de una llamada.
+        
+        Con `latency_signal` a False la latencia de la llamada solo se usa para estimar
+        la espera, no para la latencia base ni para detectar saturación.
+        """
+        self._average_latency = latency if not self._average_latency else 0.9 * self._average_latency + 0.1 * latency
+        if latency_signal:
+            if self._baseline_latency is None or latency < self._baseline_latency:
+                self._baseline_latency = latency
+            else:
+                self._baseline_latency *= _BASELINE_DRIFT
+            if not overloaded and latency > self._baseline_latency * self._latency_tolerance:
+                overloaded = True
+        
+        if overloaded:
+            now = self._clock()
+            if now - self._last_decrease >= self._average_latency:
+                self._limit = max(float(self._min_limit), self._limit * _BACKOFF_FACTOR)
+                self._last_decrease = now
+                self._decreases += 1
+        else:
+            self._limit = min(float(self._max_limit), self._limit + 1 / self._limit)
+    
+    @asynccontextmanager
+    async def slot(self, latency_signal: bool = True) -> AsyncIterator[_Permit]:
+        """Reserva un hueco para una llamada durante el bloque.
+        
+        Quien realiza la llamada debe invocar `mark_overloaded()` sobre el permiso
+        si el servicio respondió con 429 o 5xx; las excepciones se consideran
+        saturación.
+        
+        Args:
+            latency_signal: False para las llamadas más largas que una normal (prompts
+                empaquetados, streaming), cuya latencia no indica saturación
+        
+        Yields:
+            Permiso con el que informar del resultado
+        
+        Raises:
+            DetectorOverloadedError: Si la cola está llena o la espera se agota
+        """
+        if self._inflight < self.limit and not self._waiters:
+            self._inflight += 1
+        else:
+            await self._wait_turn()
+        
+        permit = _Permit()
+        started = self._clock()
+        completed = True
+        try:
+            yield permit
+        except asyncio.CancelledError:
+            # Una llamada cancelada no dice nada sobre el estado del servicio
+            completed = False
+            raise
+        except Exception:
+            permit.mark_overloaded()
+            raise
+        finally:
+            if completed:
+                self._record(self._clock() - started, permit.overloaded, latency_signal)
+            self._inflight -= 1
+            self._wake_waiters()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado del limitador para monitoreo."""
+        return {
+            "limit": self.limit,
+            "inflight": self._inflight,
+            "queued": len(self._waiters),
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "decreases": self._decreases,
+            "baseline_latency_ms": round(self._baseline_latency * 1000, 1) if self._baseline_latency else None,
+        }
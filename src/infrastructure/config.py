@@ -27,14 +27,150 @@ class Config:
     # API
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    # Tiempo máximo para terminar las peticiones y llamadas en curso al detener el servidor
+    SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "30"))
+    
+    # Límite de peticiones por cliente (GCRA), en unidades de coste: caudal por minuto y ráfaga máxima
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    RATE_LIMIT_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_PER_MINUTE", "120"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "30"))
+    # Límites propios por clave de API ("clave=por_minuto:ráfaga" separados por comas); solo estas
+    # claves identifican al cliente, el resto de peticiones se limitan por dirección IP
+    RATE_LIMIT_CLIENTS: str = os.getenv("RATE_LIMIT_CLIENTS", "")
+    RATE_LIMIT_API_KEY_HEADER: str = os.getenv("RATE_LIMIT_API_KEY_HEADER", "X-API-Key")
+    # Coste de cada petición y coste adicional de cada llamada a DeepSeek que provoca
+    RATE_LIMIT_REQUEST_COST: float = float(os.getenv("RATE_LIMIT_REQUEST_COST", "1"))
+    RATE_LIMIT_UPSTREAM_COST: float = float(os.getenv("RATE_LIMIT_UPSTREAM_COST", "4"))
+    # Prefijos de las rutas limitadas, separados por comas
+    RATE_LIMIT_PATHS: str = os.getenv("RATE_LIMIT_PATHS", "/analysis,/jobs")
+    RATE_LIMIT_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL_SECONDS", "60"))
+    
+    # Registro (logging)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+    # Proporción de análisis (0-1) cuyo registro de resumen se escribe; los errores siempre se registran
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
     
     # API de DeepSeek
     DEEPSEEK_API_KEY: Optional[str] = os.getenv("DEEPSEEK_API_KEY")
     DEEPSEEK_API_URL: str = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/chat/completions")
     
+    # Cliente HTTP compartido hacia DeepSeek
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    # Tiempos máximos por fase: conexión, espera de cada lectura, envío y espera de una conexión libre del pool
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "3"))
+    HTTP_READ_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "15"))
+    HTTP_WRITE_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_WRITE_TIMEOUT_SECONDS", "5"))
+    HTTP_POOL_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "5"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    
+    # Límite adaptativo (AIMD) de llamadas simultáneas a DeepSeek
+    UPSTREAM_CONCURRENCY_INITIAL: int = int(os.getenv("UPSTREAM_CONCURRENCY_INITIAL", "16"))
+    UPSTREAM_CONCURRENCY_MIN: int = int(os.getenv("UPSTREAM_CONCURRENCY_MIN", "2"))
+    UPSTREAM_CONCURRENCY_MAX: int = int(os.getenv("UPSTREAM_CONCURRENCY_MAX", "100"))
+    # Latencia a partir de la cual (como múltiplo de la latencia base) se reduce el límite
+    UPSTREAM_LATENCY_TOLERANCE: float = float(os.getenv("UPSTREAM_LATENCY_TOLERANCE", "3.0"))
+    # Llamadas que pueden esperar turno y tiempo máximo de espera antes de responder 503
+    UPSTREAM_QUEUE_MAX: int = int(os.getenv("UPSTREAM_QUEUE_MAX", "200"))
+    UPSTREAM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT_SECONDS", "5"))
+    
+    # Reintentos con espera aleatoria (jitter) ante errores transitorios de DeepSeek (429, 5xx, red)
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.2"))
+    RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "2"))
+    # Tiempo total máximo de una consulta a DeepSeek sumando todos sus intentos
+    UPSTREAM_DEADLINE_SECONDS: float = float(os.getenv("UPSTREAM_DEADLINE_SECONDS", "20"))
+    
+    # Solicitudes de cobertura: se duplica una llamada que supera el percentil indicado de latencia
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.2"))
+    
+    # Cortocircuito: tras varios fallos seguidos se deja de llamar a DeepSeek durante un tiempo
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    # Mientras DeepSeek no está disponible, responder con el detector local por reglas
+    FAILOVER_TO_RULES: bool = os.getenv("FAILOVER_TO_RULES", "true").lower() == "true"
+    
+    # Contabilidad de tokens de DeepSeek (GET /usage): intervalo de agregación y antigüedad conservada
+    TOKEN_USAGE_BUCKET_SECONDS: float = float(os.getenv("TOKEN_USAGE_BUCKET_SECONDS", "60"))
+    TOKEN_USAGE_RETENTION_HOURS: float = float(os.getenv("TOKEN_USAGE_RETENTION_HOURS", "24"))
+    # Presupuesto de tokens en una ventana deslizante (0 para desactivar); agotado, no se llama a
+    # DeepSeek hasta que el consumo baja de TOKEN_BUDGET_RESUME_RATIO veces el presupuesto
+    TOKEN_BUDGET_MAX_TOKENS: int = int(os.getenv("TOKEN_BUDGET_MAX_TOKENS", "0"))
+    TOKEN_BUDGET_WINDOW_SECONDS: float = float(os.getenv("TOKEN_BUDGET_WINDOW_SECONDS", "3600"))
+    TOKEN_BUDGET_RESUME_RATIO: float = float(os.getenv("TOKEN_BUDGET_RESUME_RATIO", "0.9"))
+    
+    # Análisis por lotes
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    
+    # Textos largos: longitud máxima aceptada y análisis por fragmentos solapados (0 para desactivar)
+    MAX_TEXT_CHARS: int = int(os.getenv("MAX_TEXT_CHARS", "50000"))
+    CHUNK_MAX_CHARS: int = int(os.getenv("CHUNK_MAX_CHARS", "2000"))
+    CHUNK_OVERLAP_CHARS: int = int(os.getenv("CHUNK_OVERLAP_CHARS", "200"))
+    CHUNK_MAX_CONCURRENCY: int = int(os.getenv("CHUNK_MAX_CONCURRENCY", "4"))
+    
+    # Flujos NDJSON (POST /analysis/ndjson)
+    NDJSON_MAX_IN_FLIGHT: int = int(os.getenv("NDJSON_MAX_IN_FLIGHT", "16"))
+    NDJSON_MAX_LINE_BYTES: int = int(os.getenv("NDJSON_MAX_LINE_BYTES", str(1024 * 1024)))
+    
+    # Trabajos de análisis en segundo plano (POST /jobs)
+    JOBS_SQLITE_PATH: str = os.getenv("JOBS_SQLITE_PATH", "data/jobs.sqlite3")
+    JOBS_MAX_ITEMS: int = int(os.getenv("JOBS_MAX_ITEMS", "100000"))
+    JOBS_WORKERS: int = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_CHUNK_SIZE: int = int(os.getenv("JOBS_CHUNK_SIZE", "50"))
+    JOBS_MAX_CONCURRENCY: int = int(os.getenv("JOBS_MAX_CONCURRENCY", "4"))
+    # Tiempo sin progreso tras el cual otro proceso puede continuar un trabajo
+    JOBS_LEASE_SECONDS: float = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+    
+    # Prompts empaquetados: varios textos cortos por llamada a DeepSeek
+    PACKED_PROMPT_ENABLED: bool = os.getenv("PACKED_PROMPT_ENABLED", "true").lower() == "true"
+    PACK_MAX_ITEMS: int = int(os.getenv("PACK_MAX_ITEMS", "10"))
+    PACK_MAX_CHARS: int = int(os.getenv("PACK_MAX_CHARS", "2000"))
+    PACK_ITEM_MAX_CHARS: int = int(os.getenv("PACK_ITEM_MAX_CHARS", "300"))
+    
+    # Filtro local por reglas antes de consultar DeepSeek
+    USE_PREFILTER: bool = os.getenv("USE_PREFILTER", "false").lower() == "true"
+    PREFILTER_MAX_HITS: int = int(os.getenv("PREFILTER_MAX_HITS", "0"))
+    
+    # Reglas del detector local: archivo JSON versionado (vacío para usar las incluidas), vigilado cada
+    # RULES_RELOAD_INTERVAL_SECONDS (0 para no vigilarlo); ADMIN_TOKEN habilita POST /admin/rules/reload
+    RULES_PATH: str = os.getenv("RULES_PATH", "")
+    RULES_RELOAD_INTERVAL_SECONDS: float = float(os.getenv("RULES_RELOAD_INTERVAL_SECONDS", "5"))
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    
     # Mock
     USE_MOCK: bool = os.getenv("USE_MOCK", "false").lower() == "true"
     
     # Sistema de caché
     USE_CACHE: bool = os.getenv("USE_CACHE", "true").lower() == "true"
     CACHE_TTL_HOURS: int = int(os.getenv("CACHE_TTL_HOURS", "24"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "300"))
+    # Pasos de normalización del texto antes de calcular la clave de caché, separados por comas
+    # (disponibles: urls, digits, names, nfkc, casefold, accents, emoji, whitespace)
+    CACHE_KEY_NORMALIZATION: str = os.getenv("CACHE_KEY_NORMALIZATION", "nfkc,casefold,whitespace")
+    # Backend de caché: "memory" (por proceso) o "sqlite" (persistente y compartida entre workers)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()
+    CACHE_SQLITE_PATH: str = os.getenv("CACHE_SQLITE_PATH", "data/cache.sqlite3")
+    CACHE_SQLITE_MAX_ENTRIES: int = int(os.getenv("CACHE_SQLITE_MAX_ENTRIES", "1000000"))
+    
+    # Reutilización del análisis de textos casi idénticos (plantillas con pequeños cambios)
+    USE_NEAR_DUPLICATES: bool = os.getenv("USE_NEAR_DUPLICATES", "false").lower() == "true"
+    # Similitud de Jaccard mínima (0-1) entre fragmentos de caracteres para reutilizar un análisis
+    NEAR_DUP_THRESHOLD: float = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+    NEAR_DUP_MAX_ENTRIES: int = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "10000"))
+    NEAR_DUP_TTL_HOURS: int = int(os.getenv("NEAR_DUP_TTL_HOURS", "24"))
+    NEAR_DUP_NUM_PERM: int = int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+    NEAR_DUP_BANDS: int = int(os.getenv("NEAR_DUP_BANDS", "16"))
+    NEAR_DUP_SHINGLE_SIZE: int = int(os.getenv("NEAR_DUP_SHINGLE_SIZE", "5"))
+    # Solo se indexan textos de esta longitud: en los cortos un cambio pequeño altera el sentido
+    NEAR_DUP_MIN_CHARS: int = int(os.getenv("NEAR_DUP_MIN_CHARS", "40"))
+    NEAR_DUP_MAX_CHARS: int = int(os.getenv("NEAR_DUP_MAX_CHARS", "2000"))
+    NEAR_DUP_NORMALIZATION: str = os.getenv("NEAR_DUP_NORMALIZATION", "urls,digits,nfkc,casefold,accents,emoji,whitespace")
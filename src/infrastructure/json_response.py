@@ -0,0 +1,125 @@
+"""Serialización JSON de las respuestas de la API sin pasos intermedios."""
+
+import json
+import weakref
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi.responses import JSONResponse, Response
+
+from src.domain.models import BatchItemResult, ThreatAnalysis
+
+# orjson es opcional (pip install .[fast-json]); sin él se usa el módulo json estándar
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Serialización de cada análisis vivo, indexada por identidad; la entrada se borra al liberarse el análisis
+_serialized: Dict[int, Tuple["weakref.ref[ThreatAnalysis]", bytes]] = {}
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa un valor a JSON compacto en UTF-8.
+    
+    orjson rechaza algunos valores que el módulo json estándar sí admite, como los
+    enteros de más de 64 bits que puede enviar un cliente en el `id` de una línea
+    NDJSON; en ese caso se serializa con el módulo estándar.
+    
+    Args:
+        content: Valor formado por tipos básicos de JSON
+    
+    Returns:
+        El JSON codificado en UTF-8
+    """
+    if _ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            pass
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def analysis_json(analysis: ThreatAnalysis) -> bytes:
+    """Serializa un análisis, reutilizando el resultado si ya se serializó.
+    
+    Los análisis son inmutables y la caché en memoria devuelve la misma instancia
+    en cada acierto, así que un análisis cacheado se serializa una sola vez
+    mientras siga en la caché.
+    
+    Args:
+        analysis: El análisis a serializar
+    
+    Returns:
+        El análisis en JSON compacto, con los mismos campos que `model_dump_json`
+    """
+    key = id(analysis)
+    cached = _serialized.get(key)
+    if cached is not None and cached[0]() is analysis:
+        return cached[1]
+    
+    body = analysis.__pydantic_serializer__.to_json(analysis)
+    _serialized[key] = (weakref.ref(analysis, lambda _, key=key: _serialized.pop(key, None)), body)
+    return body
+
+
+def batch_item_json(item: BatchItemResult) -> bytes:
+    """Serializa el resultado de un texto de un lote reutilizando la serialización del análisis.
+    
+    Args:
+        item: Resultado del texto
+    
+    Returns:
+        El resultado en JSON compacto
+    """
+    result = analysis_json(item.result) if item.result is not None else b"null"
+    return b'{"index":%d,"result":%s,"error":%s}' % (item.index, result, dumps(item.error))
+
+
+def ndjson_line(correlation_id: Any, analysis: Optional[ThreatAnalysis], error: Optional[str]) -> bytes:
+    """Serializa una línea de resultado NDJSON `{"id", "result", "error"}`.
+    
+    Args:
+        correlation_id: Identificador de la entrada
+        analysis: Análisis del texto, o None si falló
+        error: Descripción del error, o None si se analizó
+    
+    Returns:
+        La línea en JSON compacto, terminada en salto de línea
+    """
+    result = analysis_json(analysis) if analysis is not None else b"null"
+    return b'{"id":%s,"result":%s,"error":%s}\n' % (dumps(correlation_id), result, dumps(error))
+
+
+class FastJSONResponse(JSONResponse):
+    """Respuesta JSON compacta serializada con orjson si está instalado."""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def analysis_response(analysis: ThreatAnalysis) -> Response:
+    """Construye la respuesta de un análisis con su serialización reutilizable.
+    
+    Args:
+        analysis: El análisis a devolver
+    
+    Returns:
+        La respuesta JSON
+    """
+    return Response(content=analysis_json(analysis), media_type=JSON_MEDIA_TYPE)
+
+
+def batch_response(results: Iterable[BatchItemResult]) -> Response:
+    """Construye la respuesta `{"results": [...]}` de un lote.
+    
+    Args:
+        results: Resultados por texto, en orden
+    
+    Returns:
+        La respuesta JSON
+    """
+    body = b'{"results":[' + b",".join(batch_item_json(item) for item in results) + b"]}"
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
@@ -0,0 +1,82 @@
+"""Configuración de registro asíncrono mediante cola y registros de resumen muestreados."""
+
+import atexit
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from src.infrastructure.config import Config
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Encola los registros sin formatearlos.
+    
+    `QueueHandler` formatea el mensaje en el hilo que registra; aquí se encola el
+    registro tal cual para que el formateo y la escritura ocurran en el hilo del
+    `QueueListener`, fuera del bucle de eventos.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: str = Config.LOG_LEVEL) -> None:
+    """Configura el registro raíz para escribir a través de una cola en un hilo aparte.
+    
+    Es idempotente: cada worker la invoca al construir la aplicación.
+    
+    Args:
+        level: Nivel mínimo de registro
+    """
+    global _listener
+    if _listener is not None:
+        return
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    # httpx registra cada petición en INFO; basta con el resumen por análisis
+    logging.getLogger("httpx").setLevel(max(logging.WARNING, root.level))
+    
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Vacía la cola de registros pendientes y detiene el hilo de escritura."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_summary(logger: logging.Logger, message: str, *args: Any) -> None:
+    """Escribe el registro de resumen de un análisis según `Config.LOG_SAMPLE_RATE`.
+    
+    El muestreo se decide antes de crear el registro, de modo que los análisis no
+    muestreados no pagan el coste del registro. El mensaje se formatea de forma
+    diferida con `args`.
+    
+    Args:
+        logger: Logger del componente
+        message: Mensaje con marcadores `%`
+        args: Valores del mensaje
+    """
+    rate = Config.LOG_SAMPLE_RATE
+    if rate < 1.0 and random.random() >= rate:
+        return
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(message, *args)
@@ -0,0 +1,177 @@
+"""Caché en memoria acotada con política LRU y expiración por TTL."""
+
+import sys
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from src.domain.models import ThreatAnalysis
+from src.domain.ports import CachePort, cache_hit_rate
+
+logger = logging.getLogger("memory_cache")
+
+# Sobrecarga aproximada por entrada (objeto de análisis, entrada del diccionario, metadatos)
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+class _CacheEntry:
+    """Entrada de la caché con su fecha de expiración y tamaño estimado."""
+    
+    __slots__ = ("value", "expires_at", "size")
+    
+    def __init__(self, value: ThreatAnalysis, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class InMemoryLRUCache(CachePort):
+    """Caché en memoria limitada por número de entradas y tamaño en bytes.
+    
+    Las entradas menos usadas recientemente se desalojan al superar los límites y
+    una tarea de fondo elimina periódicamente las entradas expiradas.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        sweep_interval_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Inicializa la caché.
+        
+        Args:
+            max_entries: Número máximo de entradas
+            max_bytes: Tamaño máximo estimado en bytes
+            ttl_seconds: Tiempo de vida de cada entrada en segundos
+            sweep_interval_seconds: Intervalo entre barridos de entradas expiradas (0 para desactivar)
+            clock: Reloj monotónico usado para calcular expiraciones
+        """
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._sweep_interval = sweep_interval_seconds
+        self._clock = clock
+        self._bytes = 0
+        self._sweep_task: Optional[asyncio.Task] = None
+        
+        # Contadores para monitoreo
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    @staticmethod
+    def _estimate_size(key: str, value: ThreatAnalysis) -> int:
+        """Estima el tamaño en memoria de una entrada."""
+        return (
+            sys.getsizeof(key)
+            + sys.getsizeof(value.keyword)
+            + sys.getsizeof(value.justification)
+            + _ENTRY_OVERHEAD_BYTES
+        )
+    
+    def _remove(self, key: str) -> None:
+        """Elimina una entrada y actualiza el tamaño ocupado."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+    
+    async def get(self, key: str) -> Optional[ThreatAnalysis]:
+        """Obtiene un análisis de la caché si existe y no ha expirado."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self._expirations += 1
+            self._misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.value
+    
+    async def set(self, key: str, value: ThreatAnalysis) -> None:
+        """Almacena un análisis desalojando las entradas menos usadas si es necesario."""
+        size = self._estimate_size(key, value)
+        if size > self._max_bytes:
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        
+        self._entries[key] = _CacheEntry(value, self._clock() + self._ttl, size)
+        self._bytes += size
+        
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._evictions += 1
+    
+    async def delete(self, key: str) -> None:
+        """Elimina un análisis de la caché."""
+        if key in self._entries:
+            self._remove(key)
+    
+    async def clear(self) -> None:
+        """Elimina todos los análisis de la caché."""
+        self._entries.clear()
+        self._bytes = 0
+    
+    def sweep_expired(self) -> int:
+        """Elimina todas las entradas expiradas.
+        
+        Returns:
+            Número de entradas eliminadas
+        """
+        now = self._clock()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self._expirations += len(expired)
+        return len(expired)
+    
+    async def _sweep_loop(self) -> None:
+        """Barre periódicamente las entradas expiradas."""
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            removed = self.sweep_expired()
+            if removed:
+                logger.debug("Barrido de caché: %d entradas expiradas eliminadas", removed)
+    
+    async def startup(self) -> None:
+        """Inicia el barrido periódico de entradas expiradas."""
+        if self._sweep_task is None and self._sweep_interval > 0:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+    
+    async def shutdown(self) -> None:
+        """Detiene el barrido periódico de entradas expiradas."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas de uso de la caché."""
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "hit_rate": cache_hit_rate(self._hits, self._misses),
+        }
@@ -0,0 +1,371 @@
+"""Métricas de latencia y contadores en formato de exposición de Prometheus."""
+
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Límites por defecto de los histogramas, en segundos
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Tipo de contenido del formato de texto de Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value: str) -> str:
+    """Escapa un valor de etiqueta según el formato de exposición."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    """Formatea las etiquetas de una muestra como `{nombre="valor",...}`."""
+    pairs = [f'{name}="{_escape_label(str(value))}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Formatea un valor numérico de una muestra."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monótono con etiquetas opcionales."""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Inicializa el contador.
+        
+        Args:
+            name: Nombre de la métrica
+            documentation: Descripción mostrada en `# HELP`
+            labelnames: Nombres de las etiquetas
+        """
+        self.name = name
+        self.documentation = documentation
+        self._labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """Incrementa el contador para los valores de etiqueta indicados."""
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+    
+    def value(self, *labelvalues: str) -> float:
+        """Obtiene el valor actual del contador."""
+        return self._values.get(labelvalues, 0)
+    
+    def render(self) -> List[str]:
+        """Genera las líneas de exposición del contador."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self._labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Valor que puede subir y bajar, con etiquetas opcionales."""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Inicializa el indicador.
+        
+        Args:
+            name: Nombre de la métrica
+            documentation: Descripción mostrada en `# HELP`
+            labelnames: Nombres de las etiquetas
+        """
+        self.name = name
+        self.documentation = documentation
+        self._labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def set(self, value: float, *labelvalues: str) -> None:
+        """Fija el valor del indicador para los valores de etiqueta indicados."""
+        self._values[labelvalues] = value
+    
+    def value(self, *labelvalues: str) -> float:
+        """Obtiene el valor actual del indicador."""
+        return self._values.get(labelvalues, 0)
+    
+    def render(self) -> List[str]:
+        """Genera las líneas de exposición del indicador."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self._labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class _Timer:
+    """Mide la duración de un bloque y la registra en un histograma."""
+    
+    __slots__ = ("_histogram", "_labelvalues", "_started")
+    
+    def __init__(self, histogram: "Histogram", labelvalues: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labelvalues = labelvalues
+        self._started = 0.0
+    
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started, *self._labelvalues)
+
+
+class Histogram:
+    """Histograma de duraciones con límites fijos y etiquetas opcionales.
+    
+    Cada observación cuesta una búsqueda binaria sobre los límites; los recuentos
+    acumulados que exige Prometheus se calculan solo al exportar.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """Inicializa el histograma.
+        
+        Args:
+            name: Nombre de la métrica
+            documentation: Descripción mostrada en `# HELP`
+            labelnames: Nombres de las etiquetas
+            buckets: Límites superiores de los intervalos, en orden creciente
+        """
+        self.name = name
+        self.documentation = documentation
+        self._labelnames = tuple(labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # Por valores de etiqueta: [recuento por intervalo (+Inf al final), suma, total]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+    
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Registra una observación para los valores de etiqueta indicados."""
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self._buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self._buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+    
+    def time(self, *labelvalues: str) -> _Timer:
+        """Obtiene un gestor de contexto que registra la duración del bloque."""
+        return _Timer(self, labelvalues)
+    
+    def count(self, *labelvalues: str) -> int:
+        """Obtiene el número de observaciones registradas."""
+        series = self._series.get(labelvalues)
+        return series[2] if series is not None else 0
+    
+    def render(self) -> List[str]:
+        """Genera las líneas de exposición del histograma."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, (counts, total_sum, total_count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self._labelnames, labelvalues, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self._labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{labels} {total_count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de las métricas expuestas en `/metrics`.
+    
+    Las métricas son del proceso actual: con varios workers, cada uno expone las
+    suyas y Prometheus las agrega al consultar.
+    """
+    
+    def __init__(self):
+        """Inicializa el registro vacío."""
+        self._metrics: Dict[str, Any] = {}
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Crea y registra un contador."""
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Crea y registra un indicador."""
+        return self._register(Gauge(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Crea y registra un histograma."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def _register(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Genera el documento de exposición con todas las métricas registradas."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro global del proceso
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "kuntur_http_request_duration_seconds",
+    "Tiempo total de atención de las peticiones HTTP.",
+    ("method", "route", "status")
+)
+CACHE_LOOKUP_SECONDS = REGISTRY.histogram(
+    "kuntur_cache_lookup_duration_seconds",
+    "Tiempo de consulta de la caché de análisis."
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "kuntur_cache_lookups_total",
+    "Consultas a la caché de análisis por resultado (hit/miss).",
+    ("result",)
+)
+NEAR_DUPLICATE_LOOKUPS = REGISTRY.counter(
+    "kuntur_near_duplicate_lookups_total",
+    "Consultas al índice de textos casi idénticos por resultado (hit/miss).",
+    ("result",)
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "kuntur_upstream_duration_seconds",
+    "Latencia de las llamadas a DeepSeek por fase (connect, ttfb, total).",
+    ("phase",)
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "kuntur_upstream_responses_total",
+    "Respuestas de DeepSeek por código de estado HTTP.",
+    ("status",)
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "kuntur_parse_duration_seconds",
+    "Tiempo de extracción del análisis a partir de la respuesta del detector.",
+    ("detector",)
+)
+OVERLOAD_REJECTIONS = REGISTRY.counter(
+    "kuntur_overload_rejections_total",
+    "Peticiones rechazadas con 503 por saturación del servicio externo."
+)
+FALLBACK_RESULTS = REGISTRY.counter(
+    "kuntur_fallback_results_total",
+    "Análisis de respaldo devueltos por errores, por palabra clave.",
+    ("keyword",)
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "kuntur_upstream_retries_total",
+    "Reintentos de llamadas a DeepSeek tras errores transitorios."
+)
+UPSTREAM_HEDGES = REGISTRY.counter(
+    "kuntur_upstream_hedges_total",
+    "Solicitudes de cobertura a DeepSeek lanzadas (launched) y que respondieron primero (won).",
+    ("outcome",)
+)
+FAILOVER_RESULTS = REGISTRY.counter(
+    "kuntur_failover_results_total",
+    "Análisis resueltos con el detector local por reglas mientras DeepSeek no estaba disponible.",
+    ("reason",)
+)
+UPSTREAM_TOKENS = REGISTRY.counter(
+    "kuntur_upstream_tokens_total",
+    "Tokens consumidos en DeepSeek según el bloque `usage` de sus respuestas (prompt/completion).",
+    ("kind",)
+)
+TOKEN_BUDGET_DEGRADED = REGISTRY.gauge(
+    "kuntur_token_budget_degraded",
+    "1 mientras el presupuesto de tokens está agotado y no se llama a DeepSeek; 0 en modo normal."
+)
+TOKEN_BUDGET_TRANSITIONS = REGISTRY.counter(
+    "kuntur_token_budget_transitions_total",
+    "Cambios de modo por el presupuesto de tokens, por modo de destino (degraded/normal).",
+    ("mode",)
+)
+RATE_LIMIT_DECISIONS = REGISTRY.counter(
+    "kuntur_rate_limit_decisions_total",
+    "Peticiones admitidas (allowed) y rechazadas con 429 (limited) por el límite de peticiones por cliente.",
+    ("result",)
+)
+RULE_SET_RELOADS = REGISTRY.counter(
+    "kuntur_rule_set_reloads_total",
+    "Recargas de las reglas del detector local, correctas (ok) o descartadas por un archivo no válido (error).",
+    ("result",)
+)
+
+
+def upstream_trace(started: float) -> Callable[[str, Dict[str, Any]], Awaitable[None]]:
+    """Crea un callback `trace` de httpcore que mide las fases de una llamada.
+    
+    Registra el tiempo de conexión (TCP y TLS) cuando la llamada abre una conexión
+    nueva, y el tiempo hasta recibir las cabeceras de la respuesta (TTFB).
+    
+    Args:
+        started: Instante de inicio de la llamada según `time.perf_counter`
+    
+    Returns:
+        Callback para la extensión `trace` de la petición httpx
+    """
+    connect_started: Optional[float] = None
+    connected: Optional[float] = None
+    
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        nonlocal connect_started, connected
+        if event_name == "connection.connect_tcp.started":
+            connect_started = time.perf_counter()
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            # Con TLS la conexión está lista al terminar el handshake
+            connected = time.perf_counter()
+        elif event_name.endswith("receive_response_headers.complete"):
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, "ttfb")
+            if connect_started is not None and connected is not None:
+                UPSTREAM_SECONDS.observe(connected - connect_started, "connect")
+                connect_started = None
+    
+    return trace
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide el tiempo total de cada petición HTTP.
+    
+    Las peticiones se etiquetan con la plantilla de la ruta (por ejemplo
+    `/analysis`), no con la URL concreta, para acotar el número de series.
+    """
+    
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        """Inicializa el middleware.
+        
+        Args:
+            app: Aplicación ASGI envuelta
+        """
+        self._app = app
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = 500
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self._app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
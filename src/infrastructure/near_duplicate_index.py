@@ -0,0 +1,210 @@
+"""Índice local de textos casi duplicados con MinHash y LSH sobre fragmentos de caracteres."""
+
+import time
+import random
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from src.domain.models import ThreatAnalysis
+
+_HASH_MAX = (1 << 64) - 1
+
+Signature = Tuple[int, ...]
+
+
+class _IndexEntry:
+    """Entrada del índice con su firma, su etiqueta, el análisis y la fecha de expiración."""
+    
+    __slots__ = ("signature", "tag", "value", "expires_at")
+    
+    def __init__(self, signature: Signature, tag: Hashable, value: ThreatAnalysis, expires_at: float):
+        self.signature = signature
+        self.tag = tag
+        self.value = value
+        self.expires_at = expires_at
+
+
+class MinHashLSHIndex:
+    """Guarda análisis por firma MinHash y encuentra textos muy parecidos ya analizados.
+    
+    La similitud entre dos textos es la de Jaccard entre sus conjuntos de
+    fragmentos de `shingle_size` caracteres, estimada como la proporción de
+    componentes iguales de sus firmas. Las firmas usan una sola función hash por
+    fragmento repartida en `num_perm` intervalos (one permutation hashing, con
+    densificación óptima de los intervalos vacíos), lo que cuesta lo mismo que
+    calcular un hash por fragmento en lugar de `num_perm`. Las firmas se reparten
+    en `bands` bandas (LSH): solo se comparan los textos que coinciden por completo
+    en alguna banda, de modo que una consulta no recorre todo el índice.
+    
+    Cada entrada puede llevar una etiqueta que debe coincidir exactamente con la de
+    la consulta, para separar textos parecidos que el llamador sabe distinguir.
+    Las entradas menos usadas recientemente se desalojan al superar `max_entries`
+    y las expiradas se eliminan al encontrarlas en una consulta o al desalojarlas.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        max_entries: int = 10000,
+        ttl_seconds: float = 24 * 60 * 60,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Inicializa el índice.
+        
+        Args:
+            threshold: Similitud mínima (0-1) para reutilizar un análisis
+            max_entries: Número máximo de entradas
+            ttl_seconds: Tiempo de vida de cada entrada en segundos
+            num_perm: Componentes (intervalos) de cada firma MinHash
+            bands: Bandas LSH; debe dividir a `num_perm`
+            shingle_size: Longitud en caracteres de los fragmentos comparados
+            seed: Semilla del orden de densificación de los intervalos vacíos
+            clock: Reloj monotónico usado para calcular expiraciones
+        
+        Raises:
+            ValueError: Si `bands` no divide a `num_perm`
+        """
+        if bands <= 0 or num_perm % bands:
+            raise ValueError(f"El número de bandas ({bands}) debe dividir a num_perm ({num_perm})")
+        rng = random.Random(seed)
+        # Orden fijo en el que cada intervalo vacío busca un intervalo con valor del que copiarlo
+        self._probes = [
+            rng.sample([other for other in range(num_perm) if other != bin_], num_perm - 1)
+            for bin_ in range(num_perm)
+        ]
+        self._num_perm = num_perm
+        self._threshold = threshold
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._shingle_size = shingle_size
+        self._clock = clock
+        self._entries: "OrderedDict[int, _IndexEntry]" = OrderedDict()
+        self._buckets: Dict[int, Set[int]] = {}
+        
+        # Contadores para monitoreo
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    def signature(self, text: str) -> Signature:
+        """Calcula la firma MinHash de un texto.
+        
+        Args:
+            text: Texto ya normalizado
+        
+        Returns:
+            La firma, con `num_perm` componentes
+        """
+        size = self._shingle_size
+        bins = self._num_perm
+        signature = [_HASH_MAX] * bins
+        for shingle in {text[i:i + size] for i in range(max(1, len(text) - size + 1))}:
+            value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+            bin_, value = value % bins, value // bins
+            if value < signature[bin_]:
+                signature[bin_] = value
+        
+        # Los intervalos vacíos copian el primer intervalo con valor según su orden fijo, de modo
+        # que dos textos coinciden en cada componente con probabilidad igual a su similitud
+        empty = {bin_ for bin_, value in enumerate(signature) if value == _HASH_MAX}
+        for bin_ in empty:
+            signature[bin_] = next(signature[other] for other in self._probes[bin_] if other not in empty)
+        return tuple(signature)
+    
+    def _band_keys(self, signature: Signature) -> Tuple[int, ...]:
+        """Obtiene la clave de cubeta de cada banda de una firma."""
+        rows = self._rows
+        return tuple(hash((band, signature[band * rows:(band + 1) * rows])) for band in range(self._bands))
+    
+    def similarity(self, first: Signature, second: Signature) -> float:
+        """Estima la similitud de Jaccard entre dos textos a partir de sus firmas."""
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+    
+    def _remove(self, entry_id: int) -> None:
+        """Elimina una entrada del índice y de sus cubetas."""
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry.signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+    
+    def query(self, signature: Signature, tag: Hashable = None) -> Optional[Tuple[ThreatAnalysis, float]]:
+        """Busca el análisis del texto indexado más parecido.
+        
+        Args:
+            signature: Firma del texto consultado
+            tag: Etiqueta que deben tener las entradas comparadas
+        
+        Returns:
+            Par (análisis, similitud) si algún texto supera el umbral, o None
+        """
+        candidates: Set[int] = set()
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates.update(bucket)
+        
+        now = self._clock()
+        best_id, best_similarity = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.expires_at <= now:
+                self._remove(entry_id)
+                self._expirations += 1
+                continue
+            if entry.tag != tag:
+                continue
+            similarity = self.similarity(signature, entry.signature)
+            if similarity >= self._threshold and similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+        
+        if best_id is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id].value, best_similarity
+    
+    def add(self, signature: Signature, value: ThreatAnalysis, tag: Hashable = None) -> None:
+        """Guarda el análisis de un texto, desalojando las entradas más antiguas si es necesario.
+        
+        Args:
+            signature: Firma del texto analizado
+            value: Análisis del texto
+            tag: Etiqueta del texto
+        """
+        entry_id = hash((signature, tag))
+        if entry_id in self._entries:
+            self._remove(entry_id)
+        self._entries[entry_id] = _IndexEntry(signature, tag, value, self._clock() + self._ttl)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        
+        while len(self._entries) > self._max_entries:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado del índice para monitoreo."""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "buckets": len(self._buckets),
+            "threshold": self._threshold,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
@@ -0,0 +1,167 @@
+"""Decorador que reutiliza el análisis de textos casi idénticos a otros ya analizados."""
+
+import re
+import logging
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Tuple
+
+from src.domain.models import BatchItemResult, ThreatAnalysis
+from src.domain.ports import ThreatDetectorPort, analysis_events
+from src.infrastructure.cached_threat_detector import is_cacheable
+from src.infrastructure.metrics import NEAR_DUPLICATE_LOOKUPS
+from src.infrastructure.near_duplicate_index import MinHashLSHIndex, Signature
+from src.infrastructure.text_normalizer import TextNormalizer
+
+logger = logging.getLogger("near_duplicate_detector")
+
+# Negación y la palabra a la que afecta ("no pagas", "sin problema")
+_NEGATION_PATTERN = re.compile(r"\b(?:no|nunca|jam[aá]s|ni|sin|tampoco)\s+\w+", re.IGNORECASE)
+
+# Firma del texto y negaciones que contiene
+_IndexKey = Tuple[Signature, FrozenSet[str]]
+
+
+class NearDuplicateThreatDetector(ThreatDetectorPort):
+    """Detector que reutiliza el análisis de un texto muy parecido antes de delegar.
+    
+    Los mensajes de extorsión suelen ser plantillas en las que solo cambian el
+    nombre de la banda, el monto o el negocio. Cada análisis válido se guarda en un
+    índice MinHash/LSH local y los textos cuya similitud con uno ya analizado supera
+    el umbral del índice reciben ese análisis sin consultar el detector decorado.
+    Dos textos solo se consideran equivalentes si contienen las mismas negaciones
+    ("si no pagas" frente a "si pagas"), y los textos muy cortos, en los que un
+    cambio pequeño altera el sentido, no se indexan.
+    """
+    
+    def __init__(
+        self,
+        detector: ThreatDetectorPort,
+        index: MinHashLSHIndex,
+        normalizer: Optional[TextNormalizer] = None,
+        min_chars: int = 40,
+        max_chars: int = 2000
+    ):
+        """Inicializa el decorador.
+        
+        Args:
+            detector: Detector de amenazas al que se delega si no hay un texto parecido
+            index: Índice de textos ya analizados
+            normalizer: Normalizador aplicado al texto antes de calcular su firma (opcional)
+            min_chars: Longitud mínima de los textos indexados
+            max_chars: Longitud máxima de los textos indexados, para acotar el coste de la firma
+        """
+        self._detector = detector
+        self._index = index
+        self._normalizer = normalizer
+        self._min_chars = min_chars
+        self._max_chars = max_chars
+        self._skipped = 0
+    
+    def _key(self, text: str) -> Optional[_IndexKey]:
+        """Calcula la clave del texto en el índice, o None si el texto no se indexa."""
+        if not self._min_chars <= len(text) <= self._max_chars:
+            self._skipped += 1
+            return None
+        if self._normalizer is not None:
+            text = self._normalizer.normalize(text)
+        negations = frozenset(match.lower() for match in _NEGATION_PATTERN.findall(text))
+        return self._index.signature(text), negations
+    
+    def _lookup(self, key: Optional[_IndexKey]) -> Optional[ThreatAnalysis]:
+        """Busca el análisis de un texto parecido registrando el resultado en las métricas."""
+        if key is None:
+            return None
+        match = self._index.query(*key)
+        NEAR_DUPLICATE_LOOKUPS.inc("hit" if match is not None else "miss")
+        if match is None:
+            return None
+        logger.debug("Análisis reutilizado de un texto parecido (similitud %.2f)", match[1])
+        return match[0]
+    
+    def _store(self, key: Optional[_IndexKey], result: ThreatAnalysis) -> None:
+        """Guarda en el índice un análisis válido."""
+        if key is not None and is_cacheable(result):
+            self._index.add(key[0], result, key[1])
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        """Analiza un texto reutilizando el análisis de uno parecido si lo hay.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            El análisis de la amenaza
+        """
+        key = self._key(text)
+        match = self._lookup(key)
+        if match is not None:
+            return match
+        
+        result = await self._detector.analyze_text(text)
+        self._store(key, result)
+        return result
+    
+    async def analyze_text_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Analiza un texto en streaming reutilizando el análisis de uno parecido si lo hay.
+        
+        Args:
+            text: El texto a analizar
+        
+        Yields:
+            Tuplas (nombre del evento, datos del evento)
+        """
+        key = self._key(text)
+        match = self._lookup(key)
+        if match is not None:
+            for event in analysis_events(match):
+                yield event
+            return
+        
+        async for name, data in self._detector.analyze_text_stream(text):
+            if name == "result":
+                self._store(key, ThreatAnalysis.model_validate(data))
+            yield name, data
+    
+    async def analyze_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Analiza un lote resolviendo con el índice los textos parecidos y delegando el resto juntos.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de análisis simultáneos hacia el detector
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        results: List[BatchItemResult] = [None] * len(texts)
+        delegated: List[int] = []
+        keys: List[Optional[_IndexKey]] = []
+        for index, text in enumerate(texts):
+            key = self._key(text)
+            match = self._lookup(key)
+            if match is not None:
+                results[index] = BatchItemResult(index=index, result=match)
+            else:
+                delegated.append(index)
+                keys.append(key)
+        
+        if delegated:
+            remote = await self._detector.analyze_batch([texts[index] for index in delegated], max_concurrency)
+            for item in remote:
+                if item.result is not None:
+                    self._store(keys[item.index], item.result)
+                index = delegated[item.index]
+                results[index] = item.model_copy(update={"index": index})
+        return results
+    
+    async def startup(self) -> None:
+        """Inicia el detector decorado."""
+        await self._detector.startup()
+    
+    async def shutdown(self) -> None:
+        """Detiene el detector decorado."""
+        await self._detector.shutdown()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene las estadísticas del detector decorado junto con las del índice."""
+        stats = dict(self._detector.get_stats())
+        stats["near_duplicates"] = dict(self._index.get_stats(), skipped=self._skipped)
+        return stats
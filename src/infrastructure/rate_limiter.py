@@ -0,0 +1,309 @@
+"""Límite de peticiones por cliente con el algoritmo GCRA."""
+
+import math
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+from src.infrastructure.metrics import RATE_LIMIT_DECISIONS
+from src.infrastructure.request_usage import track_request_usage
+
+logger = logging.getLogger("rate_limiter")
+
+
+class RateLimit:
+    """Caudal sostenido y ráfaga máxima permitidos a un cliente, en unidades de coste."""
+    
+    __slots__ = ("per_minute", "burst")
+    
+    def __init__(self, per_minute: float, burst: float):
+        """Inicializa el límite.
+        
+        Args:
+            per_minute: Unidades que se recuperan por minuto
+            burst: Unidades que un cliente sin consumo reciente puede gastar de una vez
+        
+        Raises:
+            ValueError: Si alguno de los valores no es positivo
+        """
+        if per_minute <= 0 or burst <= 0:
+            raise ValueError(f"Límite no válido: {per_minute}/min con ráfaga {burst}")
+        self.per_minute = per_minute
+        self.burst = burst
+
+
+def parse_rate_limits(spec: str) -> Dict[str, RateLimit]:
+    """Lee los límites por clave de API con el formato `clave=por_minuto:ráfaga,...`.
+    
+    Args:
+        spec: Límites separados por comas; una cadena vacía no define ninguno
+    
+    Returns:
+        El límite de cada clave
+    
+    Raises:
+        ValueError: Si alguna entrada no tiene el formato esperado
+    """
+    limits: Dict[str, RateLimit] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        key, separator, values = entry.rpartition("=")
+        per_minute, colon, burst = values.partition(":")
+        if not separator or not key or not colon:
+            raise ValueError(f"Límite por cliente no válido: '{entry}' (formato clave=por_minuto:ráfaga)")
+        limits[key.strip()] = RateLimit(float(per_minute), float(burst))
+    return limits
+
+
+class RateLimitDecision:
+    """Resultado de consumir unidades del límite de un cliente."""
+    
+    __slots__ = ("allowed", "limit", "remaining", "reset_after", "retry_after")
+    
+    def __init__(self, allowed: bool, limit: float, remaining: int, reset_after: float, retry_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+    
+    def headers(self) -> List[Tuple[str, str]]:
+        """Cabeceras con la cuota del cliente.
+        
+        Returns:
+            `X-RateLimit-Limit` (ráfaga), `X-RateLimit-Remaining` (unidades disponibles) y
+            `X-RateLimit-Reset` (segundos hasta recuperar la ráfaga completa), más
+            `Retry-After` si la petición se rechazó
+        """
+        headers = [
+            ("X-RateLimit-Limit", str(math.floor(self.limit))),
+            ("X-RateLimit-Remaining", str(self.remaining)),
+            ("X-RateLimit-Reset", str(math.ceil(self.reset_after))),
+        ]
+        if not self.allowed:
+            headers.append(("Retry-After", str(max(1, math.ceil(self.retry_after)))))
+        return headers
+
+
+class GCRARateLimiter:
+    """Límite por cliente según el algoritmo de tasa de celdas genérico (GCRA).
+    
+    Equivale a un cubo de fichas que se rellena a `per_minute` unidades por minuto
+    hasta `burst` unidades, pero de cada cliente solo se guarda un número: el
+    instante teórico en que su cubo volverá a estar lleno. Cada consulta es O(1) y
+    los clientes cuyo cubo ya está lleno se eliminan en barridos periódicos, pues
+    no guardan información.
+    """
+    
+    def __init__(
+        self,
+        default: RateLimit,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        sweep_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Inicializa el limitador.
+        
+        Args:
+            default: Límite de los clientes sin un límite propio
+            limits: Límite propio de algunos clientes (opcional)
+            sweep_interval_seconds: Intervalo entre barridos de clientes inactivos (0 para desactivar)
+            clock: Reloj monótono
+        """
+        self._default = default
+        self._limits = dict(limits or {})
+        self._sweep_interval = sweep_interval_seconds
+        self._clock = clock
+        # Instante teórico de llegada (TAT) de cada cliente: cuándo tendrá la ráfaga completa
+        self._tats: Dict[str, float] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
+        
+        # Contadores para monitoreo
+        self._allowed = 0
+        self._limited = 0
+    
+    def has_limit(self, client: str) -> bool:
+        """Indica si un cliente tiene un límite propio."""
+        return client in self._limits
+    
+    def _consume(self, client: str, cost: float, force: bool) -> RateLimitDecision:
+        """Consume unidades del límite de un cliente si hay suficientes, o siempre si `force`."""
+        limit = self._limits.get(client, self._default)
+        interval = 60.0 / limit.per_minute
+        tolerance = interval * limit.burst
+        now = self._clock()
+        tat = max(self._tats.get(client, now), now)
+        new_tat = tat + cost * interval
+        allowed = force or new_tat - now <= tolerance
+        if allowed:
+            self._tats[client] = tat = new_tat
+        remaining = max(0, math.floor((tolerance - (tat - now)) / interval + 1e-9))
+        return RateLimitDecision(allowed, limit.burst, remaining, tat - now, 0.0 if allowed else new_tat - tolerance - now)
+    
+    def acquire(self, client: str, cost: float = 1.0) -> RateLimitDecision:
+        """Consume unidades del límite de un cliente si tiene suficientes.
+        
+        Args:
+            client: Identificador del cliente
+            cost: Unidades a consumir; no debe superar la ráfaga del cliente
+        
+        Returns:
+            La decisión, con la cuota restante y la espera hasta poder reintentar si se rechazó
+        """
+        decision = self._consume(client, cost, force=False)
+        if decision.allowed:
+            self._allowed += 1
+        else:
+            self._limited += 1
+        return decision
+    
+    def charge(self, client: str, cost: float) -> RateLimitDecision:
+        """Carga unidades a un cliente aunque no le queden, retrasando sus próximas peticiones.
+        
+        Se usa para el coste que solo se conoce después de admitir la petición.
+        
+        Args:
+            client: Identificador del cliente
+            cost: Unidades a cargar
+        
+        Returns:
+            La cuota restante tras el cargo
+        """
+        return self._consume(client, cost, force=True)
+    
+    def sweep_idle(self) -> int:
+        """Elimina los clientes que ya recuperaron la ráfaga completa.
+        
+        Returns:
+            Número de clientes eliminados
+        """
+        now = self._clock()
+        idle = [client for client, tat in self._tats.items() if tat <= now]
+        for client in idle:
+            del self._tats[client]
+        return len(idle)
+    
+    async def _sweep_loop(self) -> None:
+        """Barre periódicamente los clientes inactivos."""
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            removed = self.sweep_idle()
+            if removed:
+                logger.debug("Barrido del límite de peticiones: %d clientes inactivos eliminados", removed)
+    
+    async def startup(self) -> None:
+        """Inicia el barrido periódico de clientes inactivos."""
+        if self._sweep_task is None and self._sweep_interval > 0:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+    
+    async def shutdown(self) -> None:
+        """Detiene el barrido periódico de clientes inactivos."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas del limitador."""
+        return {
+            "tracked_clients": len(self._tats),
+            "configured_clients": len(self._limits),
+            "allowed": self._allowed,
+            "limited": self._limited,
+        }
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que aplica el límite de peticiones de cada cliente.
+    
+    El cliente se identifica por su clave de API si es una de las configuradas en
+    el limitador y, si no, por su dirección IP, para que inventar claves no dé
+    cuota nueva. Cada petición cuesta `request_cost` unidades al entrar y cada
+    llamada a DeepSeek que provoca suma `upstream_cost`, de modo que los aciertos
+    de caché y del detector local salen más baratos. Las peticiones sin cuota se
+    rechazan con 429 y todas las respuestas llevan las cabeceras de cuota.
+    """
+    
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        limiter: GCRARateLimiter,
+        path_prefixes: Sequence[str] = ("/analysis", "/jobs"),
+        api_key_header: str = "X-API-Key",
+        request_cost: float = 1.0,
+        upstream_cost: float = 4.0
+    ):
+        """Inicializa el middleware.
+        
+        Args:
+            app: Aplicación ASGI envuelta
+            limiter: Limitador con la cuota de cada cliente
+            path_prefixes: Prefijos de las rutas limitadas
+            api_key_header: Cabecera con la clave de API del cliente
+            request_cost: Unidades que cuesta cada petición
+            upstream_cost: Unidades adicionales por cada llamada a DeepSeek de la petición
+        """
+        self._app = app
+        self._limiter = limiter
+        self._path_prefixes = tuple(path_prefixes)
+        self._api_key_header = api_key_header.lower().encode("latin-1")
+        self._request_cost = request_cost
+        self._upstream_cost = upstream_cost
+    
+    def _identify(self, scope: Dict[str, Any]) -> str:
+        """Identifica al cliente de una petición."""
+        for name, value in scope["headers"]:
+            if name == self._api_key_header:
+                api_key = value.decode("latin-1")
+                if self._limiter.has_limit(api_key):
+                    return api_key
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'desconocido'}"
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self._path_prefixes):
+            await self._app(scope, receive, send)
+            return
+        
+        client = self._identify(scope)
+        decision = self._limiter.acquire(client, self._request_cost)
+        if not decision.allowed:
+            RATE_LIMIT_DECISIONS.inc("limited")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Límite de peticiones superado; reintente más tarde"},
+                headers=dict(decision.headers())
+            )
+            await response(scope, receive, send)
+            return
+        RATE_LIMIT_DECISIONS.inc("allowed")
+        
+        charged_calls = 0
+        
+        def charge_upstream_calls() -> None:
+            # Las llamadas a DeepSeek solo se conocen después de admitir la petición
+            nonlocal charged_calls, decision
+            pending = usage.upstream_calls - charged_calls
+            if pending > 0 and self._upstream_cost > 0:
+                decision = self._limiter.charge(client, pending * self._upstream_cost)
+            charged_calls += pending
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                charge_upstream_calls()
+                headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in decision.headers()]
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+        
+        with track_request_usage() as usage:
+            try:
+                await self._app(scope, receive, send_wrapper)
+            finally:
+                # Las respuestas en streaming pueden llamar a DeepSeek después de enviar las cabeceras
+                charge_upstream_calls()
@@ -0,0 +1,107 @@
+"""Consumo de servicios externos atribuido a la petición HTTP en curso."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from src.infrastructure.token_usage import TokenUsageLedger
+
+
+class RequestUsage:
+    """Consumo acumulado por una petición."""
+    
+    __slots__ = ("upstream_calls", "prompt_tokens", "completion_tokens")
+    
+    def __init__(self):
+        self.upstream_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+# Consumo de la petición en curso; las tareas creadas durante la petición comparten el mismo objeto
+_current: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+@contextmanager
+def track_request_usage() -> Iterator[RequestUsage]:
+    """Registra el consumo de las operaciones ejecutadas dentro del bloque.
+    
+    Si ya se está registrando el consumo (por ejemplo, en un middleware exterior)
+    se reutiliza el mismo registro.
+    
+    Yields:
+        El consumo acumulado, que se actualiza mientras dura el bloque
+    """
+    usage = _current.get()
+    if usage is not None:
+        yield usage
+        return
+    usage = RequestUsage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def record_upstream_call() -> None:
+    """Anota una llamada a DeepSeek en la petición en curso, si la hay."""
+    usage = _current.get()
+    if usage is not None:
+        usage.upstream_calls += 1
+
+
+def record_upstream_tokens(prompt_tokens: int, completion_tokens: int) -> None:
+    """Anota los tokens de una respuesta de DeepSeek en la petición en curso, si la hay.
+    
+    Args:
+        prompt_tokens: Tokens del prompt
+        completion_tokens: Tokens de la respuesta
+    """
+    usage = _current.get()
+    if usage is not None:
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+
+
+class RequestUsageMiddleware:
+    """Middleware ASGI que atribuye a cada petición las llamadas y tokens de DeepSeek.
+    
+    Las respuestas llevan `X-Upstream-Calls` y `X-Upstream-Tokens` con el consumo
+    hasta el envío de las cabeceras (el total en las respuestas que no son en
+    streaming), y al terminar la petición su consumo se suma a su ruta en el registro.
+    """
+    
+    def __init__(self, app: Callable[..., Awaitable[None]], ledger: TokenUsageLedger):
+        """Inicializa el middleware.
+        
+        Args:
+            app: Aplicación ASGI envuelta
+            ledger: Registro de consumo de tokens
+        """
+        self._app = app
+        self._ledger = ledger
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    (b"x-upstream-calls", str(usage.upstream_calls).encode()),
+                    (b"x-upstream-tokens", str(usage.prompt_tokens + usage.completion_tokens).encode()),
+                ]
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+        
+        with track_request_usage() as usage:
+            try:
+                await self._app(scope, receive, send_wrapper)
+            finally:
+                if usage.upstream_calls:
+                    route = getattr(scope.get("route"), "path", "unmatched")
+                    self._ledger.record_request(
+                        route, usage.upstream_calls, usage.prompt_tokens, usage.completion_tokens
+                    )
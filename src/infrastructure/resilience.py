@@ -0,0 +1,263 @@
+"""Reintentos, solicitudes de cobertura y cortocircuito para llamadas a servicios externos."""
+
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class UpstreamError(Exception):
+    """El servicio externo respondió con un código de estado distinto de 200."""
+    
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        """Inicializa la excepción.
+        
+        Args:
+            status_code: Código de estado HTTP recibido
+            retry_after: Segundos indicados por el servicio en `Retry-After`, si los hay
+        """
+        super().__init__(f"El servicio externo respondió {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+    
+    @property
+    def retryable(self) -> bool:
+        """Indica si el error es transitorio (429 o 5xx) y merece reintento."""
+        return self.status_code == 429 or self.status_code >= 500
+
+
+class CircuitOpenError(Exception):
+    """El cortocircuito está abierto y no se intenta la llamada al servicio externo."""
+
+
+async def retry_with_backoff(
+    operation: Callable[[], Awaitable[T]],
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    deadline: float,
+    retryable: Callable[[BaseException], bool],
+    on_retry: Callable[[], None] = lambda: None
+) -> T:
+    """Ejecuta una operación idempotente reintentando los fallos transitorios.
+    
+    Entre intentos se espera un tiempo aleatorio entre 0 y `base_delay * 2^n`
+    (jitter completo, acotado por `max_delay`), o lo que indique el servicio en
+    `Retry-After` si es mayor. No se reintenta si la espera superaría `deadline`, y
+    cada intento se cancela si se agota el tiempo que le queda hasta `deadline`.
+    
+    Args:
+        operation: Función que crea cada intento
+        attempts: Número máximo de intentos (incluido el primero)
+        base_delay: Espera base en segundos
+        max_delay: Espera máxima entre intentos en segundos
+        deadline: Tiempo total máximo en segundos desde el primer intento
+        retryable: Indica si una excepción merece reintento
+        on_retry: Función invocada antes de cada reintento
+    
+    Returns:
+        El resultado del primer intento que tiene éxito
+    
+    Raises:
+        asyncio.TimeoutError: Si un intento sigue en curso al cumplirse `deadline`
+        Exception: La excepción del último intento si ninguno tiene éxito
+    """
+    started = time.monotonic()
+    for attempt in range(max(1, attempts)):
+        try:
+            return await asyncio.wait_for(operation(), deadline - (time.monotonic() - started))
+        except Exception as e:
+            if attempt + 1 >= attempts or not retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after:
+                delay = max(delay, retry_after)
+            if time.monotonic() - started + delay >= deadline:
+                raise
+            on_retry()
+            await asyncio.sleep(delay)
+    raise AssertionError("inalcanzable")
+
+
+async def hedged(
+    operation: Callable[[], Awaitable[T]],
+    delay: Optional[float],
+    allow_hedge: Callable[[], bool] = lambda: True,
+    on_hedge: Callable[[], None] = lambda: None
+) -> Tuple[T, bool]:
+    """Ejecuta una operación idempotente y lanza un duplicado si tarda más de `delay`.
+    
+    Se devuelve el primer resultado correcto y se cancela el intento restante. Si
+    uno de los intentos falla, se espera al otro.
+    
+    Args:
+        operation: Función que crea cada intento
+        delay: Segundos antes de lanzar el duplicado, o None para no duplicar
+        allow_hedge: Indica, al cumplirse el plazo, si se puede lanzar el duplicado
+        on_hedge: Función invocada al lanzar el duplicado
+    
+    Returns:
+        Tupla (resultado, True si lo obtuvo el duplicado)
+    """
+    if delay is None:
+        return await operation(), False
+    
+    primary = asyncio.ensure_future(operation())
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and allow_hedge():
+            on_hedge()
+            tasks.append(asyncio.ensure_future(operation()))
+        
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task is not primary
+                error = error or task.exception()
+        raise error
+    finally:
+        # El intento que no terminó (o ambos, si se cancela la llamada) se cancela
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias recientes para calcular percentiles."""
+    
+    def __init__(self, window: int = 500):
+        """Inicializa la ventana.
+        
+        Args:
+            window: Número de latencias recientes que se conservan
+        """
+        self._samples: Deque[float] = deque(maxlen=window)
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def record(self, latency: float) -> None:
+        """Registra una latencia en segundos."""
+        self._samples.append(latency)
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Obtiene el percentil indicado (0-1) de las latencias recientes, o None si no hay."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Cortocircuito que deja de llamar a un servicio externo mientras falla.
+    
+    Tras `failure_threshold` fallos consecutivos se abre y rechaza las llamadas
+    durante `reset_timeout` segundos. Después deja pasar una llamada de prueba
+    (semiabierto): si tiene éxito se cierra, y si falla vuelve a abrirse.
+    """
+    
+    CLOSED = "cerrado"
+    OPEN = "abierto"
+    HALF_OPEN = "semiabierto"
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        """Inicializa el cortocircuito.
+        
+        Args:
+            failure_threshold: Fallos consecutivos que abren el cortocircuito
+            reset_timeout: Segundos que permanece abierto antes de probar de nuevo
+            clock: Reloj monótono
+        """
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        
+        # Contadores para monitoreo
+        self._opens = 0
+        self._short_circuited = 0
+    
+    @property
+    def state(self) -> str:
+        """Estado actual: cerrado, abierto o semiabierto."""
+        return self._state
+    
+    def allow(self) -> bool:
+        """Indica si se puede intentar una llamada ahora.
+        
+        Returns:
+            True si el cortocircuito está cerrado o la llamada es la de prueba
+        """
+        if self._state == self.CLOSED:
+            return True
+        now = self._clock()
+        if self._state == self.OPEN and now - self._opened_at >= self._reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_started = None
+        if self._state == self.HALF_OPEN:
+            # Una sola llamada de prueba a la vez; si no termina, se permite otra pasado el plazo
+            if self._probe_started is None or now - self._probe_started >= self._reset_timeout:
+                self._probe_started = now
+                return True
+        self._short_circuited += 1
+        return False
+    
+    def record_success(self) -> None:
+        """Registra una llamada correcta y cierra el cortocircuito."""
+        self._failures = 0
+        self._state = self.CLOSED
+        self._probe_started = None
+    
+    def release_probe(self) -> None:
+        """Libera la llamada de prueba que terminó sin informar de la salud del servicio.
+        
+        Se usa cuando la llamada no llegó al servicio (por ejemplo, la rechazó el límite
+        local de concurrencia) para que la siguiente pueda hacer la prueba en su lugar.
+        """
+        if self._state == self.HALF_OPEN:
+            self._probe_started = None
+    
+    def record_failure(self) -> None:
+        """Registra una llamada fallida y abre el cortocircuito si corresponde."""
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != self.OPEN:
+                self._opens += 1
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._probe_started = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado del cortocircuito para monitoreo."""
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "opens": self._opens,
+            "short_circuited": self._short_circuited,
+        }
+
+
+def is_retryable(exception: BaseException, transient: Tuple[Type[BaseException], ...]) -> bool:
+    """Indica si una excepción es un fallo transitorio que merece reintento.
+    
+    Args:
+        exception: Excepción producida por el intento
+        transient: Tipos de excepción de red considerados transitorios
+    
+    Returns:
+        True para errores 429/5xx del servicio y errores de red transitorios
+    """
+    if isinstance(exception, UpstreamError):
+        return exception.retryable
+    return isinstance(exception, transient)
@@ -0,0 +1,200 @@
+"""Extracción del análisis `Tipo/Palabra/Por qué` a partir del texto generado por el modelo."""
+
+import re
+import json
+from typing import Dict, Optional, Tuple
+
+from src.domain.models import ThreatAnalysis, ThreatType
+
+# Línea de campo: admite viñetas, numeración, encabezados y negritas de markdown alrededor
+# de la etiqueta, variantes como "Tipo de amenaza" o "Palabra clave", y tildes opcionales.
+# Grupos: etiqueta y resto de la línea tras los dos puntos
+_FIELD_PATTERN = re.compile(
+    r"^[ \t>#*_\-•\d.)]*"
+    r"(tipo(?:[ \t]+de[ \t]+amenaza)?|palabra(?:[ \t]+clave)?|por[ \t]*qu[eé]|justificaci[oó]n|raz[oó]n)"
+    r"[ \t]*[*_]*[ \t]*:([^\n]*)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Campo del análisis según las dos primeras letras de la etiqueta
+_LABEL_FIELDS = {
+    "ti": "threat_type",
+    "pa": "keyword",
+    "po": "justification",
+    "ju": "justification",
+    "ra": "justification",
+}
+
+# Caracteres que se descartan alrededor del valor (espacios y cierre de negritas)
+_VALUE_STRIP = " \t\r*_"
+
+# Términos de cada tipo de amenaza; cuenta el que aparece primero en el valor
+_THREAT_TYPE_PATTERN = re.compile(
+    r"(?P<extorsion>extors)"
+    r"|(?P<robo>\brob[oa]|hurto|asalt)"
+    r"|(?P<secuestro>secuestr)",
+    re.IGNORECASE
+)
+
+# Valor que empieza declarando que no hay amenaza ("ninguna", "none", "sin amenaza"); un "no"
+# suelto no basta, porque suele negar otra cosa ("no explícita, pero es extorsión")
+_NO_THREAT_PATTERN = re.compile(r"[\s*_\"'«“(\[]*(?:ningun|none\b|sin[ \t]+amenaza)", re.IGNORECASE)
+
+# Negación dentro de la misma frase que un término de amenaza en texto libre
+# ("no se detecta extorsión ni robo", "no contiene amenazas de secuestro")
+_NEGATION_PATTERN = re.compile(r"\b(?:no|ni|sin|ningun[oa]?|nada|tampoco|nunca|descart\w*)\b", re.IGNORECASE)
+
+# Separador de frases del texto libre
+_CLAUSE_BOUNDARY = re.compile(r"[.;:,!?\n]")
+
+# "palabra vacuna" o "palabra clave: vacuna" en respuestas sin formato
+_LOOSE_KEYWORD_PATTERN = re.compile(r"palabra(?:[ \t]+clave)?[ \t]*:?[ \t]*[\"'«“]?([^\s\"'»”.,;]+)", re.IGNORECASE)
+
+# Bloque de código markdown que envuelve una respuesta JSON
+_CODE_FENCE_PATTERN = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+_THREAT_TYPES = {
+    "extorsion": ThreatType.EXTORSION,
+    "robo": ThreatType.ROBO,
+    "secuestro": ThreatType.SECUESTRO,
+}
+
+_FIELDS = ("threat_type", "keyword", "justification")
+
+DEFAULT_KEYWORD = "ninguna"
+DEFAULT_JUSTIFICATION = "No se proporcionó justificación."
+
+
+def parse_line(line: str) -> Optional[Tuple[str, str]]:
+    """Identifica una línea de campo de la respuesta.
+    
+    Args:
+        line: Línea completa de la respuesta
+    
+    Returns:
+        Tupla (campo, valor) con campo `threat_type`, `keyword` o `justification`,
+        o None si la línea no corresponde a ningún campo
+    """
+    match = _FIELD_PATTERN.match(line)
+    if match is None:
+        return None
+    return _LABEL_FIELDS[match.group(1)[:2].lower()], match.group(2).strip(_VALUE_STRIP)
+
+
+def _parse_json(raw_result: str) -> Optional[Dict[str, str]]:
+    """Extrae los campos de una respuesta en JSON, o None si no lo es."""
+    try:
+        data = json.loads(_CODE_FENCE_PATTERN.sub("", raw_result.strip()))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    fields: Dict[str, str] = {}
+    for key, value in data.items():
+        match = _FIELD_PATTERN.match(f"{key.replace('_', ' ')}:")
+        field = _LABEL_FIELDS[match.group(1)[:2].lower()] if match is not None else key
+        if field in _FIELDS:
+            fields.setdefault(field, str(value).strip())
+    return fields
+
+
+def parse_fields(raw_result: str) -> Dict[str, str]:
+    """Extrae los campos de la respuesta en una sola pasada.
+    
+    Se reconoce el formato de líneas `Tipo/Palabra/Por qué` (también con
+    markdown o texto adicional alrededor) y el JSON con las mismas claves. Si un
+    campo aparece varias veces, cuenta la primera.
+    
+    Args:
+        raw_result: Texto devuelto por el modelo
+    
+    Returns:
+        Los campos encontrados, por nombre (`threat_type`, `keyword`, `justification`)
+    """
+    if raw_result.lstrip()[:1] in ("{", "`"):
+        fields = _parse_json(raw_result)
+        if fields is not None:
+            return fields
+    
+    fields: Dict[str, str] = {}
+    for label, value in _FIELD_PATTERN.findall(raw_result):
+        field = _LABEL_FIELDS[label[:2].lower()]
+        if field not in fields:
+            fields[field] = value.strip(_VALUE_STRIP)
+    return fields
+
+
+def map_threat_type(value: str) -> ThreatType:
+    """Convierte el tipo de amenaza indicado por el modelo en un ThreatType.
+    
+    Args:
+        value: Valor del campo `Tipo` (o texto libre)
+    
+    Returns:
+        NINGUNA si el valor empieza declarando que no hay amenaza; si no, el tipo cuyo
+        término aparece primero, o NINGUNA si no aparece ninguno
+    """
+    if _NO_THREAT_PATTERN.match(value):
+        return ThreatType.NINGUNA
+    match = _THREAT_TYPE_PATTERN.search(value)
+    if match is None:
+        return ThreatType.NINGUNA
+    return _THREAT_TYPES[match.lastgroup]
+
+
+def _free_text_threat_type(text: str) -> ThreatType:
+    """Obtiene el tipo de amenaza de una respuesta sin campo `Tipo`.
+    
+    Solo cuenta un término de amenaza afirmado: si su frase lo niega antes ("no se
+    detecta extorsión ni robo") se descarta, y sin ningún término afirmado el
+    resultado es NINGUNA.
+    
+    Args:
+        text: Texto libre de la respuesta
+    
+    Returns:
+        El tipo del primer término afirmado, o NINGUNA si no hay ninguno
+    """
+    if _NO_THREAT_PATTERN.match(text):
+        return ThreatType.NINGUNA
+    for match in _THREAT_TYPE_PATTERN.finditer(text):
+        clause_start = 0
+        for boundary in _CLAUSE_BOUNDARY.finditer(text, 0, match.start()):
+            clause_start = boundary.end()
+        if not _NEGATION_PATTERN.search(text, clause_start, match.start()):
+            return _THREAT_TYPES[match.lastgroup]
+    return ThreatType.NINGUNA
+
+
+def parse_analysis(raw_result: str, strict: bool = False) -> Optional[ThreatAnalysis]:
+    """Extrae el análisis de la respuesta del modelo.
+    
+    Sin línea `Tipo`, en modo tolerante el tipo y la palabra clave se buscan en el
+    texto libre de la respuesta y el tipo es NINGUNA salvo que se afirme una amenaza.
+    
+    Args:
+        raw_result: Texto devuelto por el modelo
+        strict: Si es True, devuelve None cuando la respuesta no contiene el campo `Tipo`
+    
+    Returns:
+        El análisis extraído, o None si la respuesta no es válida en modo estricto
+    """
+    fields = parse_fields(raw_result)
+    threat_type_value = fields.get("threat_type")
+    if threat_type_value is not None:
+        threat_type = map_threat_type(threat_type_value)
+    elif strict:
+        return None
+    else:
+        threat_type = _free_text_threat_type(raw_result)
+        if "keyword" not in fields:
+            loose_keyword = _LOOSE_KEYWORD_PATTERN.search(raw_result)
+            if loose_keyword is not None:
+                fields["keyword"] = loose_keyword.group(1)
+    
+    return ThreatAnalysis(
+        keyword=fields.get("keyword") or DEFAULT_KEYWORD,
+        threat_type=threat_type,
+        is_threat="SI" if threat_type != ThreatType.NINGUNA else "NO",
+        justification=fields.get("justification") or DEFAULT_JUSTIFICATION
+    )
@@ -0,0 +1,238 @@
+"""Motor de reglas compilado para la detección local de amenazas."""
+
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.domain.models import ThreatAnalysis, ThreatType
+
+# Número máximo de tokens distintos cuyo resultado se recuerda entre llamadas
+_MAX_CACHED_TOKENS = 50000
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Construye una expresión regular con forma de trie que reconoce las palabras.
+    
+    Args:
+        terms: Palabras a reconocer
+    
+    Returns:
+        Expresión regular que en cada posición captura la palabra más larga
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # Opcional y voraz: se prefiere la palabra más larga
+        return group + "?" if "" in node else group
+    
+    return build(trie)
+
+
+class RuleMatcher:
+    """Evaluador de reglas de palabras clave y contexto compilado una sola vez.
+    
+    Todas las palabras de las reglas se buscan en una única pasada sobre el texto;
+    después las reglas se evalúan en su orden de prioridad consultando el conjunto
+    de palabras encontradas, sin volver a recorrer el texto. Los análisis que puede
+    devolver cada regla se construyen al compilar y se comparten entre llamadas.
+    
+    Las reglas se describen con un diccionario con tres secciones, evaluadas en orden:
+    
+    - ``patterns``: por tipo de amenaza, lista de ``{"keyword", "context"}``; la palabra
+      clave debe aparecer junto con alguna palabra de contexto (si hay contexto).
+    - ``combinations``: reglas que exigen al menos una palabra de cada grupo.
+    - ``keywords``: por tipo de amenaza, palabras clave simples.
+    
+    ``descriptions`` indica, por tipo de amenaza, cómo se nombra en la justificación, y
+    ``version`` (opcional) identifica las reglas en los análisis que producen.
+    """
+    
+    def __init__(self, rules: Dict[str, Any]):
+        """Compila las reglas.
+        
+        Args:
+            rules: Definición de las reglas
+        """
+        descriptions = rules["descriptions"]
+        version = self._version = rules.get("version")
+        vocabulary = set()
+        
+        # Patrones: (palabra clave, análisis sin contexto, [(contexto, análisis)])
+        self._patterns: List[Tuple[str, Optional[ThreatAnalysis], Tuple[Tuple[str, ThreatAnalysis], ...]]] = []
+        for threat_type, patterns in rules["patterns"].items():
+            for pattern in patterns:
+                keyword, context = pattern["keyword"], pattern["context"]
+                vocabulary.add(keyword)
+                vocabulary.update(context)
+                if not context:
+                    self._patterns.append((keyword, _pattern_analysis(threat_type, descriptions, keyword, "", version), ()))
+                else:
+                    self._patterns.append((keyword, None, tuple(
+                        (ctx, _pattern_analysis(threat_type, descriptions, keyword, ctx, version)) for ctx in context
+                    )))
+        
+        # Combinaciones: (grupos de palabras, análisis)
+        self._combinations: List[Tuple[Tuple[FrozenSet[str], ...], ThreatAnalysis]] = []
+        for combination in rules["combinations"]:
+            groups = tuple(frozenset(group) for group in combination["groups"])
+            for group in groups:
+                vocabulary.update(group)
+            self._combinations.append((groups, ThreatAnalysis(
+                keyword=combination["keyword"],
+                threat_type=ThreatType(combination["threat_type"]),
+                is_threat="SI",
+                justification=combination["justification"],
+                rule_set_version=version
+            )))
+        
+        # Palabras clave simples: (palabra clave, análisis)
+        self._keywords: List[Tuple[str, ThreatAnalysis]] = []
+        for threat_type, keywords in rules["keywords"].items():
+            for keyword in keywords:
+                vocabulary.add(keyword)
+                self._keywords.append((keyword, ThreatAnalysis(
+                    keyword=keyword,
+                    threat_type=ThreatType(threat_type),
+                    is_threat="SI",
+                    justification=f"Se detectó {descriptions[threat_type]} por el uso de la palabra '{keyword}'.",
+                    rule_set_version=version
+                )))
+        
+        self._no_threat = ThreatAnalysis(
+            keyword="ninguna",
+            threat_type=ThreatType.NINGUNA,
+            is_threat="NO",
+            justification="No se detectaron palabras o frases relacionadas con amenazas.",
+            rule_set_version=version
+        )
+        
+        vocabulary.discard("")
+        self._vocabulary: FrozenSet[str] = frozenset(vocabulary)
+        
+        # El patrón se construye como un trie: en cada coincidencia captura la palabra
+        # más larga que empieza ahí, y sus prefijos también están presentes
+        self._scanner = re.compile(_trie_pattern(vocabulary)) if vocabulary else None
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            term: frozenset(other for other in vocabulary if term.startswith(other))
+            for term in vocabulary
+        }
+        
+        # Si ninguna palabra contiene espacios, cada una aparece dentro de un único token
+        # del texto: basta con analizar cada token distinto una vez y recordar el resultado
+        self._tokenize = not any(char.isspace() for term in vocabulary for char in term)
+        self._token_terms: Dict[str, FrozenSet[str]] = {}
+    
+    @property
+    def version(self) -> Optional[str]:
+        """Versión de las reglas compiladas, si la indican."""
+        return self._version
+    
+    @property
+    def vocabulary(self) -> FrozenSet[str]:
+        """Conjunto de todas las palabras que intervienen en las reglas."""
+        return self._vocabulary
+    
+    def _scan_fragment(self, fragment: str) -> FrozenSet[str]:
+        """Busca con el patrón compilado las palabras presentes en un fragmento en minúsculas."""
+        search = self._scanner.search
+        found = set()
+        match = search(fragment)
+        while match is not None:
+            found.update(self._prefixes[match.group()])
+            # Continuar en la posición siguiente para no perder palabras solapadas
+            match = search(fragment, match.start() + 1)
+        return frozenset(found)
+    
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Busca en una sola pasada todas las palabras de las reglas presentes en el texto.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            Conjunto de palabras de las reglas que aparecen en el texto
+        """
+        if self._scanner is None:
+            return frozenset()
+        text_lower = text.lower()
+        if not self._tokenize:
+            return self._scan_fragment(text_lower)
+        
+        token_terms = self._token_terms
+        if len(token_terms) > _MAX_CACHED_TOKENS:
+            token_terms.clear()
+        found = set()
+        for token in set(text_lower.split()):
+            terms = token_terms.get(token)
+            if terms is None:
+                terms = token_terms[token] = self._scan_fragment(token)
+            if terms:
+                found.update(terms)
+        return frozenset(found)
+    
+    def evaluate(self, found: FrozenSet[str]) -> ThreatAnalysis:
+        """Aplica las reglas en orden de prioridad sobre las palabras encontradas.
+        
+        Args:
+            found: Palabras de las reglas presentes en el texto
+        
+        Returns:
+            El análisis correspondiente a la primera regla que se cumple
+        """
+        if not found:
+            return self._no_threat
+        
+        for keyword, without_context, with_context in self._patterns:
+            if keyword in found:
+                if without_context is not None:
+                    return without_context
+                for context, analysis in with_context:
+                    if context in found:
+                        return analysis
+        
+        for groups, analysis in self._combinations:
+            if all(not group.isdisjoint(found) for group in groups):
+                return analysis
+        
+        for keyword, analysis in self._keywords:
+            if keyword in found:
+                return analysis
+        
+        return self._no_threat
+    
+    def match(self, text: str) -> ThreatAnalysis:
+        """Analiza un texto con las reglas compiladas.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            El análisis de la amenaza
+        """
+        return self.evaluate(self.scan(text))
+
+
+def _pattern_analysis(
+    threat_type: str, descriptions: Dict[str, str], keyword: str, context: str, version: Optional[str]
+) -> ThreatAnalysis:
+    """Construye el análisis de un patrón de palabra clave con contexto."""
+    justification = f"Se detectó {descriptions[threat_type]} por el uso de '{keyword}'"
+    if context:
+        justification += f" en contexto con '{context}'"
+    return ThreatAnalysis(
+        keyword=keyword,
+        threat_type=ThreatType(threat_type),
+        is_threat="SI",
+        justification=justification,
+        rule_set_version=version
+    )
@@ -0,0 +1,217 @@
+"""Reglas del detector local leídas de un archivo y recargables sin reiniciar el servicio."""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from src.infrastructure.metrics import RULE_SET_RELOADS
+from src.infrastructure.rule_matcher import RuleMatcher
+
+logger = logging.getLogger("rule_set")
+
+# Archivo de reglas incluido con el servicio
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "rules", "threat_rules.json")
+
+# Secciones obligatorias de un archivo de reglas
+_SECTIONS = ("version", "descriptions", "patterns", "combinations", "keywords")
+
+
+def load_rules(path: str) -> Dict[str, Any]:
+    """Lee un archivo de reglas en JSON y comprueba sus secciones.
+    
+    Args:
+        path: Ruta del archivo
+    
+    Returns:
+        La definición de las reglas, con su versión en `version`
+    
+    Raises:
+        OSError: Si no se puede leer el archivo
+        ValueError: Si el archivo no es JSON válido o le falta alguna sección
+    """
+    with open(path, encoding="utf-8") as file:
+        try:
+            rules = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: JSON no válido ({e})") from e
+    if not isinstance(rules, dict):
+        raise ValueError(f"{path}: las reglas deben ser un objeto JSON")
+    missing = [section for section in _SECTIONS if section not in rules]
+    if missing:
+        raise ValueError(f"{path}: faltan las secciones {', '.join(missing)}")
+    if not isinstance(rules["version"], str) or not rules["version"]:
+        raise ValueError(f"{path}: la versión debe ser una cadena no vacía")
+    return rules
+
+
+def compile_rules(path: str) -> RuleMatcher:
+    """Lee y compila un archivo de reglas.
+    
+    Args:
+        path: Ruta del archivo
+    
+    Returns:
+        El motor de reglas compilado
+    
+    Raises:
+        OSError: Si no se puede leer el archivo
+        ValueError: Si las reglas no son válidas
+    """
+    rules = load_rules(path)
+    try:
+        return RuleMatcher(rules)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"{path}: reglas no válidas ({type(e).__name__}: {e})") from e
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Obtiene la fecha de modificación y el tamaño de un archivo, o None si no existe."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class RuleSet:
+    """Motor de reglas vigente del detector local, sustituible en caliente.
+    
+    El motor compilado es inmutable y cada análisis toma la referencia vigente una
+    sola vez. Una recarga compila el motor nuevo fuera del bucle de eventos y después
+    cambia la referencia, así que las peticiones en curso terminan con las reglas con
+    que empezaron y las siguientes usan las nuevas, sin bloqueos ni reinicios. Si el
+    archivo nuevo no es válido se conservan las reglas vigentes.
+    
+    Con `reload_interval_seconds` mayor que 0 se vigila el archivo y se recarga
+    cuando cambia su fecha de modificación o su tamaño.
+    """
+    
+    def __init__(self, matcher: RuleMatcher, path: Optional[str] = None, reload_interval_seconds: float = 0.0):
+        """Inicializa el conjunto de reglas.
+        
+        Args:
+            matcher: Motor de reglas inicial
+            path: Archivo del que se recargan las reglas (opcional)
+            reload_interval_seconds: Intervalo entre comprobaciones del archivo (0 para no vigilarlo)
+        """
+        self._matcher = matcher
+        self._path = path
+        self._reload_interval = reload_interval_seconds
+        self._signature = _file_signature(path) if path else None
+        self._loaded_at = time.time()
+        self._reload_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        
+        # Contadores para monitoreo
+        self._reloads = 0
+        self._failures = 0
+    
+    @classmethod
+    def from_file(cls, path: str, reload_interval_seconds: float = 0.0) -> "RuleSet":
+        """Crea el conjunto de reglas a partir de un archivo.
+        
+        Args:
+            path: Ruta del archivo de reglas
+            reload_interval_seconds: Intervalo entre comprobaciones del archivo (0 para no vigilarlo)
+        
+        Returns:
+            El conjunto de reglas
+        
+        Raises:
+            OSError: Si no se puede leer el archivo
+            ValueError: Si las reglas no son válidas
+        """
+        return cls(compile_rules(path), path, reload_interval_seconds)
+    
+    @property
+    def matcher(self) -> RuleMatcher:
+        """Motor de reglas vigente."""
+        return self._matcher
+    
+    @property
+    def version(self) -> Optional[str]:
+        """Versión de las reglas vigentes."""
+        return self._matcher.version
+    
+    async def reload(self) -> RuleMatcher:
+        """Vuelve a leer el archivo y sustituye el motor de reglas.
+        
+        Returns:
+            El motor de reglas nuevo
+        
+        Raises:
+            RuntimeError: Si las reglas no se leyeron de un archivo
+            OSError: Si no se puede leer el archivo
+            ValueError: Si las reglas no son válidas; se conservan las vigentes
+        """
+        if self._path is None:
+            raise RuntimeError("Las reglas no se leyeron de un archivo")
+        async with self._reload_lock:
+            # La firma se toma antes de leer: un cambio durante la lectura se detectará después
+            self._signature = _file_signature(self._path)
+            loop = asyncio.get_running_loop()
+            try:
+                matcher = await loop.run_in_executor(None, compile_rules, self._path)
+            except (OSError, ValueError):
+                self._failures += 1
+                RULE_SET_RELOADS.inc("error")
+                raise
+            previous, self._matcher = self._matcher, matcher
+            self._loaded_at = time.time()
+            self._reloads += 1
+        RULE_SET_RELOADS.inc("ok")
+        logger.info("Reglas recargadas desde %s: versión %s (antes %s)", self._path, matcher.version, previous.version)
+        return matcher
+    
+    async def reload_if_changed(self) -> bool:
+        """Recarga las reglas si el archivo cambió desde la última lectura.
+        
+        Returns:
+            True si se recargaron las reglas
+        
+        Raises:
+            OSError: Si no se puede leer el archivo
+            ValueError: Si las reglas nuevas no son válidas
+        """
+        if self._path is None or _file_signature(self._path) == self._signature:
+            return False
+        await self.reload()
+        return True
+    
+    async def _watch_loop(self) -> None:
+        """Comprueba periódicamente si el archivo de reglas cambió."""
+        while True:
+            await asyncio.sleep(self._reload_interval)
+            try:
+                await self.reload_if_changed()
+            except (OSError, ValueError) as e:
+                logger.error("No se pudieron recargar las reglas; se mantiene la versión %s: %s", self.version, e)
+    
+    async def startup(self) -> None:
+        """Inicia la vigilancia del archivo de reglas."""
+        if self._watch_task is None and self._path is not None and self._reload_interval > 0:
+            self._watch_task = asyncio.create_task(self._watch_loop())
+    
+    async def shutdown(self) -> None:
+        """Detiene la vigilancia del archivo de reglas."""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado de las reglas vigentes."""
+        return {
+            "version": self.version,
+            "path": self._path,
+            "loaded_at": self._loaded_at,
+            "terms": len(self._matcher.vocabulary),
+            "reloads": self._reloads,
+            "failed_reloads": self._failures,
+        }
@@ -0,0 +1,74 @@
+"""Deduplicación de operaciones asíncronas concurrentes con la misma clave."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una única ejecución.
+    
+    El primer llamador lanza la operación como tarea independiente; el resto de
+    llamadores con la misma clave esperan esa misma tarea en lugar de repetirla.
+    La cancelación de un llamador no cancela la operación compartida.
+    """
+    
+    def __init__(self):
+        """Inicializa el registro de operaciones en curso."""
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._executions = 0
+        self._coalesced = 0
+    
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        """Elimina la operación del registro al terminar."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Consumir la excepción para evitar avisos si ningún llamador la esperó
+        if not future.cancelled():
+            future.exception()
+    
+    def __contains__(self, key: str) -> bool:
+        """Indica si hay una operación en curso para la clave."""
+        return key in self._inflight
+    
+    def join(self, key: str, operation: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+        """Obtiene la operación en curso para la clave o lanza una nueva.
+        
+        Args:
+            key: Clave que identifica la operación
+            operation: Función que crea la operación si no hay ninguna en curso
+        
+        Returns:
+            Futuro compartido con el resultado de la operación
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self._coalesced += 1
+            return future
+        
+        future = asyncio.ensure_future(operation())
+        self._inflight[key] = future
+        self._executions += 1
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+    
+    async def do(self, key: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta la operación una sola vez para todos los llamadores concurrentes.
+        
+        Args:
+            key: Clave que identifica la operación
+            operation: Función que crea la operación si no hay ninguna en curso
+        
+        Returns:
+            El resultado de la operación compartida
+        """
+        return await asyncio.shield(self.join(key, operation))
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Obtiene estadísticas de deduplicación."""
+        return {
+            "inflight": len(self._inflight),
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+        }
@@ -0,0 +1,192 @@
+"""Caché persistente en SQLite compartida entre procesos del mismo host."""
+
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.domain.models import ThreatAnalysis
+from src.domain.ports import CachePort, cache_hit_rate
+
+logger = logging.getLogger("sqlite_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_expires_at ON analyses (expires_at);
+"""
+
+
+class SQLiteCache(CachePort):
+    """Caché de análisis persistida en un archivo SQLite en modo WAL.
+    
+    El modo WAL permite que varios procesos (por ejemplo, los workers de uvicorn)
+    lean y escriban el mismo archivo a la vez, de modo que los resultados
+    sobreviven a reinicios y se comparten entre workers. Las operaciones de disco
+    se ejecutan en un hilo dedicado para no bloquear el bucle de eventos.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float,
+        max_entries: int,
+        compaction_interval_seconds: float = 300.0,
+        clock: Callable[[], float] = time.time
+    ):
+        """Inicializa la caché.
+        
+        Args:
+            path: Ruta del archivo SQLite
+            ttl_seconds: Tiempo de vida de cada entrada en segundos
+            max_entries: Número máximo de entradas conservadas tras cada compactación
+            compaction_interval_seconds: Intervalo entre compactaciones (0 para desactivar)
+            clock: Reloj de pared compartido entre procesos para calcular expiraciones
+        """
+        self._path = path
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._compaction_interval = compaction_interval_seconds
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite_cache")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+        
+        # Contadores del proceso actual para monitoreo
+        self._hits = 0
+        self._misses = 0
+        self._compacted = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Abre la conexión (en el hilo de la caché) y prepara el esquema."""
+        if self._connection is None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+    
+    async def _run(self, operation: Callable[..., Any], *args: Any) -> Any:
+        """Ejecuta una operación de base de datos en el hilo de la caché."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, operation, *args)
+    
+    def _get(self, key: str) -> Optional[str]:
+        """Lee el análisis serializado si no ha expirado."""
+        row = self._connect().execute(
+            "SELECT value FROM analyses WHERE key = ? AND expires_at > ?", (key, self._clock())
+        ).fetchone()
+        return row[0] if row else None
+    
+    def _set(self, key: str, value: str) -> None:
+        """Guarda el análisis serializado con su expiración."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO analyses (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self._clock() + self._ttl)
+        )
+    
+    def _delete(self, key: str) -> None:
+        """Elimina la entrada de la clave."""
+        self._connect().execute("DELETE FROM analyses WHERE key = ?", (key,))
+    
+    def _clear(self) -> None:
+        """Elimina todas las entradas."""
+        self._connect().execute("DELETE FROM analyses")
+    
+    def _compact(self) -> int:
+        """Elimina las entradas expiradas y el exceso sobre el límite."""
+        connection = self._connect()
+        removed = connection.execute("DELETE FROM analyses WHERE expires_at <= ?", (self._clock(),)).rowcount
+        # Recortar las entradas más próximas a expirar si se supera el límite
+        excess = connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] - self._max_entries
+        if excess > 0:
+            removed += connection.execute(
+                "DELETE FROM analyses WHERE key IN (SELECT key FROM analyses ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+    
+    async def get(self, key: str) -> Optional[ThreatAnalysis]:
+        """Obtiene un análisis de la caché si existe y no ha expirado."""
+        value = await self._run(self._get, key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return ThreatAnalysis.model_validate_json(value)
+    
+    async def set(self, key: str, value: ThreatAnalysis) -> None:
+        """Almacena un análisis en la caché."""
+        await self._run(self._set, key, value.model_dump_json())
+    
+    async def delete(self, key: str) -> None:
+        """Elimina un análisis de la caché."""
+        await self._run(self._delete, key)
+    
+    async def clear(self) -> None:
+        """Elimina todos los análisis de la caché."""
+        await self._run(self._clear)
+    
+    async def compact(self) -> int:
+        """Elimina las entradas expiradas y las que exceden el límite, y trunca el WAL.
+        
+        Returns:
+            Número de entradas eliminadas
+        """
+        removed = await self._run(self._compact)
+        self._compacted += removed
+        return removed
+    
+    async def _compaction_loop(self) -> None:
+        """Compacta periódicamente la caché."""
+        while True:
+            await asyncio.sleep(self._compaction_interval)
+            try:
+                removed = await self.compact()
+                if removed:
+                    logger.debug("Compactación de caché: %d entradas eliminadas", removed)
+            except sqlite3.Error as e:
+                # Otro worker puede tener la base bloqueada; se reintenta en el siguiente ciclo
+                logger.warning("No se pudo compactar la caché: %s", e)
+    
+    async def startup(self) -> None:
+        """Abre la base de datos e inicia la compactación periódica."""
+        await self._run(self._connect)
+        if self._compaction_task is None and self._compaction_interval > 0:
+            self._compaction_task = asyncio.create_task(self._compaction_loop())
+    
+    async def shutdown(self) -> None:
+        """Detiene la compactación periódica y cierra la base de datos."""
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except asyncio.CancelledError:
+                pass
+            self._compaction_task = None
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas de uso de la caché del proceso actual."""
+        return {
+            "backend": "sqlite",
+            "path": self._path,
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "compacted": self._compacted,
+            "hit_rate": cache_hit_rate(self._hits, self._misses),
+        }
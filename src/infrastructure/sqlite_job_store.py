@@ -0,0 +1,277 @@
+"""Almacén persistente en SQLite de los trabajos de análisis en segundo plano."""
+
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.domain.models import BatchItemResult, JobInfo, JobStatus, ThreatAnalysis
+from src.domain.ports import JobStorePort
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+"""
+
+_JOB_COLUMNS = "id, status, total, processed, failed, created_at, updated_at"
+
+# Estados de los trabajos que aún tienen textos por analizar
+_UNFINISHED = (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+
+
+def _job_from_row(row: Tuple[Any, ...]) -> JobInfo:
+    """Construye el estado de un trabajo a partir de una fila de `jobs`."""
+    job_id, status, total, processed, failed, created_at, updated_at = row
+    return JobInfo(
+        id=job_id,
+        status=JobStatus(status),
+        total=total,
+        processed=processed,
+        failed=failed,
+        created_at=created_at,
+        updated_at=updated_at
+    )
+
+
+class SQLiteJobStore(JobStorePort):
+    """Trabajos de análisis persistidos en un archivo SQLite en modo WAL.
+    
+    Los textos y los resultados se guardan por posición, de modo que un trabajo
+    interrumpido por un reinicio continúa desde el primer texto sin resultado.
+    Como en `SQLiteCache`, las operaciones de disco se ejecutan en un hilo
+    dedicado para no bloquear el bucle de eventos. El archivo se crea con el
+    primer trabajo: mientras no existe, las consultas responden como un almacén vacío.
+    """
+    
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        """Inicializa el almacén.
+        
+        Args:
+            path: Ruta del archivo SQLite
+            clock: Reloj de pared compartido entre procesos para las concesiones
+        """
+        self._path = path
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite_jobs")
+        self._connection: Optional[sqlite3.Connection] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Abre la conexión (en el hilo del almacén) y prepara el esquema."""
+        if self._connection is None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+    
+    def _exists(self) -> bool:
+        """Indica si la base de datos está abierta o existe su archivo."""
+        return self._connection is not None or os.path.exists(self._path)
+    
+    def _open_existing(self) -> None:
+        """Abre la base de datos si su archivo ya existe."""
+        if self._exists():
+            self._connect()
+    
+    async def _run(self, operation: Callable[..., Any], *args: Any) -> Any:
+        """Ejecuta una operación de base de datos en el hilo del almacén."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, operation, *args)
+    
+    def _create(self, texts: List[str], owner: str, lease_seconds: float) -> JobInfo:
+        """Inserta el trabajo y sus textos en una sola transacción."""
+        connection = self._connect()
+        job_id = uuid.uuid4().hex
+        now = self._clock()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO jobs (id, status, total, created_at, updated_at, lease_owner, lease_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JobStatus.PENDING.value, len(texts), now, now, owner, now + lease_seconds)
+            )
+            connection.executemany(
+                "INSERT INTO job_items (job_id, position, text) VALUES (?, ?, ?)",
+                ((job_id, position, text) for position, text in enumerate(texts))
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return JobInfo(id=job_id, status=JobStatus.PENDING, total=len(texts), created_at=now, updated_at=now)
+    
+    def _get(self, job_id: str) -> Optional[JobInfo]:
+        """Lee el estado de un trabajo."""
+        if not self._exists():
+            return None
+        row = self._connect().execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+    
+    def _claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Reserva el trabajo si es del procesador o su concesión expiró."""
+        now = self._clock()
+        return self._connect().execute(
+            "UPDATE jobs SET status = ?, lease_owner = ?, lease_until = ?, updated_at = ? "
+            "WHERE id = ? AND status IN (?, ?) AND (lease_owner = ? OR lease_until < ?)",
+            (JobStatus.RUNNING.value, owner, now + lease_seconds, now, job_id, *_UNFINISHED, owner, now)
+        ).rowcount == 1
+    
+    def _claimable(self) -> List[str]:
+        """Lista los trabajos sin terminar con la concesión expirada."""
+        if not self._exists():
+            return []
+        rows = self._connect().execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) AND lease_until < ? ORDER BY created_at",
+            (*_UNFINISHED, self._clock())
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def _pending_items(self, job_id: str, limit: int) -> List[Tuple[int, str]]:
+        """Lee los siguientes textos sin resultado."""
+        return self._connect().execute(
+            "SELECT position, text FROM job_items WHERE job_id = ? AND done = 0 ORDER BY position LIMIT ?",
+            (job_id, limit)
+        ).fetchall()
+    
+    def _save_results(self, job_id: str, owner: str, rows: List[Tuple[Any, ...]], lease_seconds: float) -> None:
+        """Guarda los resultados y actualiza el progreso en una sola transacción."""
+        connection = self._connect()
+        now = self._clock()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            saved = failed = 0
+            for result, error, position in rows:
+                changed = connection.execute(
+                    "UPDATE job_items SET done = 1, result = ?, error = ? "
+                    "WHERE job_id = ? AND position = ? AND done = 0",
+                    (result, error, job_id, position)
+                ).rowcount
+                saved += changed
+                failed += changed if error is not None else 0
+            connection.execute(
+                "UPDATE jobs SET processed = processed + ?, failed = failed + ?, updated_at = ?, "
+                "lease_until = CASE WHEN lease_owner = ? THEN ? ELSE lease_until END WHERE id = ?",
+                (saved, failed, now, owner, now + lease_seconds, job_id)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+    
+    def _renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Amplía la concesión si el trabajo sigue siendo del procesador."""
+        return self._connect().execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND lease_owner = ? AND status IN (?, ?)",
+            (self._clock() + lease_seconds, job_id, owner, *_UNFINISHED)
+        ).rowcount == 1
+    
+    def _release(self, job_id: str, owner: str) -> None:
+        """Libera la concesión del procesador."""
+        self._connect().execute(
+            "UPDATE jobs SET lease_until = 0 WHERE id = ? AND lease_owner = ?", (job_id, owner)
+        )
+    
+    def _finish(self, job_id: str, status: JobStatus) -> None:
+        """Marca el trabajo como terminado y libera la concesión."""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, lease_owner = NULL, lease_until = 0 WHERE id = ?",
+            (status.value, self._clock(), job_id)
+        )
+    
+    def _results(self, job_id: str, start: int, limit: int) -> List[Tuple[Any, ...]]:
+        """Lee resultados guardados desde una posición."""
+        if not self._exists():
+            return []
+        return self._connect().execute(
+            "SELECT position, result, error FROM job_items "
+            "WHERE job_id = ? AND position >= ? AND done = 1 ORDER BY position LIMIT ?",
+            (job_id, start, limit)
+        ).fetchall()
+    
+    async def create(self, texts: List[str], owner: str, lease_seconds: float) -> JobInfo:
+        """Crea un trabajo pendiente concedido al procesador indicado."""
+        return await self._run(self._create, texts, owner, lease_seconds)
+    
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        """Obtiene el estado de un trabajo, o None si no existe."""
+        return await self._run(self._get, job_id)
+    
+    async def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Reserva un trabajo sin terminar para un procesador."""
+        return await self._run(self._claim, job_id, owner, lease_seconds)
+    
+    async def claimable(self) -> List[str]:
+        """Obtiene los trabajos sin terminar cuya concesión expiró."""
+        return await self._run(self._claimable)
+    
+    async def pending_items(self, job_id: str, limit: int) -> List[Tuple[int, str]]:
+        """Obtiene los siguientes textos sin analizar de un trabajo."""
+        return await self._run(self._pending_items, job_id, limit)
+    
+    async def save_results(self, job_id: str, owner: str, results: List[BatchItemResult], lease_seconds: float) -> None:
+        """Guarda resultados de un trabajo y renueva la concesión del procesador."""
+        rows = [
+            (item.result.model_dump_json() if item.result is not None else None, item.error, item.index)
+            for item in results
+        ]
+        await self._run(self._save_results, job_id, owner, rows, lease_seconds)
+    
+    async def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Renueva la concesión de un trabajo si sigue siendo del procesador."""
+        return await self._run(self._renew, job_id, owner, lease_seconds)
+    
+    async def release(self, job_id: str, owner: str) -> None:
+        """Libera la concesión de un trabajo sin terminar."""
+        await self._run(self._release, job_id, owner)
+    
+    async def finish(self, job_id: str, status: JobStatus) -> None:
+        """Marca un trabajo como terminado y libera su concesión."""
+        await self._run(self._finish, job_id, status)
+    
+    async def results(self, job_id: str, start: int, limit: int) -> List[BatchItemResult]:
+        """Obtiene resultados guardados de un trabajo desde una posición."""
+        rows = await self._run(self._results, job_id, start, limit)
+        return [
+            BatchItemResult(
+                index=position,
+                result=ThreatAnalysis.model_validate_json(result) if result is not None else None,
+                error=error
+            )
+            for position, result, error in rows
+        ]
+    
+    async def startup(self) -> None:
+        """Abre la base de datos si ya existe, para recuperar los trabajos interrumpidos."""
+        await self._run(self._open_existing)
+    
+    async def shutdown(self) -> None:
+        """Cierra la base de datos."""
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
@@ -0,0 +1,92 @@
+"""División de textos largos en fragmentos solapados para analizarlos por partes."""
+
+import re
+from typing import List
+
+# Fin de oración o de línea seguido de espacio
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…;\n])\s+")
+
+
+class TextChunker:
+    """Divide un texto largo en fragmentos de tamaño acotado que se solapan.
+    
+    Los fragmentos se forman con oraciones completas mientras caben; las oraciones
+    más largas que un fragmento (por ejemplo, transcripciones sin puntuación) se
+    cortan en ventanas. Cada fragmento repite el final del anterior, hasta
+    `overlap_chars` caracteres, para que una amenaza que cae en el corte aparezca
+    completa en alguno de los dos; si la última oración no cabe en el solapamiento
+    se repiten sus últimos `overlap_chars` caracteres.
+    """
+    
+    def __init__(self, max_chars: int = 2000, overlap_chars: int = 200):
+        """Inicializa el divisor.
+        
+        Args:
+            max_chars: Longitud máxima de cada fragmento
+            overlap_chars: Caracteres del final de un fragmento que se repiten en el siguiente
+        
+        Raises:
+            ValueError: Si el solapamiento no es menor que el tamaño del fragmento
+        """
+        if not 0 <= overlap_chars < max_chars:
+            raise ValueError(f"El solapamiento ({overlap_chars}) debe ser menor que el fragmento ({max_chars})")
+        self._max_chars = max_chars
+        self._overlap_chars = overlap_chars
+    
+    def _windows(self, sentence: str) -> List[str]:
+        """Corta una oración demasiado larga en ventanas solapadas."""
+        step = self._max_chars - self._overlap_chars
+        return [
+            sentence[start:start + self._max_chars]
+            for start in range(0, max(1, len(sentence) - self._overlap_chars), step)
+        ]
+    
+    def split(self, text: str) -> List[str]:
+        """Divide un texto en fragmentos.
+        
+        Args:
+            text: Texto a dividir
+        
+        Returns:
+            Los fragmentos en orden; un solo fragmento si el texto cabe entero o solo
+            tiene espacios
+        """
+        if len(text) <= self._max_chars:
+            return [text]
+        
+        pieces: List[str] = []
+        for sentence in _SENTENCE_BOUNDARY.split(text.strip()):
+            if len(sentence) > self._max_chars:
+                pieces.extend(self._windows(sentence))
+            elif sentence:
+                pieces.append(sentence)
+        if not pieces:
+            # Texto formado solo por espacios: no hay nada que dividir
+            return [text]
+        
+        chunks: List[str] = []
+        current: List[str] = []
+        size = 0
+        for piece in pieces:
+            if current and size + 1 + len(piece) > self._max_chars:
+                chunks.append(" ".join(current))
+                # El siguiente fragmento empieza con las últimas oraciones que caben en el solapamiento
+                kept: List[str] = []
+                kept_size = -1
+                for previous in reversed(current):
+                    if kept_size + 1 + len(previous) > self._overlap_chars:
+                        break
+                    kept.insert(0, previous)
+                    kept_size += 1 + len(previous)
+                if not kept and self._overlap_chars:
+                    # La última oración no cabe en el solapamiento: se repiten sus últimos caracteres
+                    kept = [chunks[-1][-self._overlap_chars:]]
+                    kept_size = len(kept[0])
+                while kept and kept_size + 1 + len(piece) > self._max_chars:
+                    kept_size -= 1 + len(kept.pop(0))
+                current, size = kept, max(kept_size, 0)
+            size += len(piece) + (1 if current else 0)
+            current.append(piece)
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
@@ -0,0 +1,90 @@
+"""Normalización de textos para generar claves de caché estables."""
+
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, Tuple
+
+# Pasos disponibles, aplicados siempre en este orden
+AVAILABLE_STEPS = ("urls", "digits", "names", "nfkc", "casefold", "accents", "emoji", "whitespace")
+
+_URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+_DIGITS_PATTERN = re.compile(r"\d+(?:[\s.,-]\d+)*")
+# Palabras capitalizadas que no inician una oración (nombres propios de negocios o personas)
+_NAME_PATTERN = re.compile(r"(?<=[^\s.!?¡¿:]\s)[A-ZÁÉÍÓÚÑ][a-záéíóúñü]+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# Símbolos pictográficos, modificadores (tono de piel) y caracteres de formato (ZWJ)
+_EMOJI_CATEGORIES = frozenset({"So", "Sk", "Cf"})
+
+
+def _strip_accents(text: str) -> str:
+    """Elimina tildes y diacríticos conservando la letra base."""
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _strip_emoji(text: str) -> str:
+    """Elimina emojis, modificadores de tono y selectores de variante."""
+    if text.isascii():
+        return text
+    return "".join(
+        char for char in text
+        if unicodedata.category(char) not in _EMOJI_CATEGORIES and not "\ufe00" <= char <= "\ufe0f"
+    )
+
+
+# Función que implementa cada paso
+_STEP_FUNCTIONS: Dict[str, Callable[[str], str]] = {
+    "urls": lambda text: _URL_PATTERN.sub("<url>", text),
+    "digits": lambda text: _DIGITS_PATTERN.sub("<num>", text),
+    "names": lambda text: _NAME_PATTERN.sub("<nombre>", text),
+    "nfkc": lambda text: unicodedata.normalize("NFKC", text),
+    "casefold": str.casefold,
+    "accents": _strip_accents,
+    "emoji": _strip_emoji,
+    "whitespace": lambda text: _WHITESPACE_PATTERN.sub(" ", text).strip(),
+}
+
+
+class TextNormalizer:
+    """Canaliza un texto por una serie configurable de pasos de normalización.
+    
+    Textos que solo difieren en mayúsculas, espacios, tildes, emojis o datos
+    variables (números de teléfono, enlaces, nombres) producen la misma clave,
+    de modo que las variantes de un mismo mensaje comparten entrada en la caché.
+    """
+    
+    def __init__(self, steps: Iterable[str]):
+        """Inicializa el normalizador.
+        
+        Args:
+            steps: Nombres de los pasos a aplicar (ver `AVAILABLE_STEPS`)
+        
+        Raises:
+            ValueError: Si algún paso no existe
+        """
+        requested = {step.strip().lower() for step in steps if step.strip()}
+        unknown = requested.difference(AVAILABLE_STEPS)
+        if unknown:
+            raise ValueError(f"Pasos de normalización desconocidos: {', '.join(sorted(unknown))}")
+        self._steps = tuple(step for step in AVAILABLE_STEPS if step in requested)
+        self._functions: Tuple[Callable[[str], str], ...] = tuple(_STEP_FUNCTIONS[step] for step in self._steps)
+    
+    @property
+    def steps(self) -> Tuple[str, ...]:
+        """Pasos de normalización activos, en orden de aplicación."""
+        return self._steps
+    
+    def normalize(self, text: str) -> str:
+        """Normaliza un texto aplicando los pasos configurados.
+        
+        Args:
+            text: El texto a normalizar
+        
+        Returns:
+            El texto normalizado
+        """
+        for function in self._functions:
+            text = function(text)
+        return text
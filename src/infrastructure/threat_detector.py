@@ -1,28 +1,43 @@
 """Adaptador para la API de DeepSeek."""
 
 import os
+import re
 import json
 import time
 import logging
-import hashlib
 import asyncio
-import functools
-from typing import Dict, List, Any, Optional, Tuple
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple, Union
 
 import httpx
 from dotenv import load_dotenv
 
-from src.domain.models import ThreatAnalysis, ThreatType
-from src.domain.ports import ThreatDetectorPort
+from src.domain.exceptions import DetectorOverloadedError
+from src.domain.models import BatchItemResult, ThreatAnalysis, ThreatType
+from src.domain.ports import ThreatDetectorPort, analysis_events, build_batch_results
+from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
 from src.infrastructure.config import Config
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from src.infrastructure.logging_config import log_summary
+from src.infrastructure.metrics import (
+    FAILOVER_RESULTS, FALLBACK_RESULTS, PARSE_SECONDS, UPSTREAM_HEDGES, UPSTREAM_RESPONSES,
+    UPSTREAM_RETRIES, UPSTREAM_SECONDS, UPSTREAM_TOKENS, upstream_trace
+)
+from src.infrastructure.request_usage import record_upstream_call, record_upstream_tokens
+from src.infrastructure.response_parser import map_threat_type, parse_analysis, parse_line
+from src.infrastructure.resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, UpstreamError, hedged, is_retryable, retry_with_backoff
 )
+from src.infrastructure.token_usage import BudgetExhaustedError, TokenBudget, TokenUsageLedger
+
 logger = logging.getLogger("deepseek_detector")
 
+# HTTP/2 requiere el paquete opcional 'h2' (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 # Prompt ultra-eficiente para detección de amenazas
 ULTRA_EFFICIENT_PROMPT = """
 Analiza: "{text}"
@@ -36,174 +51,703 @@ Palabra: <término clave>
 Por qué: <explicación concisa>
 """
 
+# Prompt para analizar varios textos cortos en una sola llamada
+PACKED_PROMPT = """
+Analiza por separado cada uno de estos {count} textos:
+{texts}
+
+Identifica: amenazas explícitas/implícitas (extorsión/robo/secuestro) en contexto ecuatoriano.
+Alerta: lenguaje cordial con intención amenazante ("colaboración", "protección", "visita").
+
+Responde un bloque por texto, en el mismo orden y con este formato exacto:
+[n]
+Tipo: <extorsión/robo/secuestro/ninguna>
+Palabra: <término clave>
+Por qué: <explicación concisa>
+"""
+
+# Encabezado "[n]" que separa los bloques de la respuesta empaquetada
+_PACK_BLOCK_PATTERN = re.compile(r"^[ \t]*\[(\d+)\][ \t]*", re.MULTILINE)
+
+# Errores de red que merecen reintento (timeouts de cualquier fase y conexiones caídas)
+_TRANSIENT_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+# Justificación de los análisis de respaldo, por palabra clave del error
+_FALLBACK_JUSTIFICATIONS = {
+    "error_api": "No se pudo analizar el texto debido a un error en la API externa.",
+    "error_comunicacion": "No se pudo establecer comunicación con la API de análisis.",
+    "error_general": "Ocurrió un error general al procesar la solicitud.",
+}
+
+
+def _is_overload_status(status_code: int) -> bool:
+    """Indica si un código de estado de DeepSeek señala saturación (429 o 5xx)."""
+    return status_code == 429 or status_code >= 500
+
+
+def _signals_outage(error: BaseException) -> bool:
+    """Indica si un error cuenta como fallo de DeepSeek para el cortocircuito.
+    
+    Los errores 4xx propios de la petición (salvo 401, 403 y 429) no indican que
+    el servicio esté caído.
+    """
+    if isinstance(error, UpstreamError) and 400 <= error.status_code < 500:
+        return error.status_code in (401, 403, 429)
+    return True
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Obtiene los segundos de la cabecera `Retry-After` de una respuesta, si es numérica."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _fallback(keyword: str) -> ThreatAnalysis:
+    """Construye el análisis de respaldo para un error y lo contabiliza en las métricas.
+    
+    Args:
+        keyword: Palabra clave del error (ver `_FALLBACK_JUSTIFICATIONS`)
+    
+    Returns:
+        El análisis de respaldo
+    """
+    FALLBACK_RESULTS.inc(keyword)
+    return ThreatAnalysis(
+        keyword=keyword,
+        threat_type=ThreatType.NINGUNA,
+        is_threat="NO",
+        justification=_FALLBACK_JUSTIFICATIONS[keyword]
+    )
+
+
 class DeepSeekThreatDetector(ThreatDetectorPort):
     """Adaptador para la API de DeepSeek que implementa la detección de amenazas."""
     
-    def __init__(self, api_key: str = ""):
+    def __init__(
+        self,
+        api_key: str = "",
+        client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        failover: Optional[ThreatDetectorPort] = None,
+        usage_ledger: Optional[TokenUsageLedger] = None,
+        budget: Optional[TokenBudget] = None
+    ):
         """Inicializa el adaptador.
         
         Args:
             api_key: Clave de API para DeepSeek (opcional, por defecto se toma de variables de entorno)
+            client: Cliente HTTP a reutilizar (opcional, por defecto se crea uno propio con pool de conexiones)
+            limiter: Límite de llamadas simultáneas (opcional, por defecto se crea según `Config`)
+            breaker: Cortocircuito hacia DeepSeek (opcional, por defecto se crea según `Config`)
+            failover: Detector local que responde mientras DeepSeek no está disponible
+                (opcional, sin él se devuelven los análisis de respaldo "error_*")
+            usage_ledger: Registro donde se suman los tokens de cada respuesta (opcional)
+            budget: Presupuesto de tokens; agotado, se responde como con el cortocircuito abierto (opcional)
         """
         self._api_key = api_key or Config.DEEPSEEK_API_KEY or "sk-bbf05858555647b28e9f0b65d6e19896"
         self._api_url = Config.DEEPSEEK_API_URL
-        self._cache = {}
-        self._cache_ttl = Config.CACHE_TTL_HOURS * 60 * 60  # Convertir horas a segundos
-        self._use_cache = Config.USE_CACHE
+        self._client = client
+        self._owns_client = client is None
+        self._requests_sent = 0
+        
+        # Llamadas en curso hacia DeepSeek, para drenarlas al detener el servidor
+        self._inflight_requests = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        
+        # Límite adaptativo de llamadas simultáneas; el exceso espera en cola o se rechaza
+        self._limiter = limiter or AdaptiveConcurrencyLimiter(
+            initial_limit=Config.UPSTREAM_CONCURRENCY_INITIAL,
+            min_limit=Config.UPSTREAM_CONCURRENCY_MIN,
+            max_limit=Config.UPSTREAM_CONCURRENCY_MAX,
+            max_queue=Config.UPSTREAM_QUEUE_MAX,
+            queue_timeout=Config.UPSTREAM_QUEUE_TIMEOUT_SECONDS,
+            latency_tolerance=Config.UPSTREAM_LATENCY_TOLERANCE
+        )
+        
+        # Cortocircuito, detector de reemplazo y latencias recientes para las solicitudes de cobertura
+        self._breaker = breaker or CircuitBreaker(Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_SECONDS)
+        self._failover = failover
+        self._usage_ledger = usage_ledger
+        self._budget = budget
+        self._latencies = LatencyTracker()
+        self._retries = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._failovers = 0
+        
+        # Contadores del modo de prompts empaquetados
+        self._packed_requests = 0
+        self._packed_items = 0
+        self._pack_fallbacks = 0
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Crea el cliente HTTP compartido con pool de conexiones persistentes."""
+        limits = httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+        http2 = Config.HTTP2_ENABLED and _HTTP2_AVAILABLE
+        if Config.HTTP2_ENABLED and not _HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 solicitado pero el paquete 'h2' no está instalado; se usará HTTP/1.1")
+        timeout = httpx.Timeout(
+            Config.HTTP_TIMEOUT_SECONDS,
+            connect=Config.HTTP_CONNECT_TIMEOUT_SECONDS,
+            read=Config.HTTP_READ_TIMEOUT_SECONDS,
+            write=Config.HTTP_WRITE_TIMEOUT_SECONDS,
+            pool=Config.HTTP_POOL_TIMEOUT_SECONDS
+        )
+        return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Obtiene el cliente HTTP compartido, creándolo si aún no existe."""
+        if self._client is None:
+            self._client = self._create_client()
+            self._owns_client = True
+        return self._client
+    
+    async def startup(self) -> None:
+        """Crea el cliente HTTP compartido al iniciar la aplicación."""
+        self._get_client()
+        logger.info("Cliente HTTP hacia DeepSeek inicializado: %s", self._pool_stats())
+    
+    async def shutdown(self) -> None:
+        """Espera a que terminen las llamadas en curso y cierra el cliente HTTP compartido."""
+        if self._inflight_requests:
+            logger.info("Esperando %d llamadas en curso a DeepSeek antes de cerrar", self._inflight_requests)
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=Config.SHUTDOWN_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning("Se cierran %d llamadas a DeepSeek sin terminar", self._inflight_requests)
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            logger.info("Cliente HTTP hacia DeepSeek cerrado")
+        self._client = None
+    
+    def _pool_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado del pool de conexiones del cliente HTTP."""
+        stats: Dict[str, Any] = {
+            "max_connections": Config.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "http2": Config.HTTP2_ENABLED and _HTTP2_AVAILABLE,
+            "requests_sent": self._requests_sent,
+            "inflight_requests": self._inflight_requests,
+            "open": self._client is not None and not self._client.is_closed,
+            "connections": 0,
+            "idle_connections": 0,
+            "active_connections": 0,
+        }
+        # httpx no expone el pool públicamente; se consulta el pool de httpcore si está disponible
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            idle = sum(1 for connection in connections if connection.is_idle())
+            stats["connections"] = len(connections)
+            stats["idle_connections"] = idle
+            stats["active_connections"] = len(connections) - idle
+        return stats
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas del detector, incluido el pool de conexiones HTTP."""
+        return {
+            "http_pool": self._pool_stats(),
+            "concurrency": self._limiter.get_stats(),
+            "resilience": {
+                "circuit": self._breaker.get_stats(),
+                "retries": self._retries,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "failovers": self._failovers,
+            },
+            "packing": {
+                "packed_requests": self._packed_requests,
+                "packed_items": self._packed_items,
+                "fallbacks": self._pack_fallbacks,
+            },
+        }
+    
+    def _build_request(self, prompt: str, max_tokens: int, stream: bool = False) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Prepara las cabeceras y el cuerpo de una solicitud de chat-completions.
+        
+        Args:
+            prompt: El prompt a enviar
+            max_tokens: Número máximo de tokens de la respuesta
+            stream: Si es True, DeepSeek envía la respuesta por fragmentos (SSE)
         
-    def _generate_cache_key(self, text: str) -> str:
-        """Genera una clave de caché para el texto usando un hash MD5."""
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        return f"threat_detector:{text_hash}"
+        Returns:
+            Tupla con las cabeceras y el cuerpo JSON de la solicitud
+        """
+        headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        request_data = {
+            "model": "deepseek-chat",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,  # Baja temperatura para respuestas más deterministas
+            "max_tokens": max_tokens,
+            "stream": stream
+        }
+        if stream:
+            # Pedir el bloque `usage` en el último fragmento para contabilizar los tokens
+            request_data["stream_options"] = {"include_usage": True}
+        return headers, request_data
+    
+    @asynccontextmanager
+    async def _track_inflight(self) -> AsyncIterator[None]:
+        """Registra una llamada en curso a DeepSeek mientras dura el bloque."""
+        self._inflight_requests += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._inflight_requests -= 1
+            if not self._inflight_requests:
+                self._idle.set()
+    
+    async def _post_completion(self, prompt: str, max_tokens: int, latency_signal: bool = True) -> httpx.Response:
+        """Envía un prompt a la API de chat-completions de DeepSeek.
         
+        Args:
+            prompt: El prompt a enviar
+            max_tokens: Número máximo de tokens de la respuesta
+            latency_signal: Si la latencia de la llamada sirve al límite de concurrencia para detectar saturación
+        
+        Returns:
+            La respuesta HTTP de DeepSeek
+        
+        Raises:
+            DetectorOverloadedError: Si no hay hueco para la llamada en el límite de concurrencia
+        """
+        client = self._get_client()
+        headers, request_data = self._build_request(prompt, max_tokens)
+        
+        async with self._limiter.slot(latency_signal) as permit:
+            started = time.perf_counter()
+            async with self._track_inflight():
+                try:
+                    response = await client.post(
+                        self._api_url,
+                        headers=headers,
+                        json=request_data,
+                        extensions={"trace": upstream_trace(started)}
+                    )
+                except Exception:
+                    UPSTREAM_RESPONSES.inc("error")
+                    raise
+            if _is_overload_status(response.status_code):
+                permit.mark_overloaded()
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, "total")
+        UPSTREAM_RESPONSES.inc(str(response.status_code))
+        self._requests_sent += 1
+        return response
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Calcula tras cuántos segundos se duplica una llamada, o None si no se duplica."""
+        if not Config.HEDGE_ENABLED or len(self._latencies) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        return max(Config.HEDGE_MIN_DELAY_SECONDS, self._latencies.percentile(Config.HEDGE_PERCENTILE))
+    
+    def _count_retry(self) -> None:
+        self._retries += 1
+        UPSTREAM_RETRIES.inc()
+    
+    def _count_hedge(self) -> None:
+        self._hedges += 1
+        UPSTREAM_HEDGES.inc("launched")
+    
+    def _record_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Contabiliza el bloque `usage` de una respuesta de DeepSeek."""
+        if not isinstance(usage, dict):
+            return
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        UPSTREAM_TOKENS.inc("prompt", amount=prompt_tokens)
+        UPSTREAM_TOKENS.inc("completion", amount=completion_tokens)
+        record_upstream_tokens(prompt_tokens, completion_tokens)
+        if self._usage_ledger is not None:
+            self._usage_ledger.record(prompt_tokens, completion_tokens)
+    
+    def _check_budget(self) -> None:
+        """Comprueba que el presupuesto de tokens permite llamar a DeepSeek.
+        
+        Raises:
+            BudgetExhaustedError: Si el presupuesto está agotado
+        """
+        if self._budget is not None and not self._budget.allow():
+            raise BudgetExhaustedError("Presupuesto de tokens de DeepSeek agotado")
+    
+    async def _complete(self, prompt: str, max_tokens: int, latency_signal: bool = True) -> str:
+        """Obtiene el contenido de la respuesta de DeepSeek para un prompt.
+        
+        Cada intento que supera el percentil `HEDGE_PERCENTILE` de la latencia
+        reciente se duplica (si el límite de concurrencia tiene hueco) y se usa la
+        primera respuesta. Los errores transitorios (429, 5xx, timeouts y errores de
+        red) se reintentan con espera aleatoria hasta `RETRY_MAX_ATTEMPTS` intentos.
+        El resultado final se registra en el cortocircuito.
+        
+        Args:
+            prompt: El prompt a enviar
+            max_tokens: Número máximo de tokens de la respuesta
+            latency_signal: False para los prompts empaquetados, que tardan más que uno individual
+        
+        Returns:
+            El texto generado por el modelo
+        
+        Raises:
+            BudgetExhaustedError: Si el presupuesto de tokens está agotado
+            CircuitOpenError: Si el cortocircuito está abierto
+            DetectorOverloadedError: Si no hay hueco para la llamada en el límite de concurrencia
+            UpstreamError: Si DeepSeek respondió con error en todos los intentos
+        """
+        self._check_budget()
+        if not self._breaker.allow():
+            raise CircuitOpenError("DeepSeek no está disponible temporalmente")
+        record_upstream_call()
+        
+        async def attempt() -> str:
+            started = time.perf_counter()
+            response = await self._post_completion(prompt, max_tokens, latency_signal)
+            if response.status_code != 200:
+                logger.warning("DeepSeek respondió %d: %s", response.status_code, response.text[:200])
+                raise UpstreamError(response.status_code, _retry_after(response))
+            self._latencies.record(time.perf_counter() - started)
+            data = response.json()
+            self._record_usage(data.get("usage"))
+            return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        
+        async def hedged_attempt() -> str:
+            content, hedge_won = await hedged(
+                attempt, self._hedge_delay(),
+                allow_hedge=lambda: not self._limiter.saturated,
+                on_hedge=self._count_hedge
+            )
+            if hedge_won:
+                self._hedge_wins += 1
+                UPSTREAM_HEDGES.inc("won")
+            return content
+        
+        try:
+            content = await retry_with_backoff(
+                hedged_attempt,
+                attempts=Config.RETRY_MAX_ATTEMPTS,
+                base_delay=Config.RETRY_BASE_DELAY_SECONDS,
+                max_delay=Config.RETRY_MAX_DELAY_SECONDS,
+                deadline=Config.UPSTREAM_DEADLINE_SECONDS,
+                retryable=lambda error: is_retryable(error, _TRANSIENT_ERRORS),
+                on_retry=self._count_retry
+            )
+        except DetectorOverloadedError:
+            # La saturación es del límite local y no dice nada sobre la salud de DeepSeek
+            self._breaker.release_probe()
+            raise
+        except BaseException as e:
+            if isinstance(e, Exception) and _signals_outage(e):
+                self._breaker.record_failure()
+            else:
+                self._breaker.release_probe()
+            raise
+        self._breaker.record_success()
+        return content
+    
+    async def _degrade(self, text: str, keyword: str, reason: str) -> ThreatAnalysis:
+        """Analiza un texto sin DeepSeek.
+        
+        Args:
+            text: El texto a analizar
+            keyword: Palabra clave del análisis de respaldo si no hay detector local
+            reason: Motivo para las métricas (`circuit_open` o `upstream_error`)
+        
+        Returns:
+            El análisis del detector local marcado como degradado, o el análisis de respaldo
+        """
+        if self._failover is None:
+            return _fallback(keyword)
+        self._failovers += 1
+        FAILOVER_RESULTS.inc(reason)
+        analysis = await self._failover.analyze_text(text)
+        return analysis.model_copy(update={"degraded": True})
+    
     async def analyze_text(self, text: str) -> ThreatAnalysis:
         """Analiza un texto y determina si contiene amenazas utilizando DeepSeek.
         
         Args:
             text: El texto a analizar
-            
+        
         Returns:
             El análisis de la amenaza
+        
+        Raises:
+            DetectorOverloadedError: Si DeepSeek está saturado y la llamada no obtuvo turno
         """
-        logger.info(f"Analizando texto: {text[:50]}...")
-        
-        # Verificar caché si está habilitada
-        if self._use_cache:
-            text_hash = hashlib.md5(text.encode()).hexdigest()
-            logger.debug(f"Verificando caché para texto (hash: {text_hash})")
-            cache_key = self._generate_cache_key(text)
-            logger.debug(f"Generando clave de caché: {cache_key}")
-            
-            # Verificar si hay resultado en caché y no ha expirado
-            if cache_key in self._cache:
-                cached_result, timestamp = self._cache[cache_key]
-                current_time = time.time()
+        started = time.perf_counter()
+        result = await self._analyze_text(text)
+        log_summary(
+            logger,
+            "analisis modo=individual palabra=%s tipo=%s amenaza=%s caracteres=%d duracion_ms=%.1f",
+            result.keyword, result.threat_type.value, result.is_threat, len(text),
+            (time.perf_counter() - started) * 1000
+        )
+        return result
+    
+    async def _analyze_text(self, text: str) -> ThreatAnalysis:
+        """Consulta DeepSeek para un texto, con respuestas de respaldo ante errores."""
+        # Consultar la API (la caché de resultados la gestiona CachedThreatDetector)
+        prompt = ULTRA_EFFICIENT_PROMPT.format(text=text)
+        
+        try:
+            try:
+                raw_result = await self._complete(prompt, max_tokens=150)
                 
-                if current_time - timestamp < self._cache_ttl:
-                    logger.info("Resultado encontrado en caché!")
-                    return cached_result
-                else:
-                    # Eliminar entrada expirada
-                    del self._cache[cache_key]
-                    logger.debug("Caché expirada, consultando API")
-            else:
-                logger.info("Caché no encontrada, consultando API")
-        else:
-            logger.debug("Verificando caché para texto (caché desactivada)")
+                # Procesar la respuesta
+                with PARSE_SECONDS.time("deepseek"):
+                    return parse_analysis(raw_result)
+            
+            except DetectorOverloadedError:
+                raise
+            except CircuitOpenError:
+                return await self._degrade(text, "error_comunicacion", "circuit_open")
+            except BudgetExhaustedError:
+                return await self._degrade(text, "error_comunicacion", "budget_exhausted")
+            except UpstreamError as e:
+                logger.error("Error en la API de DeepSeek: %d", e.status_code)
+                # Detector local o respuesta predeterminada en caso de error
+                return await self._degrade(text, "error_api", "upstream_error")
+            except Exception as e:
+                logger.exception("Error al comunicarse con la API de DeepSeek: %s", e)
+                # Detector local o respuesta predeterminada en caso de error
+                return await self._degrade(text, "error_comunicacion", "upstream_error")
+        except DetectorOverloadedError:
+            raise
+        except Exception as e:
+            logger.exception("Error general al procesar la petición: %s", e)
+            # Fallback a una respuesta predeterminada en caso de error
+            return _fallback("error_general")
+    
+    async def analyze_text_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Analiza un texto con `stream: true` emitiendo cada campo en cuanto se completa.
+        
+        El tipo de amenaza se emite en cuanto llega la línea `Tipo:`, antes de que
+        DeepSeek termine de generar la palabra clave y la justificación. Las
+        respuestas en streaming no se reintentan ni se duplican, pero sí pasan por
+        el cortocircuito. Si el flujo se interrumpe después de emitir algún campo, se
+        emite un único evento `error` en lugar del análisis de respaldo.
         
-        # Si no hay caché o está desactivada, hacer llamada a la API
+        Args:
+            text: El texto a analizar
+        
+        Yields:
+            Tuplas (nombre del evento, datos del evento)
+        """
         prompt = ULTRA_EFFICIENT_PROMPT.format(text=text)
+        headers, request_data = self._build_request(prompt, max_tokens=150, stream=True)
         
+        content = ""
+        pending_line = ""
+        emitted = set()
+        started = time.perf_counter()
+        reason = "budget_exhausted" if self._budget is not None and not self._budget.allow() else None
+        if reason is None and not self._breaker.allow():
+            reason = "circuit_open"
+        if reason is not None:
+            for event in analysis_events(await self._degrade(text, "error_comunicacion", reason)):
+                yield event
+            return
+        record_upstream_call()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                try:
-                    # Preparar la solicitud
-                    headers = {
-                        "Authorization": f"Bearer {self._api_key}",
-                        "Content-Type": "application/json"
-                    }
-                    
-                    request_data = {
-                        "model": "deepseek-chat",
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.2,  # Baja temperatura para respuestas más deterministas
-                        "max_tokens": 150,
-                        "stream": False
-                    }
-                    
-                    logger.info(f"Conectando a DeepSeek API URL: {self._api_url}")
-                    
-                    response = await client.post(
-                        self._api_url,
-                        headers=headers,
-                        json=request_data,
-                        timeout=30.0
-                    )
-                    
-                    logger.info(f"Respuesta recibida con código: {response.status_code}")
-                    
+            # La duración de un streaming depende también del cliente: no indica saturación
+            async with self._limiter.slot(latency_signal=False) as permit, self._track_inflight():
+                upstream_started = time.perf_counter()
+                async with self._get_client().stream(
+                    "POST", self._api_url, headers=headers, json=request_data,
+                    extensions={"trace": upstream_trace(upstream_started)}
+                ) as response:
+                    self._requests_sent += 1
+                    UPSTREAM_RESPONSES.inc(str(response.status_code))
+                    if _is_overload_status(response.status_code):
+                        permit.mark_overloaded()
                     if response.status_code != 200:
-                        logger.error(f"Error en la API de DeepSeek: {response.status_code} - {response.text}")
-                        # Fallback a una respuesta predeterminada en caso de error
-                        return ThreatAnalysis(
-                            keyword="error_api",
-                            threat_type=ThreatType.NINGUNA,
-                            is_threat="NO",
-                            justification="No se pudo analizar el texto debido a un error en la API externa."
-                        )
-                    
-                    response_data = response.json()
-                    logger.info("Respuesta JSON recibida correctamente")
-                    logger.debug(f"Procesando respuesta: {json.dumps(response_data)}")
-                    
-                    # Procesar la respuesta
-                    raw_result = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    
-                    # Extraer tipo, palabra clave y justificación de la respuesta
-                    threat_type_line = next((line for line in raw_result.split("\n") 
-                                    if line.startswith("Tipo:") or line.lower().startswith("tipo:")), "Tipo: ninguna")
-                    keyword_line = next((line for line in raw_result.split("\n") 
-                                    if line.startswith("Palabra:") or line.lower().startswith("palabra:")), 
-                                    "Palabra: ninguna")
-                    justification_line = next((line for line in raw_result.split("\n") 
-                                    if line.startswith("Por qué:") or line.lower().startswith("por que:") 
-                                    or line.lower().startswith("por qué:")), 
-                                    "Por qué: No se proporcionó justificación.")
-                    
-                    # Extraer valores
-                    threat_type_str = threat_type_line.split(":", 1)[1].strip().lower()
-                    keyword = keyword_line.split(":", 1)[1].strip()
-                    justification = justification_line.split(":", 1)[1].strip()
-                    
-                    logger.info(f"Tipo de amenaza extraído: {threat_type_str}")
-                    logger.info(f"Palabra clave extraída: {keyword}")
-                    logger.info(f"Justificación extraída: {justification}")
+                        body = await response.aread()
+                        logger.error("Error en la API de DeepSeek: %d - %r", response.status_code, body[:200])
+                        if _signals_outage(UpstreamError(response.status_code)):
+                            self._breaker.record_failure()
+                        for event in analysis_events(await self._degrade(text, "error_api", "upstream_error")):
+                            yield event
+                        return
                     
-                    # Mapear a ThreatType
-                    if "extorsión" in threat_type_str or "extorsion" in threat_type_str:
-                        threat_type = ThreatType.EXTORSION
-                    elif "robo" in threat_type_str:
-                        threat_type = ThreatType.ROBO
-                    elif "secuestro" in threat_type_str:
-                        threat_type = ThreatType.SECUESTRO
-                    else:
-                        threat_type = ThreatType.NINGUNA
-                    
-                    # Determinar si es una amenaza
-                    is_threat = "SI" if threat_type != ThreatType.NINGUNA else "NO"
-                    logger.info(f"Decisión final: {is_threat}, tipo: {threat_type}")
-                    
-                    # Crear objeto de análisis de amenaza
-                    threat_analysis = ThreatAnalysis(
-                        keyword=keyword,
-                        threat_type=threat_type,
-                        is_threat=is_threat,
-                        justification=justification
-                    )
-                    
-                    # Guardar en caché si está habilitada
-                    if self._use_cache:
-                        cache_key = self._generate_cache_key(text)
-                        self._cache[cache_key] = (threat_analysis, time.time())
-                        logger.debug(f"Guardando resultado en caché con clave: {cache_key}")
-                    
-                    return threat_analysis
-                
-                except Exception as e:
-                    logger.exception(f"Error al comunicarse con la API de DeepSeek: {str(e)}")
-                    # Fallback a una respuesta predeterminada en caso de error
-                    return ThreatAnalysis(
-                        keyword="error_comunicacion",
-                        threat_type=ThreatType.NINGUNA,
-                        is_threat="NO",
-                        justification="No se pudo establecer comunicación con la API de análisis."
-                    )
+                    async for sse_line in response.aiter_lines():
+                        if not sse_line.startswith("data:"):
+                            continue
+                        data = sse_line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        # Con `include_usage` el último fragmento trae el consumo y ninguna opción
+                        self._record_usage(chunk.get("usage"))
+                        choices = chunk.get("choices") or [{}]
+                        delta = choices[0].get("delta", {}).get("content") or ""
+                        content += delta
+                        pending_line += delta
+                        
+                        # Emitir cada campo en cuanto su línea está completa
+                        while "\n" in pending_line:
+                            line, pending_line = pending_line.split("\n", 1)
+                            field = parse_line(line)
+                            if field is None or field[0] in emitted:
+                                continue
+                            emitted.add(field[0])
+                            if field[0] == "threat_type":
+                                threat_type = map_threat_type(field[1])
+                                yield "threat_type", {
+                                    "threat_type": threat_type.value,
+                                    "is_threat": "SI" if threat_type != ThreatType.NINGUNA else "NO",
+                                }
+                            else:
+                                yield field[0], {field[0]: field[1]}
+            UPSTREAM_SECONDS.observe(time.perf_counter() - upstream_started, "total")
+        except DetectorOverloadedError:
+            self._breaker.release_probe()
+            raise
         except Exception as e:
-            logger.exception(f"Error general al procesar la petición: {str(e)}")
-            # Fallback a una respuesta predeterminada en caso de error
-            return ThreatAnalysis(
-                keyword="error_general",
-                threat_type=ThreatType.NINGUNA,
-                is_threat="NO",
-                justification="Ocurrió un error general al procesar la solicitud."
-            )
+            logger.exception("Error al comunicarse con la API de DeepSeek en streaming: %s", e)
+            # Solo los fallos de transporte indican que DeepSeek no está disponible; un
+            # fragmento mal formado o un error local no deben abrir el cortocircuito
+            if isinstance(e, httpx.TransportError):
+                self._breaker.record_failure()
+            else:
+                self._breaker.release_probe()
+            if emitted:
+                # Ya se enviaron campos: un análisis de respaldo podría contradecirlos
+                yield "error", {"detail": f"Se interrumpió el análisis en streaming: {str(e)}"}
+                return
+            for event in analysis_events(await self._degrade(text, "error_comunicacion", "upstream_error")):
+                yield event
+            return
+        self._breaker.record_success()
+        
+        # Completar con los campos que no llegaron en una línea terminada
+        with PARSE_SECONDS.time("deepseek"):
+            analysis = parse_analysis(content)
+        log_summary(
+            logger,
+            "analisis modo=streaming palabra=%s tipo=%s amenaza=%s caracteres=%d duracion_ms=%.1f",
+            analysis.keyword, analysis.threat_type.value, analysis.is_threat, len(text),
+            (time.perf_counter() - started) * 1000
+        )
+        for name, data in analysis_events(analysis):
+            if name not in emitted:
+                yield name, data
+    
+    def _build_packs(self, texts: List[str]) -> List[List[str]]:
+        """Agrupa textos cortos en paquetes que respetan el presupuesto de caracteres.
+        
+        Args:
+            texts: Textos cortos a agrupar
+        
+        Returns:
+            Lista de paquetes de textos
+        """
+        packs: List[List[str]] = []
+        current: List[str] = []
+        current_chars = 0
+        for text in texts:
+            if current and (len(current) >= Config.PACK_MAX_ITEMS
+                            or current_chars + len(text) > Config.PACK_MAX_CHARS):
+                packs.append(current)
+                current, current_chars = [], 0
+            current.append(text)
+            current_chars += len(text)
+        if current:
+            packs.append(current)
+        return packs
+    
+    async def _analyze_pack(self, texts: List[str]) -> Dict[str, ThreatAnalysis]:
+        """Analiza varios textos con un único prompt numerado.
+        
+        Args:
+            texts: Textos del paquete
+        
+        Returns:
+            Los análisis que se pudieron extraer, por texto; los que falten deben
+            analizarse de forma individual
+        """
+        started = time.perf_counter()
+        numbered = "\n".join(f'[{number}] "{text}"' for number, text in enumerate(texts, start=1))
+        prompt = PACKED_PROMPT.format(count=len(texts), texts=numbered)
+        
+        try:
+            raw_result = await self._complete(prompt, max_tokens=150 * len(texts), latency_signal=False)
+        except (DetectorOverloadedError, CircuitOpenError, BudgetExhaustedError):
+            # Los textos del paquete se reintentan de forma individual
+            return {}
+        except UpstreamError as e:
+            logger.error("Error en la API de DeepSeek (paquete): %d", e.status_code)
+            return {}
+        except Exception as e:
+            logger.exception("Error al analizar el paquete de %d textos: %s", len(texts), e)
+            return {}
+        
+        # Separar la respuesta en bloques "[n]" y analizar cada uno
+        results: Dict[str, ThreatAnalysis] = {}
+        with PARSE_SECONDS.time("deepseek_pack"):
+            parts = _PACK_BLOCK_PATTERN.split(raw_result)
+            for number, block in zip(parts[1::2], parts[2::2]):
+                index = int(number) - 1
+                if 0 <= index < len(texts) and texts[index] not in results:
+                    analysis = parse_analysis(block, strict=True)
+                    if analysis is not None:
+                        results[texts[index]] = analysis
+        log_summary(
+            logger,
+            "analisis modo=paquete textos=%d extraidos=%d duracion_ms=%.1f",
+            len(texts), len(results), (time.perf_counter() - started) * 1000
+        )
+        return results
+    
+    async def analyze_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Analiza un lote agrupando los textos cortos en prompts numerados.
+        
+        Los textos cortos se empaquetan según `PACK_MAX_ITEMS` y `PACK_MAX_CHARS`;
+        los textos largos y los que no se pudieron extraer de la respuesta de un
+        paquete se analizan con llamadas individuales.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de llamadas simultáneas a DeepSeek
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        if not Config.PACKED_PROMPT_ENABLED:
+            return await super().analyze_batch(texts, max_concurrency)
+        
+        unique_texts = list(dict.fromkeys(texts))
+        short_texts = [text for text in unique_texts if len(text) <= Config.PACK_ITEM_MAX_CHARS]
+        packs = [pack for pack in self._build_packs(short_texts) if len(pack) > 1]
+        
+        outcomes: Dict[str, Union[ThreatAnalysis, BaseException]] = {}
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def analyze_pack(pack: List[str]) -> None:
+            async with semaphore:
+                results = await self._analyze_pack(pack)
+            self._packed_requests += 1
+            self._packed_items += len(results)
+            self._pack_fallbacks += len(pack) - len(results)
+            outcomes.update(results)
+        
+        await asyncio.gather(*(analyze_pack(pack) for pack in packs))
+        
+        # Textos largos, paquetes de un solo texto y textos sin bloque válido
+        remaining = [text for text in unique_texts if text not in outcomes]
+        if remaining:
+            for item in await super().analyze_batch(remaining, max_concurrency):
+                text = remaining[item.index]
+                outcomes[text] = item.result if item.result is not None else RuntimeError(item.error)
+        
+        return build_batch_results(texts, outcomes)
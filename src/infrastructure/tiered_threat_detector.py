@@ -0,0 +1,126 @@
+"""Detector escalonado: filtro local por reglas antes de consultar el detector remoto."""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from src.domain.models import BatchItemResult, ThreatAnalysis, ThreatType
+from src.domain.ports import ThreatDetectorPort, analysis_events
+from src.infrastructure.rule_matcher import RuleMatcher
+from src.infrastructure.rule_set import RuleSet
+
+
+class TieredThreatDetector(ThreatDetectorPort):
+    """Decide localmente los textos claramente inofensivos y escala el resto.
+    
+    Un texto se resuelve en local cuando las reglas no detectan amenaza y contiene
+    como mucho `max_benign_hits` palabras del vocabulario de las reglas; en otro
+    caso se delega en el detector remoto.
+    """
+    
+    def __init__(self, detector: ThreatDetectorPort, matcher: Union[RuleMatcher, RuleSet], max_benign_hits: int = 0):
+        """Inicializa el detector escalonado.
+        
+        Args:
+            detector: Detector remoto al que se escalan los textos sospechosos
+            matcher: Motor de reglas usado como filtro local, o conjunto de reglas recargable
+            max_benign_hits: Máximo de palabras del vocabulario para decidir en local
+        """
+        self._detector = detector
+        self._rules = matcher if isinstance(matcher, RuleSet) else RuleSet(matcher)
+        self._max_benign_hits = max_benign_hits
+        self._local_decisions = 0
+        self._escalations = 0
+    
+    def _local_verdict(self, text: str) -> Optional[ThreatAnalysis]:
+        """Obtiene el análisis local si el texto es claramente inofensivo, o None si hay que escalar."""
+        matcher = self._rules.matcher
+        found = matcher.scan(text)
+        if len(found) > self._max_benign_hits:
+            return None
+        analysis = matcher.evaluate(found)
+        if analysis.threat_type != ThreatType.NINGUNA:
+            return None
+        return analysis
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        """Analiza un texto en local si es claramente inofensivo o lo escala al detector remoto.
+        
+        Args:
+            text: El texto a analizar
+        
+        Returns:
+            El análisis de la amenaza
+        """
+        local = self._local_verdict(text)
+        if local is not None:
+            self._local_decisions += 1
+            return local
+        
+        self._escalations += 1
+        return await self._detector.analyze_text(text)
+    
+    async def analyze_text_stream(self, text: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Analiza un texto en streaming, en local si es claramente inofensivo.
+        
+        Args:
+            text: El texto a analizar
+        
+        Yields:
+            Tuplas (nombre del evento, datos del evento)
+        """
+        local = self._local_verdict(text)
+        if local is not None:
+            self._local_decisions += 1
+            for event in analysis_events(local):
+                yield event
+            return
+        
+        self._escalations += 1
+        async for event in self._detector.analyze_text_stream(text):
+            yield event
+    
+    async def analyze_batch(self, texts: List[str], max_concurrency: int = 8) -> List[BatchItemResult]:
+        """Analiza un lote resolviendo en local los textos inofensivos y escalando el resto juntos.
+        
+        Args:
+            texts: Los textos a analizar
+            max_concurrency: Número máximo de análisis simultáneos hacia el detector remoto
+        
+        Returns:
+            Un resultado por texto, en el mismo orden de entrada
+        """
+        results: List[BatchItemResult] = [None] * len(texts)
+        escalated: List[int] = []
+        for index, text in enumerate(texts):
+            local = self._local_verdict(text)
+            if local is not None:
+                self._local_decisions += 1
+                results[index] = BatchItemResult(index=index, result=local)
+            else:
+                escalated.append(index)
+        
+        if escalated:
+            self._escalations += len(escalated)
+            remote = await self._detector.analyze_batch([texts[index] for index in escalated], max_concurrency)
+            for item in remote:
+                index = escalated[item.index]
+                results[index] = item.model_copy(update={"index": index})
+        return results
+    
+    async def startup(self) -> None:
+        """Inicia el detector remoto."""
+        await self._detector.startup()
+    
+    async def shutdown(self) -> None:
+        """Detiene el detector remoto."""
+        await self._detector.shutdown()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene las estadísticas del detector remoto junto con las del filtro local."""
+        stats = dict(self._detector.get_stats())
+        total = self._local_decisions + self._escalations
+        stats["prefilter"] = {
+            "local_decisions": self._local_decisions,
+            "escalations": self._escalations,
+            "avoided_ratio": round(self._local_decisions / total, 4) if total else 0.0,
+        }
+        return stats
@@ -0,0 +1,205 @@
+"""Contabilidad de los tokens consumidos en DeepSeek y presupuesto de gasto."""
+
+import time
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from src.infrastructure.metrics import TOKEN_BUDGET_DEGRADED, TOKEN_BUDGET_TRANSITIONS
+
+logger = logging.getLogger("token_usage")
+
+
+class BudgetExhaustedError(Exception):
+    """El presupuesto de tokens está agotado y no se llama a DeepSeek."""
+
+
+def _usage(calls: int, prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+    """Formatea un consumo de tokens."""
+    return {
+        "calls": calls,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class TokenUsageLedger:
+    """Tokens consumidos en DeepSeek, agregados por intervalos de tiempo y por ruta.
+    
+    Cada llamada se suma al intervalo de `bucket_seconds` en curso y se conservan
+    los intervalos de los últimos `retention_seconds`, de modo que registrar es O(1)
+    y el consumo de una ventana se obtiene sumando sus intervalos.
+    """
+    
+    def __init__(
+        self,
+        bucket_seconds: float = 60.0,
+        retention_seconds: float = 24 * 60 * 60,
+        clock: Callable[[], float] = time.time
+    ):
+        """Inicializa el registro.
+        
+        Args:
+            bucket_seconds: Duración de cada intervalo de agregación
+            retention_seconds: Antigüedad máxima de los intervalos conservados
+            clock: Reloj en segundos desde la época
+        """
+        self._bucket_seconds = bucket_seconds
+        self._clock = clock
+        # Por intervalo: [inicio, llamadas, tokens del prompt, tokens de la respuesta]
+        self._buckets: Deque[List[float]] = deque(maxlen=max(1, int(-(-retention_seconds // bucket_seconds))))
+        self._totals = [0, 0, 0]
+        # Por ruta: [peticiones, llamadas, tokens del prompt, tokens de la respuesta]
+        self._routes: Dict[str, List[int]] = {}
+    
+    def record(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """Registra una llamada a DeepSeek.
+        
+        Args:
+            prompt_tokens: Tokens del prompt
+            completion_tokens: Tokens de la respuesta
+        """
+        now = self._clock()
+        start = now - now % self._bucket_seconds
+        if not self._buckets or self._buckets[-1][0] != start:
+            self._buckets.append([start, 0, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += prompt_tokens
+        bucket[3] += completion_tokens
+        self._totals[0] += 1
+        self._totals[1] += prompt_tokens
+        self._totals[2] += completion_tokens
+    
+    def record_request(self, route: str, calls: int, prompt_tokens: int, completion_tokens: int) -> None:
+        """Atribuye a una ruta el consumo de una petición ya registrado con `record`.
+        
+        Args:
+            route: Plantilla de la ruta de la petición
+            calls: Llamadas a DeepSeek de la petición
+            prompt_tokens: Tokens del prompt de la petición
+            completion_tokens: Tokens de la respuesta de la petición
+        """
+        totals = self._routes.setdefault(route, [0, 0, 0, 0])
+        totals[0] += 1
+        totals[1] += calls
+        totals[2] += prompt_tokens
+        totals[3] += completion_tokens
+    
+    def window_tokens(self, seconds: float) -> int:
+        """Obtiene los tokens consumidos en los intervalos que se solapan con la ventana.
+        
+        Args:
+            seconds: Duración de la ventana que termina ahora
+        
+        Returns:
+            Tokens del prompt y de la respuesta
+        """
+        return self.window(seconds)["total_tokens"]
+    
+    def window(self, seconds: float) -> Dict[str, int]:
+        """Obtiene el consumo de los intervalos que se solapan con la ventana.
+        
+        Args:
+            seconds: Duración de la ventana que termina ahora
+        
+        Returns:
+            Llamadas y tokens del prompt, de la respuesta y totales
+        """
+        cutoff = self._clock() - seconds
+        calls = prompt_tokens = completion_tokens = 0
+        for start, bucket_calls, bucket_prompt, bucket_completion in reversed(self._buckets):
+            if start + self._bucket_seconds <= cutoff:
+                break
+            calls += bucket_calls
+            prompt_tokens += bucket_prompt
+            completion_tokens += bucket_completion
+        return _usage(int(calls), int(prompt_tokens), int(completion_tokens))
+    
+    def get_stats(self, windows: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """Obtiene el consumo total, por ventana y por ruta.
+        
+        Args:
+            windows: Ventanas a calcular, por nombre y duración en segundos (opcional)
+        
+        Returns:
+            Consumo desde el arranque (`totals`), por ventana (`windows`) y por ruta (`routes`)
+        """
+        return {
+            "totals": _usage(*self._totals),
+            "windows": {name: self.window(seconds) for name, seconds in (windows or {}).items()},
+            "routes": {
+                route: dict(_usage(calls, prompt_tokens, completion_tokens), requests=requests)
+                for route, (requests, calls, prompt_tokens, completion_tokens) in sorted(self._routes.items())
+            },
+        }
+
+
+class TokenBudget:
+    """Presupuesto de tokens de DeepSeek en una ventana deslizante.
+    
+    Mientras los tokens de la ventana alcanzan `max_tokens` el servicio pasa a modo
+    degradado y no llama a DeepSeek: responden la caché, el índice de textos
+    parecidos y el detector local por reglas. Se vuelve al modo normal cuando el
+    consumo baja de `resume_ratio` veces el presupuesto, para no alternar de modo
+    en cada llamada al rozar el límite.
+    """
+    
+    def __init__(self, ledger: TokenUsageLedger, max_tokens: int, window_seconds: float, resume_ratio: float = 0.9):
+        """Inicializa el presupuesto.
+        
+        Args:
+            ledger: Registro con el consumo de tokens
+            max_tokens: Tokens permitidos en la ventana
+            window_seconds: Duración de la ventana
+            resume_ratio: Proporción del presupuesto por debajo de la que se vuelve al modo normal
+        """
+        self._ledger = ledger
+        self._max_tokens = max_tokens
+        self._window_seconds = window_seconds
+        self._resume_tokens = max_tokens * min(max(resume_ratio, 0.0), 1.0)
+        self._degraded = False
+        self._transitions = 0
+        self._rejections = 0
+        TOKEN_BUDGET_DEGRADED.set(0)
+    
+    def allow(self) -> bool:
+        """Comprueba si se puede llamar a DeepSeek, cambiando de modo si corresponde.
+        
+        Returns:
+            True en modo normal; False si el presupuesto está agotado
+        """
+        spent = self._ledger.window_tokens(self._window_seconds)
+        if self._degraded and spent < self._resume_tokens:
+            self._switch(False, spent)
+        elif not self._degraded and spent >= self._max_tokens:
+            self._switch(True, spent)
+        if self._degraded:
+            self._rejections += 1
+        return not self._degraded
+    
+    def _switch(self, degraded: bool, spent: int) -> None:
+        """Cambia de modo y lo refleja en las métricas."""
+        self._degraded = degraded
+        self._transitions += 1
+        TOKEN_BUDGET_DEGRADED.set(1 if degraded else 0)
+        TOKEN_BUDGET_TRANSITIONS.inc("degraded" if degraded else "normal")
+        if degraded:
+            logger.warning(
+                "Presupuesto de tokens agotado (%d de %d en %.0f s): se deja de llamar a DeepSeek",
+                spent, self._max_tokens, self._window_seconds
+            )
+        else:
+            logger.info("Consumo de tokens por debajo del presupuesto (%d): se vuelve a llamar a DeepSeek", spent)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado del presupuesto."""
+        return {
+            "mode": "degraded" if self._degraded else "normal",
+            "max_tokens": self._max_tokens,
+            "window_seconds": self._window_seconds,
+            "spent_tokens": self._ledger.window_tokens(self._window_seconds),
+            "transitions": self._transitions,
+            "rejected_calls": self._rejections,
+        }
@@ -0,0 +1,64 @@
+"""Tests para las utilidades de las pruebas de carga."""
+
+import httpx
+import pytest
+
+from benchmarks.fake_deepseek import FakeDeepSeekSettings, create_fake_deepseek
+from benchmarks.parser import benchmark_parser
+from benchmarks.run import compare_with_baseline, percentile
+from benchmarks.serialization import benchmark_requests, benchmark_serialization
+from src.domain.models import ThreatType
+from src.infrastructure.threat_detector import DeepSeekThreatDetector
+
+
+def test_percentile_interpolates_between_values():
+    """Comprueba el cálculo de percentiles por interpolación lineal."""
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0.5) == 2.5
+    assert percentile(values, 1.0) == 4.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_compare_with_baseline_flags_regressions():
+    """Comprueba que solo se señalan las variaciones que superan la tolerancia."""
+    baseline = {"mock-hit/analysis/c1": {"p95_ms": 10.0, "p99_ms": 20.0, "rps": 100.0}}
+    stable = {"mock-hit/analysis/c1": {"p95_ms": 11.0, "p99_ms": 21.0, "rps": 95.0}}
+    slower = {"mock-hit/analysis/c1": {"p95_ms": 15.0, "p99_ms": 21.0, "rps": 70.0}}
+    
+    assert compare_with_baseline(stable, baseline, 0.2) == []
+    assert len(compare_with_baseline(slower, baseline, 0.2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_fake_deepseek_answers_single_and_packed_prompts():
+    """Comprueba que el DeepSeek simulado responde en el formato que espera el detector."""
+    app = create_fake_deepseek(FakeDeepSeekSettings(latency_ms=0, jitter_ms=0))
+    detector = DeepSeekThreatDetector(api_key="test")
+    detector._api_url = "http://fake/chat/completions"
+    detector._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    
+    single = await detector.analyze_text("Si no paga la vacuna le quemamos el local")
+    batch = await detector.analyze_batch(["Buenos días", "Le vamos a dar un susto"])
+    
+    assert single.threat_type == ThreatType.EXTORSION
+    assert [item.result.threat_type for item in batch] == [ThreatType.NINGUNA, ThreatType.ROBO]
+    assert detector.get_stats()["packing"]["packed_items"] == 2
+    await detector.shutdown()
+
+
+def test_parser_benchmark_reads_every_response_shape():
+    """Comprueba que el microbenchmark de extracción acierta con todas las formas de respuesta."""
+    results = benchmark_parser(number=10, repeat=1)
+    
+    assert set(results) == {"standard", "verbose", "markdown", "malformed"}
+    assert all(result["accuracy"] == 1.0 for result in results.values())
+
+
+def test_serialization_benchmark_reports_every_method():
+    """Comprueba que el microbenchmark de serialización mide cada método y ambas rutas."""
+    serialization = benchmark_serialization(number=20, repeat=1)
+    requests = benchmark_requests(number=5, repeat=1)
+    
+    assert set(serialization) == {"generic", "fresh", "cached"}
+    assert set(requests) == {"generic", "analysis"}
+    assert all(micros > 0 for micros in [*serialization.values(), *requests.values()])
@@ -0,0 +1,170 @@
+"""Tests para la caché de análisis de amenazas."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.domain.models import ThreatAnalysis, ThreatType
+from src.domain.ports import ThreatDetectorPort
+from src.infrastructure.cached_threat_detector import CachedThreatDetector
+from src.infrastructure.memory_cache import InMemoryLRUCache
+from src.infrastructure.text_normalizer import TextNormalizer
+
+
+class FakeClock:
+    """Reloj manual para controlar las expiraciones en las pruebas."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingDetector(ThreatDetectorPort):
+    """Detector que devuelve un resultado fijo y cuenta las llamadas."""
+    
+    def __init__(self, result: ThreatAnalysis):
+        self.analyze_text_mock = AsyncMock(return_value=result)
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        return await self.analyze_text_mock(text)
+
+
+def _analysis(keyword: str = "vacuna") -> ThreatAnalysis:
+    """Crea un análisis de extorsión con la palabra clave indicada."""
+    return ThreatAnalysis(keyword=keyword, threat_type=ThreatType.EXTORSION, is_threat="SI")
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """Comprueba que se desaloja la entrada menos usada al superar el límite de entradas."""
+    cache = InMemoryLRUCache(max_entries=2, max_bytes=10**6, ttl_seconds=60)
+    await cache.set("a", _analysis("a"))
+    await cache.set("b", _analysis("b"))
+    assert await cache.get("a") is not None  # "a" pasa a ser la más reciente
+    await cache.set("c", _analysis("c"))
+    
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    assert await cache.get("c") is not None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_respects_byte_limit():
+    """Comprueba que el tamaño estimado nunca supera el límite en bytes."""
+    cache = InMemoryLRUCache(max_entries=1000, max_bytes=2000, ttl_seconds=60)
+    for i in range(20):
+        await cache.set(f"key-{i}", _analysis(f"palabra-{i}"))
+    
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 2000
+    assert stats["entries"] < 20
+    assert stats["evictions"] == 20 - stats["entries"]
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_entries_and_sweeps():
+    """Comprueba la expiración por TTL tanto en lectura como en el barrido."""
+    clock = FakeClock()
+    cache = InMemoryLRUCache(max_entries=10, max_bytes=10**6, ttl_seconds=10, clock=clock)
+    await cache.set("a", _analysis())
+    await cache.set("b", _analysis())
+    
+    clock.now = 11
+    assert await cache.get("a") is None
+    assert cache.sweep_expired() == 1
+    assert cache.get_stats()["entries"] == 0
+    assert cache.get_stats()["expirations"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_detector_skips_error_results():
+    """Comprueba que se cachean los análisis válidos pero no las respuestas de error."""
+    cache = InMemoryLRUCache(max_entries=10, max_bytes=10**6, ttl_seconds=60)
+    detector = CountingDetector(_analysis())
+    cached = CachedThreatDetector(detector, cache)
+    
+    await cached.analyze_text("Paga la vacuna")
+    await cached.analyze_text("Paga la vacuna")
+    assert detector.analyze_text_mock.await_count == 1
+    
+    detector.analyze_text_mock.return_value = ThreatAnalysis(
+        keyword="error_api", threat_type=ThreatType.NINGUNA, is_threat="NO"
+    )
+    await cached.analyze_text("Otro texto")
+    await cached.analyze_text("Otro texto")
+    assert detector.analyze_text_mock.await_count == 3
+    assert cached.get_stats()["cache"]["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_detector_coalesces_concurrent_requests():
+    """Comprueba que las peticiones concurrentes idénticas generan una sola llamada."""
+    release = asyncio.Event()
+    
+    class SlowDetector(CountingDetector):
+        async def analyze_text(self, text: str) -> ThreatAnalysis:
+            await release.wait()
+            return await super().analyze_text(text)
+    
+    detector = SlowDetector(_analysis())
+    cached = CachedThreatDetector(detector, InMemoryLRUCache(max_entries=10, max_bytes=10**6, ttl_seconds=60))
+    
+    tasks = [asyncio.ensure_future(cached.analyze_text("Paga la vacuna")) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    
+    assert detector.analyze_text_mock.await_count == 1
+    assert all(result.keyword == "vacuna" for result in results)
+    assert cached.get_stats()["single_flight"]["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_detector_batch_serves_hits_and_keeps_order():
+    """Comprueba que el lote sirve aciertos de caché, deduplica y respeta el orden."""
+    cache = InMemoryLRUCache(max_entries=10, max_bytes=10**6, ttl_seconds=60)
+    
+    class EchoDetector(ThreatDetectorPort):
+        def __init__(self):
+            self.calls = []
+        
+        async def analyze_text(self, text: str) -> ThreatAnalysis:
+            self.calls.append(text)
+            if text == "falla":
+                raise ValueError("sin respuesta")
+            return _analysis(text)
+    
+    detector = EchoDetector()
+    cached = CachedThreatDetector(detector, cache)
+    await cached.analyze_text("a")
+    
+    results = await cached.analyze_batch(["b", "a", "falla", "b"], max_concurrency=2)
+    
+    assert [item.index for item in results] == [0, 1, 2, 3]
+    assert results[0].result.keyword == "b"
+    assert results[1].result.keyword == "a"
+    assert results[2].result is None and "sin respuesta" in results[2].error
+    assert results[3].result.keyword == "b"
+    assert detector.calls == ["a", "b", "falla"]
+
+
+@pytest.mark.asyncio
+async def test_cached_detector_batch_analyzes_each_normalized_key_once():
+    """Comprueba que los textos que comparten clave normalizada se analizan una sola vez en el lote."""
+    detector = CountingDetector(_analysis())
+    cached = CachedThreatDetector(
+        detector, InMemoryLRUCache(max_entries=10, max_bytes=10**6, ttl_seconds=60),
+        normalizer=TextNormalizer(["casefold", "whitespace"])
+    )
+    
+    results = await cached.analyze_batch(["Paga la VACUNA", "paga  la vacuna", "Hola"])
+    
+    assert detector.analyze_text_mock.await_count == 2
+    assert [item.result.keyword for item in results] == ["vacuna", "vacuna", "vacuna"]
+    assert cached.get_stats()["single_flight"]["coalesced"] == 1
@@ -0,0 +1,126 @@
+"""Tests para el análisis de textos largos por fragmentos."""
+
+import random
+
+import pytest
+
+from src.domain.models import ThreatAnalysis, ThreatType
+from src.infrastructure.cached_threat_detector import CachedThreatDetector
+from src.infrastructure.chunking_threat_detector import ChunkingThreatDetector, aggregate_analyses
+from src.infrastructure.memory_cache import InMemoryLRUCache
+from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
+from src.infrastructure.text_chunker import TextChunker
+
+FILLER = "Buenos días, le escribo por el pedido de la semana pasada que todavía no llega."
+
+
+class CountingDetector(MockDeepSeekThreatDetector):
+    """Detector por reglas que registra los textos analizados."""
+    
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        self.calls.append(text)
+        return await super().analyze_text(text)
+
+
+def test_chunker_respects_limits_and_covers_every_sentence():
+    """Fuzz: los fragmentos no superan el máximo, se solapan y contienen todas las oraciones."""
+    rng = random.Random(7)
+    words = ["vacuna", "pedido", "mañana", "local", "dueño", "pago", "tienda", "cliente"]
+    for _ in range(200):
+        max_chars = rng.randint(80, 400)
+        chunker = TextChunker(max_chars=max_chars, overlap_chars=max_chars // 4)
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(1, 30))) + rng.choice(".!?\n")
+            for _ in range(rng.randint(1, 40))
+        ]
+        text = " ".join(sentences)
+        
+        chunks = chunker.split(text)
+        
+        assert all(len(chunk) <= max_chars for chunk in chunks)
+        joined = " ".join(chunks)
+        for sentence in sentences:
+            if len(sentence) <= max_chars:
+                assert sentence.strip() in joined
+        if len(text) <= max_chars:
+            assert chunks == [text]
+
+
+def test_chunker_windows_unpunctuated_text():
+    """Comprueba que un texto sin puntuación se corta en ventanas solapadas sin perder palabras."""
+    text = " ".join(["hola"] * 200 + ["paga", "la", "vacuna"] + ["adios"] * 200)
+    chunks = TextChunker(max_chars=300, overlap_chars=50).split(text)
+    
+    assert len(chunks) > 1 and all(len(chunk) <= 300 for chunk in chunks)
+    assert any("paga la vacuna" in chunk for chunk in chunks)
+    assert chunks[0][-50:] == chunks[1][:50]
+    with pytest.raises(ValueError):
+        TextChunker(max_chars=100, overlap_chars=100)
+
+
+def test_chunker_overlaps_sentences_longer_than_the_overlap():
+    """Comprueba que se repite el final de una oración que no cabe entera en el solapamiento."""
+    first = "El dueño del local tiene que pagar la vacuna antes del viernes en la noche."
+    second = "Si no paga le quemamos la tienda con todo lo que tenga dentro del local."
+    chunks = TextChunker(max_chars=100, overlap_chars=20).split(f"{first} {second}")
+    
+    assert chunks == [first, f"{first[-20:]} {second}"]
+
+
+def test_aggregate_takes_most_severe_verdict():
+    """Comprueba que se conserva el veredicto más grave con su palabra clave y fragmento."""
+    none = ThreatAnalysis(keyword="ninguna", threat_type=ThreatType.NINGUNA, is_threat="NO")
+    extortion = ThreatAnalysis(keyword="vacuna", threat_type=ThreatType.EXTORSION, is_threat="SI", justification="Pide pago.")
+    kidnapping = ThreatAnalysis(keyword="llevar", threat_type=ThreatType.SECUESTRO, is_threat="SI", degraded=True)
+    failed = ThreatAnalysis(keyword="error_api", threat_type=ThreatType.NINGUNA, is_threat="NO")
+    
+    result = aggregate_analyses([none, extortion, kidnapping])
+    assert (result.keyword, result.threat_type, result.degraded) == ("llevar", ThreatType.SECUESTRO, True)
+    assert aggregate_analyses([none, extortion]).justification == "Fragmento 2 de 2: Pide pago."
+    # Un fragmento sin analizar impide declarar el texto inofensivo, pero no oculta una amenaza
+    assert aggregate_analyses([none, failed]).keyword == "error_api"
+    assert aggregate_analyses([failed, extortion]).keyword == "vacuna"
+
+
+@pytest.mark.asyncio
+async def test_long_text_is_analyzed_by_chunks_with_per_chunk_cache():
+    """Comprueba que un texto largo se analiza por fragmentos cacheados por separado."""
+    inner = CountingDetector()
+    detector = ChunkingThreatDetector(
+        CachedThreatDetector(inner, InMemoryLRUCache(max_entries=100, max_bytes=10**6, ttl_seconds=60)),
+        TextChunker(max_chars=200, overlap_chars=40)
+    )
+    transcript = " ".join([FILLER] * 6 + ["Si no paga la vacuna le quemamos el local."] + [FILLER] * 6)
+    
+    result = await detector.analyze_text(transcript)
+    
+    assert result.threat_type == ThreatType.EXTORSION and result.keyword == "vacuna"
+    assert result.justification.startswith("Fragmento ")
+    first_calls = len(inner.calls)
+    assert first_calls > 1 and all(len(text) <= 200 for text in inner.calls)
+    
+    # Al cambiar el final solo se analizan los fragmentos nuevos
+    await detector.analyze_text(transcript + " Gracias por su atención.")
+    assert 0 < len(inner.calls) - first_calls < first_calls
+    
+    results = await detector.analyze_batch(["Hola", transcript])
+    assert [item.result.threat_type for item in results] == [ThreatType.NINGUNA, ThreatType.EXTORSION]
+    assert detector.get_stats()["chunking"]["chunked_texts"] == 3
+
+
+@pytest.mark.asyncio
+async def test_long_whitespace_text_is_analyzed_as_a_single_text():
+    """Comprueba que un texto largo formado solo por espacios no deja el análisis sin fragmentos."""
+    text = " " * 3000
+    assert TextChunker(max_chars=2000, overlap_chars=200).split(text) == [text]
+    
+    inner = CountingDetector()
+    detector = ChunkingThreatDetector(inner, TextChunker(max_chars=200, overlap_chars=40))
+    assert (await detector.analyze_text(text)).threat_type == ThreatType.NINGUNA
+    assert [name async for name, _ in detector.analyze_text_stream(text)][-1] == "result"
+    assert (await detector.analyze_batch([text]))[0].result.threat_type == ThreatType.NINGUNA
+    assert inner.calls == [text, text, text]
@@ -0,0 +1,119 @@
+"""Tests para el límite adaptativo de concurrencia."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.application.use_cases import AnalyzeTextUseCase
+from src.domain.exceptions import DetectorOverloadedError
+from src.domain.ports import ThreatDetectorPort
+from src.infrastructure.api import ThreatDetectionAPI
+from src.infrastructure.concurrency_limiter import AdaptiveConcurrencyLimiter
+
+
+class FakeClock:
+    """Reloj manual para controlar las latencias observadas."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(clock: FakeClock, **overrides) -> AdaptiveConcurrencyLimiter:
+    settings = dict(initial_limit=4, min_limit=1, max_limit=8, max_queue=1, queue_timeout=0.05, clock=clock)
+    settings.update(overrides)
+    return AdaptiveConcurrencyLimiter(**settings)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_on_success_and_backs_off_on_overload():
+    """Comprueba el aumento aditivo con éxito y la reducción multiplicativa con 429/5xx."""
+    clock = FakeClock()
+    limiter = _limiter(clock)
+    
+    for _ in range(8):
+        async with limiter.slot():
+            clock.now += 0.1
+    assert limiter.limit == 5
+    
+    async with limiter.slot() as permit:
+        clock.now += 0.1
+        permit.mark_overloaded()
+    assert limiter.limit == 3
+    
+    # Una segunda señal dentro de la misma latencia base no vuelve a reducir el límite
+    async with limiter.slot() as permit:
+        clock.now += 0.01
+        permit.mark_overloaded()
+    assert limiter.limit == 3
+    assert limiter.get_stats()["decreases"] == 1
+    
+    # Las llamadas largas por naturaleza (empaquetadas, streaming) no reducen el límite por su latencia
+    clock.now += 1.0
+    async with limiter.slot(latency_signal=False):
+        clock.now += 5.0
+    assert limiter.limit >= 3 and limiter.get_stats()["decreases"] == 1
+    async with limiter.slot():
+        clock.now += 5.0
+    assert limiter.get_stats()["decreases"] == 2
+
+
+@pytest.mark.asyncio
+async def test_excess_calls_queue_and_are_rejected_when_queue_is_full():
+    """Comprueba que el exceso espera turno y que se rechaza con la cola llena o la espera agotada."""
+    limiter = _limiter(FakeClock(), initial_limit=1, max_limit=1)
+    release = asyncio.Event()
+    
+    async def hold() -> None:
+        async with limiter.slot():
+            await release.wait()
+    
+    async def queued() -> str:
+        async with limiter.slot():
+            return "ok"
+    
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(queued())
+    await asyncio.sleep(0)
+    
+    with pytest.raises(DetectorOverloadedError) as rejected:
+        async with limiter.slot():
+            pass
+    assert rejected.value.retry_after >= 1
+    
+    release.set()
+    assert await waiter == "ok"
+    await holder
+    
+    release.clear()
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(DetectorOverloadedError):
+        await queued()
+    release.set()
+    await holder
+    stats = limiter.get_stats()
+    assert (stats["rejected"], stats["timed_out"], stats["inflight"]) == (1, 1, 0)
+
+
+class OverloadedDetector(ThreatDetectorPort):
+    """Detector que siempre está saturado."""
+    
+    async def analyze_text(self, text):
+        raise DetectorOverloadedError("saturado", retry_after=2.5)
+
+
+def test_api_answers_503_with_retry_after_when_overloaded():
+    """Comprueba que la API responde 503 con Retry-After en lugar de un falso negativo."""
+    api = ThreatDetectionAPI()
+    api._analyze_use_case = AnalyzeTextUseCase(OverloadedDetector())
+    client = TestClient(api.app)
+    
+    for path in ("/analysis", "/analysis/stream"):
+        response = client.post(path, json={"text": "Hola"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
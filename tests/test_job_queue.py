@@ -0,0 +1,127 @@
+"""Tests para los trabajos de análisis en segundo plano."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.application.job_queue import AnalysisJobQueue
+from src.application.use_cases import AnalyzeTextUseCase
+from src.domain.models import JobStatus, ThreatType
+from src.infrastructure.api import ThreatDetectionAPI
+from src.infrastructure.config import Config
+from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
+from src.infrastructure.sqlite_job_store import SQLiteJobStore
+
+TEXTS = ["Paga la vacuna o te va mal", "Buenos días", "Le vamos a dar un susto", "Hola", "Buenos días"]
+
+
+def _queue(path: str, **kwargs) -> AnalysisJobQueue:
+    """Crea una cola con el detector simulado y un almacén en el archivo indicado."""
+    return AnalysisJobQueue(
+        AnalyzeTextUseCase(MockDeepSeekThreatDetector()), SQLiteJobStore(path), poll_interval=0.05, **kwargs
+    )
+
+
+async def _collect(queue: AnalysisJobQueue, job_id: str):
+    """Sigue un trabajo hasta que termina y devuelve sus eventos."""
+    return [event async for event in queue.watch(job_id)]
+
+
+@pytest.mark.asyncio
+async def test_job_is_processed_in_chunks_and_streamed_in_order(tmp_path):
+    """Comprueba que los resultados se guardan por tramos y se emiten en orden con el progreso."""
+    queue = _queue(str(tmp_path / "jobs.sqlite3"), chunk_size=2)
+    await queue.startup()
+    
+    job = await queue.submit(TEXTS)
+    events = await asyncio.wait_for(_collect(queue, job.id), timeout=5)
+    
+    results = [data for name, data in events if name == "result"]
+    assert [item["index"] for item in results] == list(range(len(TEXTS)))
+    assert results[0]["result"]["threat_type"] == ThreatType.EXTORSION.value
+    assert results[1]["result"]["is_threat"] == "NO"
+    final = events[-1]
+    assert final[0] == "progress"
+    assert final[1]["status"] == JobStatus.COMPLETED.value
+    assert final[1]["processed"] == len(TEXTS)
+    assert queue.get_stats()["completed_jobs"] == 1
+    
+    # Un seguidor que se desconecta antes del final no deja su aviso de progreso
+    watcher = queue.watch((await queue.submit(["Hola"] * 3)).id)
+    await watcher.__anext__()
+    await watcher.aclose()
+    assert not queue._progress and not queue._watchers
+    await queue.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_job_resumes_after_restart(tmp_path):
+    """Comprueba que un trabajo sin procesador continúa desde el primer texto pendiente."""
+    path = str(tmp_path / "jobs.sqlite3")
+    store = SQLiteJobStore(path)
+    await store.startup()
+    # Trabajo creado por un proceso que se detuvo antes de procesarlo (concesión expirada)
+    job = await store.create(TEXTS, owner="proceso-anterior", lease_seconds=-1)
+    assert await store.claim(job.id, "proceso-anterior", lease_seconds=-1)
+    first = await AnalyzeTextUseCase(MockDeepSeekThreatDetector()).execute_batch(TEXTS[:2])
+    await store.save_results(job.id, "proceso-anterior", first, lease_seconds=-1)
+    await store.shutdown()
+    
+    queue = _queue(path)
+    await queue.startup()
+    events = await asyncio.wait_for(_collect(queue, job.id), timeout=5)
+    
+    assert [data["index"] for name, data in events if name == "result"] == list(range(len(TEXTS)))
+    assert events[-1][1]["status"] == JobStatus.COMPLETED.value
+    # Solo se analizaron los textos que faltaban
+    assert queue.get_stats()["processed_items"] == len(TEXTS) - 2
+    await queue.shutdown()
+
+
+class SlowDetector(MockDeepSeekThreatDetector):
+    """Detector simulado que tarda más que la concesión de un trabajo."""
+    
+    async def analyze_text(self, text: str):
+        await asyncio.sleep(0.3)
+        return await super().analyze_text(text)
+
+
+@pytest.mark.asyncio
+async def test_lease_is_renewed_while_a_slow_chunk_runs(tmp_path):
+    """Comprueba que otro procesador no puede tomar un trabajo cuyo tramo tarda más que la concesión."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = AnalysisJobQueue(
+        AnalyzeTextUseCase(SlowDetector()), store, chunk_size=len(TEXTS), lease_seconds=0.15, poll_interval=0.05
+    )
+    await queue.startup()
+    
+    job = await queue.submit(TEXTS)
+    await asyncio.sleep(0.25)
+    assert not await store.claim(job.id, "otro-proceso", lease_seconds=1)
+    events = await asyncio.wait_for(_collect(queue, job.id), timeout=5)
+    assert events[-1][1]["status"] == JobStatus.COMPLETED.value
+    await queue.shutdown()
+
+
+def test_api_accepts_ndjson_jobs_and_streams_results(tmp_path, monkeypatch):
+    """Comprueba `POST /jobs` con NDJSON y el seguimiento con `GET /jobs/{id}`."""
+    monkeypatch.setattr(Config, "USE_MOCK", True)
+    body = "\n".join(json.dumps(text) if i % 2 else json.dumps({"text": text}) for i, text in enumerate(TEXTS))
+    
+    with TestClient(ThreatDetectionAPI(job_store=SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))).app) as client:
+        response = client.post("/jobs", content=body, headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 202
+        job = response.json()
+        assert response.headers["Location"] == f"/jobs/{job['id']}"
+        assert job["total"] == len(TEXTS)
+        
+        lines = [json.loads(line) for line in client.get(f"/jobs/{job['id']}").text.splitlines()]
+        assert [line["index"] for line in lines if line["event"] == "result"] == list(range(len(TEXTS)))
+        assert lines[-1]["status"] == JobStatus.COMPLETED.value
+        
+        assert client.get("/jobs/desconocido").status_code == 404
+        invalid = client.post("/jobs", content='{"texto": 1}', headers={"Content-Type": "application/x-ndjson"})
+        assert invalid.status_code == 422
+        assert client.post("/jobs", json={"texts": []}).status_code == 422
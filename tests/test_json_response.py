@@ -0,0 +1,50 @@
+"""Tests para la serialización de las respuestas de la API."""
+
+import gc
+import json
+from types import SimpleNamespace
+
+from src.domain.models import BatchItemResult, ThreatAnalysis, ThreatType
+from src.infrastructure import json_response
+from src.infrastructure.json_response import analysis_json, batch_response, ndjson_line
+
+
+def test_analysis_json_matches_model_and_is_reused():
+    """Comprueba que la serialización coincide con el modelo y se reutiliza mientras vive el análisis."""
+    analysis = ThreatAnalysis(keyword="vacuna", threat_type=ThreatType.EXTORSION, is_threat="SI", justification="Pide \"pago\" ñ")
+    
+    body = analysis_json(analysis)
+    assert json.loads(body) == analysis.model_dump(mode="json")
+    assert analysis_json(analysis) is body
+    # Una copia modificada se serializa de nuevo
+    assert json.loads(analysis_json(analysis.model_copy(update={"degraded": True})))["degraded"] is True
+    
+    key = id(analysis)
+    del analysis
+    gc.collect()
+    assert key not in json_response._serialized
+
+
+def test_batch_and_ndjson_bodies_match_models():
+    """Comprueba que los cuerpos de lote y NDJSON equivalen a serializar los modelos."""
+    analysis = ThreatAnalysis(keyword="ninguna", threat_type=ThreatType.NINGUNA, is_threat="NO")
+    items = [BatchItemResult(index=0, result=analysis), BatchItemResult(index=1, error="Tiempo \"agotado\"")]
+    
+    body = json.loads(batch_response(items).body)
+    assert body == {"results": [item.model_dump(mode="json") for item in items]}
+    assert json.loads(ndjson_line("a-1", analysis, None)) == {"id": "a-1", "result": analysis.model_dump(mode="json"), "error": None}
+    assert json.loads(ndjson_line(3, None, "falló")) == {"id": 3, "result": None, "error": "falló"}
+    assert ndjson_line(3, None, "falló").endswith(b"\n")
+
+
+def test_ndjson_line_keeps_huge_integer_ids(monkeypatch):
+    """Comprueba que un `id` entero que orjson no admite se serializa con el módulo estándar."""
+    huge_id = 2 ** 70
+    
+    def reject_big_ints(content):
+        raise TypeError("Integer exceeds 64-bit range")
+    
+    assert json.loads(ndjson_line(huge_id, None, "falló"))["id"] == huge_id
+    monkeypatch.setattr(json_response, "orjson", SimpleNamespace(dumps=reject_big_ints), raising=False)
+    monkeypatch.setattr(json_response, "_ORJSON_AVAILABLE", True)
+    assert json.loads(ndjson_line(huge_id, None, "falló")) == {"id": huge_id, "result": None, "error": "falló"}
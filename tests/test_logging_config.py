@@ -0,0 +1,20 @@
+"""Tests para la configuración de registro."""
+
+import logging
+
+from src.infrastructure.config import Config
+from src.infrastructure.logging_config import log_summary
+
+
+def test_log_summary_respects_sample_rate(monkeypatch, caplog):
+    """Comprueba que el resumen no se registra si el análisis no entra en la muestra."""
+    logger = logging.getLogger("test_summary")
+    caplog.set_level(logging.INFO, logger="test_summary")
+    
+    monkeypatch.setattr(Config, "LOG_SAMPLE_RATE", 0.0)
+    log_summary(logger, "analisis palabra=%s", "vacuna")
+    assert not caplog.records
+    
+    monkeypatch.setattr(Config, "LOG_SAMPLE_RATE", 1.0)
+    log_summary(logger, "analisis palabra=%s", "vacuna")
+    assert [record.getMessage() for record in caplog.records] == ["analisis palabra=vacuna"]
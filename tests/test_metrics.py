@@ -0,0 +1,54 @@
+"""Tests para las métricas en formato Prometheus."""
+
+import httpx
+import pytest
+
+from src.infrastructure.config import Config
+from src.infrastructure.metrics import FALLBACK_RESULTS, UPSTREAM_RESPONSES, MetricsRegistry
+from src.infrastructure.threat_detector import DeepSeekThreatDetector
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Comprueba que los intervalos se exportan acumulados junto con la suma y el total."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latencia.", ("phase",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "total")
+    histogram.observe(0.5, "total")
+    histogram.observe(2.0, "total")
+    
+    lines = registry.render().splitlines()
+    
+    assert 'latency_seconds_bucket{phase="total",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{phase="total",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{phase="total",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{phase="total"} 2.55' in lines
+    assert 'latency_seconds_count{phase="total"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    """Comprueba que los valores de etiqueta se escapan al exportar."""
+    registry = MetricsRegistry()
+    counter = registry.counter("events_total", "Eventos.", ("name",))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    
+    assert 'events_total{name="a\\"b"} 3' in registry.render().splitlines()
+    with pytest.raises(ValueError):
+        registry.counter("events_total", "Duplicada.")
+
+
+@pytest.mark.asyncio
+async def test_detector_counts_upstream_status_and_fallbacks(monkeypatch):
+    """Comprueba que los códigos de estado de DeepSeek y los análisis de respaldo se contabilizan."""
+    monkeypatch.setattr(Config, "RETRY_MAX_ATTEMPTS", 1)
+    detector = DeepSeekThreatDetector(api_key="test")
+    detector._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    responses_before = UPSTREAM_RESPONSES.value("503")
+    fallbacks_before = FALLBACK_RESULTS.value("error_api")
+    
+    result = await detector.analyze_text("Hola")
+    
+    assert result.keyword == "error_api"
+    assert UPSTREAM_RESPONSES.value("503") == responses_before + 1
+    assert FALLBACK_RESULTS.value("error_api") == fallbacks_before + 1
+    await detector.shutdown()
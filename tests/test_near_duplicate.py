@@ -0,0 +1,114 @@
+"""Tests para el índice de textos casi idénticos y su decorador."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.domain.models import ThreatAnalysis, ThreatType
+from src.domain.ports import ThreatDetectorPort
+from src.infrastructure.near_duplicate_index import MinHashLSHIndex
+from src.infrastructure.near_duplicate_threat_detector import NearDuplicateThreatDetector
+from src.infrastructure.text_normalizer import TextNormalizer
+
+TEMPLATE = "Somos los Lobos, si no pagas la vacuna de 500 dólares hasta el viernes quemamos tu tienda Don Pepe"
+VARIANT = "Somos los Choneros, si no pagas la vacuna de 800 dolares hasta el viernes quemamos tu tienda Don Pepe"
+NEGATED = "Somos los Lobos, si pagas la vacuna de 500 dólares hasta el viernes no quemamos tu tienda Don Pepe"
+UNRELATED = "Buenos días, mañana abrimos la tienda Don Pepe a las 8 con ofertas en frutas y verduras"
+
+EXTORTION = ThreatAnalysis(keyword="vacuna", threat_type=ThreatType.EXTORSION, is_threat="SI")
+
+
+class FakeClock:
+    """Reloj manual para controlar la expiración de las entradas."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class RemoteDetector(ThreatDetectorPort):
+    """Detector remoto simulado que siempre detecta extorsión."""
+    
+    def __init__(self):
+        self.analyze_text_mock = AsyncMock(return_value=EXTORTION)
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        return await self.analyze_text_mock(text)
+
+
+def test_index_matches_template_variants_only():
+    """Comprueba que una variante de plantilla reutiliza el análisis y un texto distinto no."""
+    normalizer = TextNormalizer(["digits", "casefold", "accents", "whitespace"])
+    index = MinHashLSHIndex(threshold=0.8)
+    index.add(index.signature(normalizer.normalize(TEMPLATE)), EXTORTION)
+    
+    match = index.query(index.signature(normalizer.normalize(VARIANT)))
+    assert match is not None and match[0] == EXTORTION and match[1] >= 0.8
+    assert index.query(index.signature(normalizer.normalize(UNRELATED))) is None
+    # La etiqueta debe coincidir exactamente
+    assert index.query(index.signature(normalizer.normalize(VARIANT)), tag="otra") is None
+    assert index.get_stats()["hits"] == 1
+
+
+def test_index_signature_estimates_similarity():
+    """Comprueba que la similitud estimada se aproxima a la de Jaccard de los fragmentos."""
+    index = MinHashLSHIndex(num_perm=128, bands=16, shingle_size=5)
+    
+    def shingles(text):
+        return {text[i:i + 5] for i in range(len(text) - 4)}
+    
+    for other in (VARIANT, NEGATED, UNRELATED):
+        first, second = shingles(TEMPLATE), shingles(other)
+        jaccard = len(first & second) / len(first | second)
+        estimate = index.similarity(index.signature(TEMPLATE), index.signature(other))
+        assert abs(estimate - jaccard) < 0.15, other
+    assert index.similarity(index.signature(TEMPLATE), index.signature(TEMPLATE)) == 1.0
+
+
+def test_index_evicts_least_recently_used_and_expired_entries():
+    """Comprueba el límite de entradas (LRU) y la expiración."""
+    clock = FakeClock()
+    index = MinHashLSHIndex(max_entries=2, ttl_seconds=10, clock=clock)
+    texts = [TEMPLATE, UNRELATED, "Le vamos a dar un susto al dueño del local si sigue abriendo los domingos"]
+    signatures = [index.signature(text) for text in texts]
+    
+    index.add(signatures[0], EXTORTION)
+    index.add(signatures[1], EXTORTION)
+    assert index.query(signatures[0]) is not None
+    index.add(signatures[2], EXTORTION)
+    
+    assert index.query(signatures[1]) is None
+    assert index.query(signatures[0]) is not None
+    clock.now = 11
+    assert index.query(signatures[0]) is None
+    stats = index.get_stats()
+    assert (stats["evictions"], stats["expirations"], stats["entries"]) == (1, 1, 1)
+    
+    with pytest.raises(ValueError):
+        MinHashLSHIndex(num_perm=128, bands=10)
+
+
+@pytest.mark.asyncio
+async def test_detector_reuses_analysis_for_variants_but_not_negations():
+    """Comprueba que las variantes no llegan al detector y las negaciones o textos cortos sí."""
+    remote = RemoteDetector()
+    detector = NearDuplicateThreatDetector(
+        remote,
+        MinHashLSHIndex(threshold=0.8),
+        TextNormalizer(["digits", "casefold", "accents", "whitespace"])
+    )
+    
+    await detector.analyze_text(TEMPLATE)
+    assert await detector.analyze_text(VARIANT) == EXTORTION
+    assert remote.analyze_text_mock.await_count == 1
+    
+    await detector.analyze_text(NEGATED)
+    await detector.analyze_text("no te voy a hacer daño")
+    assert remote.analyze_text_mock.await_count == 3
+    
+    results = await detector.analyze_batch([VARIANT, UNRELATED])
+    assert [item.result for item in results] == [EXTORTION, EXTORTION]
+    assert remote.analyze_text_mock.await_count == 4
+    stats = detector.get_stats()["near_duplicates"]
+    assert (stats["hits"], stats["skipped"]) == (2, 1)
@@ -0,0 +1,104 @@
+"""Tests para el límite de peticiones por cliente."""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from benchmarks.fake_deepseek import FakeDeepSeekSettings, create_fake_deepseek
+from src.infrastructure.rate_limiter import GCRARateLimiter, RateLimit, RateLimitMiddleware, parse_rate_limits
+from src.infrastructure.request_usage import track_request_usage
+from src.infrastructure.threat_detector import DeepSeekThreatDetector
+
+
+class FakeClock:
+    """Reloj manual para controlar la recuperación de la cuota."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_gcra_allows_burst_then_refills_at_rate():
+    """Comprueba la ráfaga, el rechazo con espera y la recuperación al ritmo configurado."""
+    clock = FakeClock()
+    limiter = GCRARateLimiter(RateLimit(per_minute=60, burst=3), {"socio": RateLimit(600, 10)}, clock=clock)
+    
+    assert [limiter.acquire("ip:1").remaining for _ in range(3)] == [2, 1, 0]
+    rejected = limiter.acquire("ip:1")
+    assert not rejected.allowed and rejected.retry_after == pytest.approx(1.0)
+    assert dict(rejected.headers())["Retry-After"] == "1"
+    # Otro cliente tiene su propia cuota, y un cliente configurado su propio límite
+    assert limiter.acquire("ip:2").allowed
+    assert limiter.acquire("socio", cost=10).allowed and not limiter.acquire("socio").allowed
+    
+    clock.now = 1.0
+    assert limiter.acquire("ip:1").allowed and not limiter.acquire("ip:1").allowed
+    # Un cargo posterior deja al cliente en deuda hasta que se recupera
+    charged = limiter.charge("ip:2", 5)
+    assert charged.remaining == 0 and charged.reset_after == pytest.approx(5.0)
+    
+    clock.now = 4.5
+    assert limiter.sweep_idle() == 2
+    assert limiter.get_stats()["tracked_clients"] == 1
+    assert limiter.get_stats()["limited"] == 3
+
+
+def test_parse_rate_limits():
+    """Comprueba la lectura de los límites por clave de API."""
+    limits = parse_rate_limits("socio-a=600:100, socio=b=30:10,")
+    
+    assert {key: (limit.per_minute, limit.burst) for key, limit in limits.items()} == {
+        "socio-a": (600.0, 100.0), "socio=b": (30.0, 10.0)
+    }
+    assert parse_rate_limits("") == {}
+    for spec in ("socio-a=600", "600:100", "socio=0:10"):
+        with pytest.raises(ValueError):
+            parse_rate_limits(spec)
+
+
+@pytest.mark.asyncio
+async def test_middleware_prices_upstream_calls_and_returns_quota_headers():
+    """Comprueba las cabeceras de cuota, el coste de las llamadas a DeepSeek y las respuestas 429."""
+    deepseek = DeepSeekThreatDetector(api_key="test")
+    deepseek._api_url = "http://fake/chat/completions"
+    deepseek._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_fake_deepseek(FakeDeepSeekSettings(latency_ms=0, jitter_ms=0)))
+    )
+    app = FastAPI()
+    
+    @app.post("/analysis")
+    async def analysis(upstream: bool = False):
+        if upstream:
+            await deepseek.analyze_text("Si no paga la vacuna le quemamos el local")
+        return {"ok": True}
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+    
+    limiter = GCRARateLimiter(RateLimit(per_minute=60, burst=10), {"socio": RateLimit(60, 20)})
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, request_cost=1, upstream_cost=4)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api")
+    
+    local = await client.post("/analysis")
+    assert local.headers["X-RateLimit-Limit"] == "10" and local.headers["X-RateLimit-Remaining"] == "9"
+    upstream = await client.post("/analysis", params={"upstream": "true"})
+    assert upstream.headers["X-RateLimit-Remaining"] == "4"
+    
+    responses = [await client.post("/analysis") for _ in range(5)]
+    assert [response.status_code for response in responses] == [200, 200, 200, 200, 429]
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+    assert responses[-1].json()["detail"]
+    # Las claves desconocidas se limitan por IP; las configuradas tienen su propia cuota
+    assert (await client.post("/analysis", headers={"X-API-Key": "inventada"})).status_code == 429
+    assert (await client.post("/analysis", headers={"X-API-Key": "socio"})).headers["X-RateLimit-Remaining"] == "19"
+    # Las rutas no limitadas no consumen cuota
+    health = await client.get("/health")
+    assert health.status_code == 200 and "X-RateLimit-Remaining" not in health.headers
+    
+    with track_request_usage() as usage:
+        await deepseek.analyze_batch(["Buenos días", "Le vamos a dar un susto"])
+    assert usage.upstream_calls == 1
+    await deepseek.shutdown()
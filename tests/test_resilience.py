@@ -0,0 +1,175 @@
+"""Tests para los reintentos, las solicitudes de cobertura y el cortocircuito hacia DeepSeek."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.domain.models import ThreatType
+from src.infrastructure.config import Config
+from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
+from src.infrastructure.resilience import CircuitBreaker, UpstreamError, hedged, retry_with_backoff
+from src.infrastructure.threat_detector import DeepSeekThreatDetector
+
+
+class FakeClock:
+    """Reloj controlado por el test."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def _retry(operation, attempts=3):
+    return retry_with_backoff(
+        operation, attempts=attempts, base_delay=0, max_delay=0, deadline=10,
+        retryable=lambda error: isinstance(error, UpstreamError) and error.retryable
+    )
+
+
+@pytest.mark.asyncio
+async def test_retry_only_transient_errors():
+    """Comprueba que se reintentan los 5xx hasta el máximo de intentos, pero no los 4xx."""
+    calls = []
+    
+    async def flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise UpstreamError(503)
+        return "ok"
+    
+    async def bad_request() -> str:
+        calls.append(1)
+        raise UpstreamError(400)
+    
+    assert await _retry(flaky) == "ok"
+    assert len(calls) == 3
+    
+    calls.clear()
+    with pytest.raises(UpstreamError):
+        await _retry(bad_request)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_cancels_an_attempt_that_outlives_the_deadline():
+    """Comprueba que un intento colgado no supera el tiempo total de los reintentos."""
+    cancelled = []
+    
+    async def hangs() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return "tarde"
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await retry_with_backoff(hangs, attempts=3, base_delay=0, max_delay=0, deadline=0.05, retryable=lambda error: True)
+    assert cancelled == [1]
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_first_response_and_cancels_the_other():
+    """Comprueba que un intento lento se duplica y gana la respuesta más rápida."""
+    started = []
+    cancelled = []
+    
+    async def operation() -> int:
+        number = len(started)
+        started.append(number)
+        try:
+            await asyncio.sleep(1.0 if number == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(number)
+            raise
+        return number
+    
+    result, hedge_won = await hedged(operation, delay=0.02)
+    await asyncio.sleep(0)
+    
+    assert (result, hedge_won) == (1, True)
+    assert cancelled == [0]
+    assert await hedged(operation, delay=None) == (2, False)
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    """Comprueba las transiciones cerrado → abierto → semiabierto → cerrado."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    
+    clock.now = 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # solo una llamada de prueba a la vez
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.get_stats()["opens"] == 2
+
+
+def test_circuit_breaker_releases_probe_rejected_locally():
+    """Comprueba que una prueba que no llegó al servicio deja pasar la siguiente."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.release_probe()  # sin efecto fuera del estado semiabierto
+    breaker.record_failure()
+    
+    clock.now = 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_detector_retries_then_fails_over_to_rules(monkeypatch):
+    """Comprueba que DeepSeek se reintenta y, con el cortocircuito abierto, responde el detector local."""
+    monkeypatch.setattr(Config, "RETRY_BASE_DELAY_SECONDS", 0)
+    statuses = [503, 200, 500, 500, 500]
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Tipo: ninguna\nPalabra: hola"}}]})
+    
+    detector = DeepSeekThreatDetector(
+        api_key="test",
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+        failover=MockDeepSeekThreatDetector()
+    )
+    detector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    first = await detector.analyze_text("Hola")
+    assert first.keyword == "hola" and not first.degraded
+    
+    # Tres intentos fallidos abren el cortocircuito; responde el detector local
+    second = await detector.analyze_text("Paga la vacuna o te va mal")
+    assert second.degraded and second.threat_type == ThreatType.EXTORSION
+    
+    # Con el cortocircuito abierto no se llama a DeepSeek
+    third = await detector.analyze_text("Hola")
+    assert third.degraded
+    assert statuses == []
+    
+    stats = detector.get_stats()["resilience"]
+    assert stats["retries"] == 3
+    assert stats["failovers"] == 2
+    assert stats["circuit"]["state"] == CircuitBreaker.OPEN
+    await detector.shutdown()
@@ -0,0 +1,99 @@
+"""Tests para la extracción del análisis a partir de la respuesta del modelo."""
+
+import json
+import random
+
+import pytest
+
+from src.domain.models import ThreatType
+from src.infrastructure.response_parser import map_threat_type, parse_analysis, parse_line
+
+_TYPE_NAMES = {
+    ThreatType.EXTORSION: ("extorsión", "Extorsion", "EXTORSIÓN", "posible extorsión"),
+    ThreatType.ROBO: ("robo", "Robo", "ROBO a mano armada"),
+    ThreatType.SECUESTRO: ("secuestro", "Secuestro", "SECUESTRO"),
+    ThreatType.NINGUNA: ("ninguna", "Ninguna", "NINGUNA", "no hay amenaza"),
+}
+_TYPE_LABELS = ("Tipo", "tipo", "TIPO", "Tipo de amenaza")
+_KEYWORD_LABELS = ("Palabra", "palabra", "Palabra clave")
+_REASON_LABELS = ("Por qué", "Por que", "por qué", "Justificación")
+
+
+def _decorate(label: str, value: str, rng: random.Random) -> str:
+    """Escribe una línea de campo con una de las variantes de formato que usan los modelos."""
+    return rng.choice((
+        f"{label}: {value}",
+        f"**{label}:** {value}",
+        f"**{label}**: {value}",
+        f"- {label}: {value}",
+        f"  {label} :  {value}  ",
+        f"1. {label}: {value}",
+        f"### {label}: {value}",
+        f"__{label}:__ {value}",
+    ))
+
+
+def test_parser_handles_formatting_variants():
+    """Fuzz: respuestas con markdown, etiquetas alternativas, prosa y CRLF se clasifican bien."""
+    rng = random.Random(1234)
+    for _ in range(2000):
+        threat_type = rng.choice(list(_TYPE_NAMES))
+        keyword = rng.choice(("vacuna", "colaboración", "visita", "ninguna", "te vamos a llevar"))
+        lines = [
+            _decorate(rng.choice(_TYPE_LABELS), rng.choice(_TYPE_NAMES[threat_type]), rng),
+            _decorate(rng.choice(_KEYWORD_LABELS), keyword, rng),
+            _decorate(rng.choice(_REASON_LABELS), "Se pide un pago.", rng),
+        ]
+        if rng.random() < 0.5:
+            lines.insert(0, "Claro, este es el análisis solicitado.\n")
+        if rng.random() < 0.5:
+            lines.append("\nEspero que sea de ayuda.")
+        raw = ("\r\n" if rng.random() < 0.3 else "\n").join(lines)
+        
+        analysis = parse_analysis(raw)
+        
+        assert analysis.threat_type == threat_type, raw
+        assert analysis.keyword == keyword, raw
+        assert analysis.justification == "Se pide un pago.", raw
+        assert analysis.is_threat == ("NO" if threat_type == ThreatType.NINGUNA else "SI")
+
+
+def test_parser_never_fails_on_random_text():
+    """Fuzz: cualquier texto produce un análisis (o None en modo estricto sin `Tipo`)."""
+    rng = random.Random(99)
+    alphabet = "TipoPalbrqué:*_-#\n \r{}[]\"'0123456789áÓñ"
+    for _ in range(2000):
+        raw = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 120)))
+        analysis = parse_analysis(raw)
+        assert analysis is not None and analysis.keyword
+        strict = parse_analysis(raw, strict=True)
+        assert strict is None or strict.threat_type == analysis.threat_type
+
+
+@pytest.mark.parametrize("raw, threat_type, keyword", [
+    ('{"tipo": "robo", "palabra": "visita", "por_que": "Anuncia una visita."}', ThreatType.ROBO, "visita"),
+    ('```json\n{"threat_type": "secuestro", "keyword": "llevar"}\n```', ThreatType.SECUESTRO, "llevar"),
+    ("El texto parece extorsión, palabra vacuna.", ThreatType.EXTORSION, "vacuna"),
+    ("No hay amenaza en el texto.", ThreatType.NINGUNA, "ninguna"),
+    ("Ninguna: no es extorsión, solo un cobro legítimo.", ThreatType.NINGUNA, "ninguna"),
+    # Una negación que no se refiere a la amenaza no oculta el tipo que aparece después
+    ("Tipo: no explícita, pero es extorsión\nPalabra: vacuna", ThreatType.EXTORSION, "vacuna"),
+    ("El mensaje no es amable: es una extorsión clara", ThreatType.EXTORSION, "ninguna"),
+    # En texto libre, un tipo negado no es una amenaza
+    ("No se detecta extorsión ni robo en el mensaje.", ThreatType.NINGUNA, "ninguna"),
+    ("El mensaje no contiene amenazas de secuestro.", ThreatType.NINGUNA, "ninguna"),
+    ("Se descarta el robo; es una extorsión, palabra cuota.", ThreatType.EXTORSION, "cuota"),
+])
+def test_parser_understands_json_and_free_text(raw, threat_type, keyword):
+    """Comprueba las respuestas en JSON y sin formato."""
+    analysis = parse_analysis(raw)
+    assert (analysis.threat_type, analysis.keyword) == (threat_type, keyword)
+
+
+def test_strict_mode_and_helpers():
+    """Comprueba el modo estricto de los paquetes y las funciones de línea y tipo."""
+    assert parse_analysis("sin formato", strict=True) is None
+    assert parse_line("**Palabra clave:** vacuna**") == ("keyword", "vacuna")
+    assert parse_line("Palabras sueltas") is None
+    assert map_threat_type("extorsión, no robo") == ThreatType.EXTORSION
+    assert map_threat_type("desconocido") == ThreatType.NINGUNA
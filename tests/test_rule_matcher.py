@@ -0,0 +1,55 @@
+"""Tests para el motor de reglas del detector local."""
+
+import pytest
+
+from src.domain.models import ThreatType
+from src.infrastructure.mock_threat_detector import DEFAULT_RULES, MockDeepSeekThreatDetector
+from src.infrastructure.rule_matcher import RuleMatcher
+
+
+@pytest.fixture
+def matcher() -> RuleMatcher:
+    """Motor de reglas compilado con las reglas por defecto."""
+    return RuleMatcher(DEFAULT_RULES)
+
+
+def test_pattern_requires_context(matcher):
+    """Comprueba que un patrón con contexto solo se activa si aparece alguna palabra de contexto."""
+    result = matcher.match("Queremos llegar a un acuerdo para garantizar todo")
+    assert result.threat_type == ThreatType.EXTORSION
+    assert result.keyword == "acuerdo"
+    assert result.justification == "Se detectó una posible extorsión por el uso de 'acuerdo' en contexto con 'llegar'"
+    
+    assert matcher.match("Firmamos el acuerdo ayer").threat_type == ThreatType.NINGUNA
+
+
+def test_priority_between_threat_types(matcher):
+    """Comprueba que los patrones de extorsión tienen prioridad sobre los de robo y secuestro."""
+    result = matcher.match("Te daremos un susto si no pagas la cuota")
+    assert result.threat_type == ThreatType.EXTORSION
+    assert result.keyword == "cuota"
+
+
+def test_combination_and_simple_keywords(matcher):
+    """Comprueba las combinaciones contextuales y las palabras clave simples."""
+    result = matcher.match("Podemos ofrecer seguridad")
+    assert result.keyword == "ofrecimiento de seguridad"
+    
+    result = matcher.match("Vamos a llevar algo")
+    assert result.threat_type == ThreatType.SECUESTRO
+    assert result.justification == "Se detectó una posible amenaza de secuestro por el uso de la palabra 'llevar'."
+
+
+def test_overlapping_words_are_found(matcher):
+    """Comprueba que se detectan palabras contenidas o solapadas dentro de otras."""
+    found = matcher.scan("VACUNAS y visitarlos")
+    assert {"vacuna", "vacunas", "visita", "visitar"} <= found
+
+
+@pytest.mark.asyncio
+async def test_mock_detector_uses_compiled_rules():
+    """Comprueba que el simulador devuelve los análisis del motor de reglas."""
+    detector = MockDeepSeekThreatDetector()
+    result = await detector.analyze_text("Hola, buenos días")
+    assert result.is_threat == "NO"
+    assert result.keyword == "ninguna"
@@ -0,0 +1,84 @@
+"""Tests para las reglas del detector local recargables en caliente."""
+
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.domain.models import ThreatType
+from src.infrastructure.api import ThreatDetectionAPI
+from src.infrastructure.config import Config
+from src.infrastructure.mock_threat_detector import DEFAULT_RULES, MockDeepSeekThreatDetector
+from src.infrastructure.rule_set import RuleSet, load_rules
+
+
+def _write_rules(path, version: str, extra_keywords=()) -> None:
+    """Escribe un archivo de reglas con las reglas incluidas y palabras de extorsión adicionales."""
+    rules = json.loads(json.dumps(DEFAULT_RULES))
+    rules["version"] = version
+    rules["keywords"]["extorsión"].extend(extra_keywords)
+    path.write_text(json.dumps(rules, ensure_ascii=False), encoding="utf-8")
+    # Fecha de modificación distinta aunque el sistema de archivos tenga poca resolución
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.mark.asyncio
+async def test_rule_set_swaps_matcher_on_file_change_and_keeps_valid_rules(tmp_path):
+    """Comprueba la recarga al cambiar el archivo, la versión en los análisis y el rechazo de reglas no válidas."""
+    path = tmp_path / "rules.json"
+    _write_rules(path, "v1")
+    rule_set = RuleSet.from_file(str(path))
+    detector = MockDeepSeekThreatDetector(rule_set)
+    
+    before = await detector.analyze_text("El chulco pasa mañana a cobrar")
+    assert before.threat_type == ThreatType.NINGUNA and before.rule_set_version == "v1"
+    assert not await rule_set.reload_if_changed()
+    
+    in_flight = rule_set.matcher
+    _write_rules(path, "v2", ["chulco"])
+    assert await rule_set.reload_if_changed()
+    after = await detector.analyze_text("El chulco pasa mañana a cobrar")
+    assert after.threat_type == ThreatType.EXTORSION and after.keyword == "chulco"
+    assert after.rule_set_version == "v2"
+    # El motor anterior sigue siendo válido para quien ya lo tenía
+    assert in_flight.match("El chulco pasa mañana a cobrar").rule_set_version == "v1"
+    
+    # Un archivo no válido no sustituye las reglas vigentes ni se reintenta hasta que vuelva a cambiar
+    path.write_text('{"version": "v3", "keywords": {}}', encoding="utf-8")
+    with pytest.raises(ValueError, match="faltan las secciones"):
+        await rule_set.reload_if_changed()
+    assert not await rule_set.reload_if_changed()
+    assert rule_set.version == "v2"
+    assert rule_set.get_stats()["reloads"] == 1 and rule_set.get_stats()["failed_reloads"] == 1
+    
+    path.write_text("{no es json", encoding="utf-8")
+    with pytest.raises(ValueError, match="JSON no válido"):
+        load_rules(str(path))
+
+
+def test_admin_endpoint_reloads_rules(tmp_path, monkeypatch):
+    """Comprueba `POST /admin/rules/reload`, su token y la versión de las reglas en las respuestas."""
+    path = tmp_path / "rules.json"
+    _write_rules(path, "2026.01.1")
+    monkeypatch.setattr(Config, "USE_MOCK", True)
+    monkeypatch.setattr(Config, "RULES_PATH", str(path))
+    monkeypatch.setattr(Config, "RULES_RELOAD_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(Config, "ADMIN_TOKEN", "secreto")
+    
+    with TestClient(ThreatDetectionAPI().app) as client:
+        assert client.post("/analysis", json={"text": "Hola"}).json()["rule_set_version"] == "2026.01.1"
+        _write_rules(path, "2026.01.2", ["chulco"])
+        assert client.post("/admin/rules/reload").status_code == 403
+        assert client.post("/admin/rules/reload", headers={"X-Admin-Token": "otro"}).status_code == 403
+        
+        response = client.post("/admin/rules/reload", headers={"X-Admin-Token": "secreto"})
+        assert response.status_code == 200
+        assert response.json()["previous_version"] == "2026.01.1" and response.json()["version"] == "2026.01.2"
+        result = client.post("/analysis", json={"text": "Llegó el chulco"}).json()
+        assert result["keyword"] == "chulco" and result["rule_set_version"] == "2026.01.2"
+        
+        path.write_text("[]", encoding="utf-8")
+        assert client.post("/admin/rules/reload", headers={"X-Admin-Token": "secreto"}).status_code == 422
+        assert client.get("/stats").json()["rules"]["version"] == "2026.01.2"
@@ -0,0 +1,62 @@
+"""Tests para la caché persistente en SQLite."""
+
+import pytest
+
+from src.domain.models import ThreatAnalysis, ThreatType
+from src.infrastructure.sqlite_cache import SQLiteCache
+
+
+class FakeClock:
+    """Reloj manual para controlar las expiraciones en las pruebas."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def _analysis(keyword: str = "vacuna") -> ThreatAnalysis:
+    """Crea un análisis de extorsión con la palabra clave indicada."""
+    return ThreatAnalysis(keyword=keyword, threat_type=ThreatType.EXTORSION, is_threat="SI", justification="Pago")
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_is_shared_and_persistent(tmp_path):
+    """Comprueba que otra instancia (otro worker o un reinicio) ve los resultados guardados."""
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SQLiteCache(path, ttl_seconds=60, max_entries=100, compaction_interval_seconds=0)
+    await writer.startup()
+    await writer.set("clave", _analysis())
+    await writer.shutdown()
+    
+    reader = SQLiteCache(path, ttl_seconds=60, max_entries=100, compaction_interval_seconds=0)
+    await reader.startup()
+    assert await reader.get("clave") == _analysis()
+    assert await reader.get("otra") is None
+    assert reader.get_stats()["hits"] == 1
+    await reader.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_expires_and_compacts(tmp_path):
+    """Comprueba la expiración por TTL y la compactación de entradas expiradas y sobrantes."""
+    clock = FakeClock()
+    cache = SQLiteCache(
+        str(tmp_path / "cache.sqlite3"), ttl_seconds=10, max_entries=2,
+        compaction_interval_seconds=0, clock=clock
+    )
+    await cache.startup()
+    await cache.set("vieja", _analysis())
+    clock.now += 5
+    for key in ("a", "b", "c"):
+        await cache.set(key, _analysis(key))
+        clock.now += 1
+    
+    clock.now += 3
+    assert await cache.get("vieja") is None
+    # Se elimina la expirada y la más antigua de las restantes para respetar el límite
+    assert await cache.compact() == 2
+    assert await cache.get("a") is None
+    assert (await cache.get("c")).keyword == "c"
+    await cache.shutdown()
@@ -0,0 +1,41 @@
+"""Tests para la normalización de textos de las claves de caché."""
+
+import pytest
+
+from src.infrastructure.cached_threat_detector import CachedThreatDetector
+from src.infrastructure.memory_cache import InMemoryLRUCache
+from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
+from src.infrastructure.text_normalizer import TextNormalizer
+
+
+def test_normalizer_applies_steps_in_order():
+    """Comprueba que las variantes de un mensaje difundido se normalizan igual."""
+    normalizer = TextNormalizer(["whitespace", "casefold", "nfkc", "accents", "emoji", "digits", "urls", "names"])
+    first = normalizer.normalize("Saludos  a Tienda Pepe, la COLABORACIÓN es de 200 dólares. Llama al 099 123 4567 😡")
+    second = normalizer.normalize("saludos a Ferretería Lucía, la colaboracion es de 350 dolares.\nLlama al 0987654321 ")
+    
+    assert first == second == "saludos a <nombre> <nombre>, la colaboracion es de <num> dolares. llama al <num>"
+    assert normalizer.normalize("Mira https://ejemplo.com/pago") == "mira <url>"
+
+
+def test_normalizer_rejects_unknown_steps():
+    """Comprueba que se rechazan pasos de normalización inexistentes."""
+    with pytest.raises(ValueError):
+        TextNormalizer(["casefold", "stemming"])
+
+
+@pytest.mark.asyncio
+async def test_normalized_variants_share_cache_entry():
+    """Comprueba que las variantes normalizadas comparten la entrada de caché."""
+    cache = InMemoryLRUCache(max_entries=10, max_bytes=10**6, ttl_seconds=60)
+    detector = CachedThreatDetector(
+        MockDeepSeekThreatDetector(), cache, TextNormalizer(["nfkc", "casefold", "whitespace"])
+    )
+    
+    await detector.analyze_text("Paga la  VACUNA")
+    await detector.analyze_text("paga la vacuna")
+    
+    stats = detector.get_stats()
+    assert stats["cache"]["hits"] == 1
+    assert stats["cache"]["hit_rate"] == 0.5
+    assert stats["normalization"]["normalized_keys"] == 1
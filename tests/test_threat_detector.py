@@ -0,0 +1,120 @@
+"""Tests para el adaptador de DeepSeek."""
+
+import json
+
+import httpx
+import pytest
+
+from src.domain.models import ThreatType
+from src.infrastructure.threat_detector import DeepSeekThreatDetector
+
+
+def _deepseek_response(content: str) -> dict:
+    """Construye una respuesta de chat-completions con el contenido indicado."""
+    return {"choices": [{"message": {"content": content}}]}
+
+
+@pytest.mark.asyncio
+async def test_detector_reuses_shared_client():
+    """Comprueba que todas las llamadas usan el mismo cliente HTTP compartido."""
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_deepseek_response(
+            "Tipo: extorsión\nPalabra: vacuna\nPor qué: Pide un pago periódico."
+        ))
+    
+    detector = DeepSeekThreatDetector(api_key="test")
+    detector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await detector.startup()
+    client = detector._get_client()
+    
+    first = await detector.analyze_text("Paga la vacuna")
+    second = await detector.analyze_text("Otra vacuna distinta")
+    
+    assert detector._get_client() is client
+    assert len(calls) == 2
+    assert first.threat_type == ThreatType.EXTORSION
+    assert second.keyword == "vacuna"
+    assert detector.get_stats()["http_pool"]["requests_sent"] == 2
+    
+    await detector.shutdown()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_detector_packs_short_texts_and_falls_back():
+    """Comprueba que los textos cortos comparten un prompt y los bloques inválidos se reintentan solos."""
+    prompts = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["messages"][0]["content"]
+        prompts.append(prompt)
+        if "[1]" in prompt:
+            return httpx.Response(200, json=_deepseek_response(
+                "[1]\nTipo: extorsión\nPalabra: vacuna\nPor qué: Pide un pago.\n\n"
+                "[2] Tipo: ninguna\nPalabra: ninguna\nPor qué: Saludo.\n\n"
+                "[3]\nsin formato"
+            ))
+        return httpx.Response(200, json=_deepseek_response(
+            "Tipo: robo\nPalabra: visita\nPor qué: Anuncia una visita."
+        ))
+    
+    detector = DeepSeekThreatDetector(api_key="test")
+    detector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    results = await detector.analyze_batch(["Paga la vacuna", "Hola", "Te haremos una visita", "Hola"])
+    
+    assert len(prompts) == 2
+    assert [item.result.threat_type for item in results] == [
+        ThreatType.EXTORSION, ThreatType.NINGUNA, ThreatType.ROBO, ThreatType.NINGUNA
+    ]
+    stats = detector.get_stats()["packing"]
+    assert stats == {"packed_requests": 1, "packed_items": 2, "fallbacks": 1}
+    await detector.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_detector_streams_threat_type_before_completion():
+    """Comprueba que el tipo de amenaza se emite en cuanto llega su línea y al final el resultado completo."""
+    chunks = ["Tipo: rob", "o\nPalabra: vis", "ita\nPor qué: Anuncia", " una visita."]
+    body = "".join(
+        f"data: {json.dumps({'choices': [{'delta': {'content': chunk}}]})}\n\n" for chunk in chunks
+    ) + "data: [DONE]\n\n"
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=body.encode(), headers={"Content-Type": "text/event-stream"})
+    
+    detector = DeepSeekThreatDetector(api_key="test")
+    detector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    events = [event async for event in detector.analyze_text_stream("Te haremos una visita")]
+    
+    assert [name for name, _ in events] == ["threat_type", "keyword", "justification", "result"]
+    assert events[0][1] == {"threat_type": "robo", "is_threat": "SI"}
+    assert events[-1][1]["justification"] == "Anuncia una visita."
+    await detector.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_stream_does_not_contradict_emitted_fields():
+    """Comprueba que un fallo a mitad del flujo emite un error sin un análisis de respaldo ni abrir el cortocircuito."""
+    body = (
+        f"data: {json.dumps({'choices': [{'delta': {'content': 'Tipo: extorsión' + chr(10)}}]})}\n\n"
+        "data: {fragmento mal formado\n\n"
+    )
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body.encode(), headers={"Content-Type": "text/event-stream"})
+    
+    detector = DeepSeekThreatDetector(api_key="test")
+    detector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    events = [event async for event in detector.analyze_text_stream("Paga la vacuna")]
+    
+    assert [name for name, _ in events] == ["threat_type", "error"]
+    assert events[0][1]["threat_type"] == "extorsión"
+    assert detector._breaker.get_stats()["consecutive_failures"] == 0
+    await detector.shutdown()
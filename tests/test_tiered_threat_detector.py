@@ -0,0 +1,63 @@
+"""Tests para el detector escalonado con filtro local."""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.domain.models import ThreatAnalysis, ThreatType
+from src.domain.ports import ThreatDetectorPort
+from src.infrastructure.mock_threat_detector import DEFAULT_RULES
+from src.infrastructure.rule_matcher import RuleMatcher
+from src.infrastructure.tiered_threat_detector import TieredThreatDetector
+
+
+class RemoteDetector(ThreatDetectorPort):
+    """Detector remoto simulado que siempre detecta extorsión."""
+    
+    def __init__(self):
+        self.analyze_text_mock = AsyncMock(return_value=ThreatAnalysis(
+            keyword="remoto", threat_type=ThreatType.EXTORSION, is_threat="SI"
+        ))
+    
+    async def analyze_text(self, text: str) -> ThreatAnalysis:
+        return await self.analyze_text_mock(text)
+
+
+@pytest.mark.asyncio
+async def test_benign_text_is_decided_locally():
+    """Comprueba que los textos sin vocabulario de amenazas no llegan al detector remoto."""
+    remote = RemoteDetector()
+    detector = TieredThreatDetector(remote, RuleMatcher(DEFAULT_RULES))
+    
+    result = await detector.analyze_text("Su pedido llega mañana, gracias por su compra")
+    
+    assert result.is_threat == "NO"
+    remote.analyze_text_mock.assert_not_awaited()
+    assert detector.get_stats()["prefilter"]["local_decisions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_suspicious_text_is_escalated():
+    """Comprueba que los textos con vocabulario sospechoso se escalan según el umbral."""
+    remote = RemoteDetector()
+    strict = TieredThreatDetector(remote, RuleMatcher(DEFAULT_RULES), max_benign_hits=0)
+    lenient = TieredThreatDetector(remote, RuleMatcher(DEFAULT_RULES), max_benign_hits=1)
+    
+    # "local" es palabra de contexto pero no activa ninguna regla por sí sola
+    assert (await strict.analyze_text("Estamos en el local")).keyword == "remoto"
+    assert (await lenient.analyze_text("Estamos en el local")).keyword == "ninguna"
+    # Las amenazas detectadas por las reglas siempre se confirman en remoto
+    assert (await lenient.analyze_text("Paga la vacuna")).keyword == "remoto"
+    assert remote.analyze_text_mock.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_escalates_only_suspicious_texts():
+    """Comprueba que el lote conserva el orden y solo escala los textos sospechosos."""
+    remote = RemoteDetector()
+    detector = TieredThreatDetector(remote, RuleMatcher(DEFAULT_RULES))
+    
+    results = await detector.analyze_batch(["Hola", "Paga la cuota", "Gracias"])
+    
+    assert [item.index for item in results] == [0, 1, 2]
+    assert [item.result.keyword for item in results] == ["ninguna", "remoto", "ninguna"]
+    remote.analyze_text_mock.assert_awaited_once_with("Paga la cuota")
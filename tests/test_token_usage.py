@@ -0,0 +1,87 @@
+"""Tests para la contabilidad de tokens de DeepSeek y el presupuesto de gasto."""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from benchmarks.fake_deepseek import FakeDeepSeekSettings, create_fake_deepseek
+from src.infrastructure.metrics import FAILOVER_RESULTS, TOKEN_BUDGET_DEGRADED
+from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
+from src.infrastructure.request_usage import RequestUsageMiddleware
+from src.infrastructure.threat_detector import DeepSeekThreatDetector
+from src.infrastructure.token_usage import TokenBudget, TokenUsageLedger
+
+
+class FakeClock:
+    """Reloj manual para controlar las ventanas de consumo."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ledger_windows_and_budget_hysteresis():
+    """Comprueba el consumo por ventana y el cambio de modo con histéresis."""
+    clock = FakeClock()
+    ledger = TokenUsageLedger(bucket_seconds=10, retention_seconds=100, clock=clock)
+    budget = TokenBudget(ledger, max_tokens=100, window_seconds=30, resume_ratio=0.5)
+    
+    ledger.record(40, 20)
+    clock.now += 15
+    ledger.record(30, 10)
+    # Se suman los intervalos que se solapan con la ventana
+    assert ledger.window(5)["total_tokens"] == 40
+    assert ledger.window(6)["total_tokens"] == 100
+    assert ledger.window(30) == {"calls": 2, "prompt_tokens": 70, "completion_tokens": 30, "total_tokens": 100}
+    
+    assert not budget.allow() and TOKEN_BUDGET_DEGRADED.value() == 1
+    # Al salir de la ventana el primer intervalo el consumo (40) baja del umbral de vuelta (50)
+    clock.now += 25
+    assert budget.allow() and TOKEN_BUDGET_DEGRADED.value() == 0
+    stats = budget.get_stats()
+    assert (stats["mode"], stats["transitions"], stats["rejected_calls"]) == ("normal", 2, 1)
+    
+    clock.now += 1000
+    assert ledger.get_stats({"1m": 60})["windows"]["1m"]["calls"] == 0
+    assert ledger.get_stats()["totals"]["total_tokens"] == 100
+
+
+@pytest.mark.asyncio
+async def test_detector_accounts_tokens_and_degrades_when_budget_is_spent():
+    """Comprueba la contabilidad por petición y ruta y el paso al detector local sin presupuesto."""
+    ledger = TokenUsageLedger()
+    deepseek = DeepSeekThreatDetector(
+        api_key="test",
+        failover=MockDeepSeekThreatDetector(),
+        usage_ledger=ledger,
+        budget=TokenBudget(ledger, max_tokens=1, window_seconds=60)
+    )
+    deepseek._api_url = "http://fake/chat/completions"
+    deepseek._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_fake_deepseek(FakeDeepSeekSettings(latency_ms=0, jitter_ms=0)))
+    )
+    app = FastAPI()
+    
+    @app.post("/analysis/stream")
+    async def analysis_stream():
+        return [event async for event in deepseek.analyze_text_stream("Si no paga la vacuna le quemamos el local")]
+    
+    app.add_middleware(RequestUsageMiddleware, ledger=ledger)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api")
+    failovers_before = FAILOVER_RESULTS.value("budget_exhausted")
+    
+    response = await client.post("/analysis/stream")
+    spent = ledger.get_stats()["totals"]["total_tokens"]
+    assert spent > 0 and response.headers["X-Upstream-Tokens"] == str(spent)
+    assert response.headers["X-Upstream-Calls"] == "1"
+    assert ledger.get_stats()["routes"]["/analysis/stream"]["requests"] == 1
+    
+    # Con el presupuesto agotado responde el detector local sin llamar a DeepSeek
+    result = await deepseek.analyze_text("Si no paga la vacuna le quemamos el local")
+    assert result.degraded and result.keyword == "vacuna"
+    assert (await client.post("/analysis/stream")).headers["X-Upstream-Calls"] == "0"
+    assert FAILOVER_RESULTS.value("budget_exhausted") == failovers_before + 2
+    assert ledger.get_stats()["totals"]["calls"] == 1
+    await deepseek.shutdown()
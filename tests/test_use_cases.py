@@ -1,11 +1,18 @@
 """Tests para los casos de uso."""
 
+import asyncio
+import json
+
 import pytest
 from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
 
 from src.application.use_cases import AnalyzeTextUseCase
 from src.domain.models import ThreatAnalysis, ThreatType
 from src.domain.ports import ThreatDetectorPort
+from src.infrastructure.api import ThreatDetectionAPI
+from src.infrastructure.config import Config
+from src.infrastructure.mock_threat_detector import MockDeepSeekThreatDetector
 
 
 class MockThreatDetector(ThreatDetectorPort):
@@ -42,3 +49,132 @@ async def test_analyze_text_use_case():
     assert result.keyword == "vacunas"
     assert result.threat_type == ThreatType.EXTORSION
     assert result.is_threat == "SI"
+
+
+@pytest.mark.asyncio
+async def test_analyze_text_use_case_batch():
+    """Test para comprobar que el caso de uso analiza lotes en orden y sin duplicados."""
+    mock_detector = MockThreatDetector()
+    mock_detector.analyze_text_mock.side_effect = lambda text: ThreatAnalysis(
+        keyword=text,
+        threat_type=ThreatType.NINGUNA,
+        is_threat="NO"
+    )
+    
+    use_case = AnalyzeTextUseCase(mock_detector)
+    results = await use_case.execute_batch(["uno", "dos", "uno"], max_concurrency=2)
+    
+    assert mock_detector.analyze_text_mock.await_count == 2
+    assert [item.result.keyword for item in results] == ["uno", "dos", "uno"]
+    assert [item.index for item in results] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_analyze_text_use_case_pipeline():
+    """Test para comprobar que el flujo acota los análisis en curso y emite sin esperar entradas."""
+    in_flight = peak = 0
+    release = asyncio.Event()
+    
+    async def analyze(text: str) -> ThreatAnalysis:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        if text == "lento":
+            await release.wait()
+        in_flight -= 1
+        if text == "falla":
+            raise RuntimeError("fallo del detector")
+        return ThreatAnalysis(keyword=text, threat_type=ThreatType.NINGUNA, is_threat="NO")
+    
+    mock_detector = MockThreatDetector()
+    mock_detector.analyze_text_mock.side_effect = analyze
+    
+    async def entries():
+        yield "a", "lento"
+        for index in range(20):
+            yield index, "falla" if index == 3 else f"texto {index}"
+        yield "invalida", ValueError("línea no válida")
+        # El emisor deja de enviar: el análisis pendiente debe llegar igualmente
+        release.set()
+        await asyncio.sleep(3600)
+    
+    use_case = AnalyzeTextUseCase(mock_detector)
+    outcomes = {}
+    async for key, outcome in use_case.execute_pipeline(entries(), max_in_flight=3):
+        outcomes[key] = outcome
+        if len(outcomes) == 22:
+            break
+    
+    assert peak <= 3
+    assert outcomes[5].keyword == "texto 5"
+    assert isinstance(outcomes[3], RuntimeError)
+    assert isinstance(outcomes["invalida"], ValueError)
+    assert outcomes["a"].keyword == "lento"
+
+
+def test_api_analyzes_ndjson_stream_with_correlation_ids(monkeypatch):
+    """Test para comprobar que `/analysis/ndjson` devuelve un resultado por línea con su id."""
+    monkeypatch.setattr(Config, "USE_MOCK", True)
+    body = "\n".join([
+        json.dumps({"id": "msg-1", "text": "Paga la vacuna o te va mal"}),
+        json.dumps("Buenos días"),
+        "{no es json",
+        json.dumps({"id": 7, "text": "Hola"}),
+        '{"id": NaN, "text": "Hola"}',
+        '{"id": ["a"], "text": "Hola"}',
+    ]) + "\n"
+    
+    with TestClient(ThreatDetectionAPI().app) as client:
+        response = client.post("/analysis/ndjson", content=body, headers={"Content-Type": "application/x-ndjson"})
+    
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {line["id"]: line for line in map(json.loads, response.text.splitlines())}
+    assert set(lines) == {"msg-1", 2, 3, 7, 5, 6}
+    assert "'id'" in lines[5]["error"] and "'id'" in lines[6]["error"]
+    assert lines["msg-1"]["result"]["threat_type"] == ThreatType.EXTORSION.value
+    assert lines[2]["result"]["is_threat"] == "NO"
+    assert lines[3]["result"] is None and lines[3]["error"].startswith("Línea 3")
+
+
+@pytest.mark.asyncio
+async def test_ndjson_stream_stops_analyzing_when_client_disconnects(monkeypatch):
+    """Test para comprobar que una desconexión del cliente cancela los análisis en curso de `/analysis/ndjson`."""
+    monkeypatch.setattr(Config, "USE_MOCK", True)
+    started = []
+    cancelled = []
+    all_started = asyncio.Event()
+    
+    async def hanging_analysis(self, text: str) -> ThreatAnalysis:
+        started.append(text)
+        if len(started) == 3:
+            all_started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+    
+    monkeypatch.setattr(MockDeepSeekThreatDetector, "analyze_text", hanging_analysis)
+    body = "\n".join(json.dumps(f"texto {index}") for index in range(3)).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await all_started.wait()
+        return {"type": "http.disconnect"}
+    
+    async def send(message):
+        pass
+    
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/analysis/ndjson", "raw_path": b"/analysis/ndjson", "query_string": b"",
+        "root_path": "", "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    app = ThreatDetectionAPI().app
+    async with app.router.lifespan_context(app):
+        await asyncio.wait_for(app(scope, receive, send), timeout=2)
+    
+    assert sorted(cancelled) == sorted(started) == ["texto 0", "texto 1", "texto 2"]